@@ -0,0 +1,37 @@
+import os
+import sys
+
+
+def app_data_dir() -> str:
+    """Return (and create) the per-user folder where PyCommander keeps its caches."""
+    if os.name == 'nt':
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    path = os.path.join(base, "PyCommander")
+    try:
+        os.makedirs(path, exist_ok=True)
+    except OSError:
+        path = os.path.abspath(".")
+    return path
+
+
+def data_path(name: str) -> str:
+    """Absolute path of a cache file inside app_data_dir()."""
+    return os.path.join(app_data_dir(), name)
+
+
+def atomic_write(path: str, data: bytes):
+    """Write bytes to path via a temp file + rename so a crash never leaves half a cache."""
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+if sys.platform == "win32":
+    def norm_key(path: str) -> str:
+        return os.path.normcase(os.path.abspath(path))
+else:
+    def norm_key(path: str) -> str:
+        return os.path.abspath(path)
@@ -0,0 +1,349 @@
+import bz2
+import gzip
+import hashlib
+import lzma
+import os
+import pickle
+import tarfile
+import threading
+import time
+import zipfile
+from collections import OrderedDict, namedtuple
+
+from appdata import data_path, atomic_write, norm_key
+from copy_engine import CHUNK, RENAME, resolve_conflict, unique_name
+from jobs import Job, JobCancelled
+
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.xz", ".txz", ".tar.bz2", ".tbz2")
+MEMORY_CACHE = 8  # archive indexes kept in memory
+
+# stat-like record for members, enough for the preview pane and resolve_conflict()
+MemberStat = namedtuple("MemberStat", "st_size st_mtime st_mtime_ns")
+
+_OPENERS = {None: open, "gz": gzip.open, "xz": lzma.open, "bz2": bz2.open}
+
+
+def is_archive(path: str) -> bool:
+    return path.lower().endswith(ARCHIVE_SUFFIXES) and os.path.isfile(path)
+
+
+def split_archive_path(path: str):
+    """'/x/a.zip/dir/f.txt' -> ('/x/a.zip', 'dir/f.txt'); (None, None) if path is not inside an archive."""
+    head, parts = path, []
+    while True:
+        if os.path.lexists(head):
+            if parts and is_archive(head):
+                return head, "/".join(reversed(parts))
+            return None, None
+        head, tail = os.path.split(head)
+        if not tail:
+            return None, None
+        parts.append(tail)
+
+
+def _compression(path):
+    with open(path, "rb") as f:
+        magic = f.read(6)
+    if magic.startswith(b"\x1f\x8b"):
+        return "gz"
+    if magic.startswith(b"\xfd7zXZ\x00"):
+        return "xz"
+    if magic.startswith(b"BZh"):
+        return "bz2"
+    return None
+
+
+def _safe_member_path(name):
+    """
+    Member name as a clean relative "a/b" path, or None for names that
+    could escape the extraction folder (absolute, drive letter, "..").
+    """
+    name = name.replace("\\", "/")
+    if name.startswith("/"):
+        return None
+    parts = [part for part in name.split("/") if part and part != "."]
+    if not parts or ".." in parts or ":" in parts[0]:
+        return None
+    return "/".join(parts)
+
+
+class ArchiveIndex:
+    """
+    Listing of one archive: entries[rel] = [is_dir, size, mtime_ns, ref] and
+    children[rel_dir] = [names]. Paths use "/" and the root is "".
+    ref is the member name for zip and the data offset for tar, so a tar
+    member is read by seeking instead of scanning the archive again.
+    """
+
+    def __init__(self, archive, kind, compression=None):
+        self.archive = archive
+        self.kind = kind
+        self.compression = compression
+        self.entries = {"": [True, 0, 0, None]}
+        self.children = {"": []}
+
+    def add(self, rel, is_dir, size, mtime_ns, ref):
+        rel = _safe_member_path(rel)
+        if not rel:
+            return
+        if rel in self.entries:
+            self.entries[rel] = [is_dir, size, mtime_ns, ref] if not is_dir else self.entries[rel]
+            return
+        parent, _, name = rel.rpartition("/")
+        if parent not in self.entries:
+            self.add(parent, True, 0, mtime_ns, None)  # zip files often omit folder entries
+        self.entries[rel] = [is_dir, size, mtime_ns, ref]
+        self.children[parent].append(name)
+        if is_dir:
+            self.children[rel] = []
+
+    def is_dir(self, rel):
+        entry = self.entries.get(rel)
+        return entry is not None and entry[0]
+
+    def stat(self, rel):
+        is_dir, size, mtime, _ = self.entries[rel]
+        return MemberStat(0 if is_dir else size, mtime / 1e9, mtime)
+
+    def walk_files(self, rel):
+        """Yield rel paths of all files at or under rel."""
+        stack = [rel]
+        while stack:
+            current = stack.pop()
+            if not self.is_dir(current):
+                yield current
+                continue
+            prefix = f"{current}/" if current else ""
+            stack.extend(prefix + name for name in self.children[current])
+
+    def open(self, rel):
+        """File object streaming one member; close it when done."""
+        is_dir, size, _mtime, ref = self.entries[rel]
+        if is_dir:
+            raise IsADirectoryError(rel)
+        if self.kind == "zip":
+            with zipfile.ZipFile(self.archive) as zf:
+                return zf.open(ref)  # the member keeps the archive file open
+        f = _OPENERS[self.compression](self.archive, "rb")
+        try:
+            f.seek(ref)  # compressed streams seek by decompressing forward
+        except BaseException:
+            f.close()
+            raise
+        return _MemberReader(f, size)
+
+    def read_head(self, rel, n):
+        with self.open(rel) as f:
+            return f.read(n)
+
+
+class _MemberReader:
+    """Reads at most size bytes of a tar member from an already positioned stream."""
+
+    def __init__(self, f, size):
+        self.f = f
+        self.left = size
+
+    def read(self, n=-1):
+        if n < 0 or n > self.left:
+            n = self.left
+        data = self.f.read(n)
+        self.left -= len(data)
+        return data
+
+    def close(self):
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _zip_index(path):
+    index = ArchiveIndex(path, "zip")
+    with zipfile.ZipFile(path) as zf:
+        for info in zf.infolist():
+            try:
+                mtime = int(time.mktime(info.date_time + (0, 0, -1))) * 10**9
+            except (OverflowError, ValueError):
+                mtime = 0
+            index.add(info.filename, info.is_dir(), info.file_size, mtime, info.filename)
+    return index
+
+
+def _tar_index(path, cancel=None):
+    compression = _compression(path)
+    index = ArchiveIndex(path, "tar", compression)
+    with tarfile.open(path, "r:*") as tf:
+        n = 0
+        while True:
+            member = tf.next()
+            if member is None:
+                break
+            n += 1
+            if cancel is not None and n % 1000 == 0 and cancel.is_set():
+                return None
+            if member.isdir():
+                index.add(member.name, True, 0, int(member.mtime) * 10**9, None)
+            elif member.isreg() and not member.issparse():
+                index.add(member.name, False, member.size, int(member.mtime) * 10**9, member.offset_data)
+            # links and devices have no data of their own and are not listed
+            tf.members.clear()  # TarFile keeps every TarInfo otherwise
+    return index
+
+
+def _cache_file(path):
+    digest = hashlib.sha1(norm_key(path).encode("utf-8")).hexdigest()[:16]
+    return data_path(f"arc_{digest}.pickle")
+
+
+_memory = OrderedDict()
+_lock = threading.Lock()
+
+
+def get_index(path, cancel=None):
+    """
+    ArchiveIndex for path, read once per archive version.
+
+    Zip central directories are cheap to read; tar (and especially
+    compressed tar) needs a full pass, so its index is also kept on disk
+    and reused while the archive's size and mtime are unchanged.
+    Returns None if cancelled.
+    """
+    st = os.stat(path)
+    key = (norm_key(path), st.st_size, st.st_mtime_ns)
+    with _lock:
+        index = _memory.get(key)
+        if index is not None:
+            _memory.move_to_end(key)
+            return index
+    if path.lower().endswith(".zip"):
+        index = _zip_index(path)
+    else:
+        index = None
+        try:
+            with open(_cache_file(path), "rb") as f:
+                stored_key, stored = pickle.load(f)
+            if stored_key == key:
+                index = stored
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError, AttributeError):
+            pass
+        if index is None:
+            index = _tar_index(path, cancel)
+            if index is None:
+                return None
+            try:
+                atomic_write(_cache_file(path), pickle.dumps((key, index), protocol=pickle.HIGHEST_PROTOCOL))
+            except OSError:
+                pass
+    index.archive = path
+    with _lock:
+        _memory[key] = index
+        while len(_memory) > MEMORY_CACHE:
+            _memory.popitem(last=False)
+    return index
+
+
+class ExtractJob(Job):
+    """
+    Copy members out of an archive into target_dir, streaming each one.
+
+    Tar members are extracted in archive order through a single stream, so
+    a compressed tar is decompressed once no matter how many are selected.
+    """
+
+    def __init__(self, sources, target_dir: str, policy: str):
+        names = ", ".join(os.path.basename(s.rstrip("/\\")) for s in sources[:3])
+        if len(sources) > 3:
+            names += f" и ещё {len(sources) - 3}"
+        super().__init__(f"Извлечение: {names} → {target_dir}")
+        self.sources = list(sources)
+        self.target_dir = target_dir
+        self.policy = policy
+
+    def run(self):
+        plan = []  # (index, rel, dst)
+        for src in self.sources:
+            archive, rel = split_archive_path(src)
+            if archive is None:
+                self.error(src, "Не найдено в архиве")
+                continue
+            index = get_index(archive, self._cancel)
+            if index is None or rel not in index.entries:
+                self.error(src, "Не найдено в архиве")
+                continue
+            dst_root = os.path.join(self.target_dir, rel.rpartition("/")[2])
+            if index.is_dir(rel) and os.path.isdir(dst_root) and self.policy == RENAME:
+                dst_root = unique_name(dst_root)
+            skip = len(rel) + 1 if rel else 0
+            for member in index.walk_files(rel):
+                tail = member[skip:] if member != rel else ""
+                plan.append((index, member, os.path.join(dst_root, *tail.split("/")) if tail else dst_root))
+            if index.is_dir(rel):
+                os.makedirs(dst_root, exist_ok=True)
+        self.total_items = len(plan)
+        self.total_bytes = sum(index.entries[rel][1] for index, rel, _ in plan)
+
+        by_archive = {}
+        for index, rel, dst in plan:
+            by_archive.setdefault(index.archive, (index, []))[1].append((rel, dst))
+        for index, items in by_archive.values():
+            if index.kind != "tar":
+                for rel, dst in items:
+                    self._extract_one(index, rel, dst, None)
+                continue
+            items.sort(key=lambda item: index.entries[item[0]][3])
+            try:
+                with _OPENERS[index.compression](index.archive, "rb") as stream:
+                    for rel, dst in items:
+                        self._extract_one(index, rel, dst, stream)
+            except OSError as e:
+                self.error(index.archive, e)
+
+    def _extract_one(self, index, rel, dst, stream):
+        """Copy one member to dst; tar members are read from the shared stream."""
+        self.check()
+        _is_dir, size, mtime, ref = index.entries[rel]
+        self.current = f"{index.archive}/{rel}"
+        try:
+            target = resolve_conflict(index.stat(rel), dst, self.policy)
+            root = os.path.realpath(self.target_dir)
+            if target is not None and os.path.commonpath([root, os.path.realpath(target)]) != root:
+                self.error(self.current, "Путь указывает за пределы папки назначения")
+                self.add_bytes(size)
+            elif target is None:
+                self.add_bytes(size)
+            else:
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                if stream is not None:
+                    stream.seek(ref)
+                    self._write(_MemberReader(stream, size), target)
+                else:
+                    with index.open(rel) as source:
+                        self._write(source, target)
+                if mtime:
+                    os.utime(target, ns=(mtime, mtime))
+        except JobCancelled:
+            raise
+        except (OSError, EOFError, zipfile.BadZipFile, tarfile.TarError, lzma.LZMAError) as e:
+            self.error(self.current, e)
+        self.add_items()
+
+    def _write(self, source, target):
+        try:
+            with open(target, "wb") as out:
+                while True:
+                    self.check()
+                    data = source.read(CHUNK)
+                    if not data:
+                        break
+                    out.write(data)
+                    self.add_bytes(len(data))
+        except BaseException:
+            try:
+                os.remove(target)
+            except OSError:
+                pass
+            raise
@@ -0,0 +1,185 @@
+import os
+import threading
+from datetime import datetime
+
+from PyQt5.QtCore import Qt, QAbstractItemModel, QModelIndex, QObject, pyqtSignal
+from PyQt5.QtWidgets import QFileIconProvider
+
+from archive_fs import get_index
+from utils import human_size
+
+COLUMNS = ["Имя", "Размер", "Тип", "Изменён"]
+
+
+class ArchiveSignals(QObject):
+    done = pyqtSignal(object, object, str)  # tree, ArchiveIndex or None, error
+
+
+class ArchiveIndexThread(threading.Thread):
+    """Reads (or loads the cached) index of an archive off the GUI thread."""
+
+    def __init__(self, path, tree, signals: ArchiveSignals):
+        super().__init__(daemon=True)
+        self.path = path
+        self.tree = tree
+        self.signals = signals
+
+    def run(self):
+        try:
+            index = get_index(self.path)
+        except Exception as e:
+            self.signals.done.emit(self.tree, None, str(e))
+            return
+        self.signals.done.emit(self.tree, index, "")
+
+
+class ArchiveModel(QAbstractItemModel):
+    """
+    Read-only tree model over an ArchiveIndex with the parts of the
+    QFileSystemModel API the panels use (filePath, isDir, fileName,
+    index(path)), so it can sit behind FileFilterProxyModel unchanged.
+
+    Index ids are small ints into self._rels; children are sorted lazily,
+    one folder at a time, when the view first asks for them.
+    """
+
+    def __init__(self, index, parent=None):
+        super().__init__(parent)
+        self.archive_index = index
+        self.archive = index.archive
+        self._rels = [""]
+        self._ids = {"": 0}
+        self._sorted = {}  # rel_dir -> (names, {name: row})
+        self._sort_column = 0
+        self._order = Qt.AscendingOrder
+        icons = QFileIconProvider()
+        self._dir_icon = icons.icon(QFileIconProvider.Folder)
+        self._file_icon = icons.icon(QFileIconProvider.File)
+
+    # ---- helpers ----
+    def _id(self, rel):
+        i = self._ids.get(rel)
+        if i is None:
+            i = len(self._rels)
+            self._rels.append(rel)
+            self._ids[rel] = i
+        return i
+
+    def _rel(self, index):
+        return self._rels[index.internalId()] if index.isValid() else ""
+
+    def _children(self, rel_dir):
+        cached = self._sorted.get(rel_dir)
+        if cached is None:
+            entries = self.archive_index.entries
+            prefix = f"{rel_dir}/" if rel_dir else ""
+            col = self._sort_column
+
+            def key(name):
+                _is_dir, size, mtime, _ = entries[prefix + name]
+                return (name.lower(), size, os.path.splitext(name)[1].lower(), mtime)[col]
+            names = sorted(self.archive_index.children.get(rel_dir, []), key=key,
+                           reverse=self._order == Qt.DescendingOrder)
+            # folders first in either direction, like QFileSystemModel
+            names.sort(key=lambda n: not entries[prefix + n][0])
+            cached = (names, {name: row for row, name in enumerate(names)})
+            self._sorted[rel_dir] = cached
+        return cached
+
+    def _make_index(self, rel, column=0):
+        if not rel:
+            return QModelIndex()
+        parent, _, name = rel.rpartition("/")
+        row = self._children(parent)[1][name]
+        return self.createIndex(row, column, self._id(rel))
+
+    # ---- QAbstractItemModel ----
+    def index(self, *args):
+        if len(args) in (1, 2) and isinstance(args[0], str):
+            return self.pathIndex(*args)
+        row, column, parent = (args + (QModelIndex(),))[:3]
+        rel_dir = self._rel(parent)
+        names = self._children(rel_dir)[0]
+        if not 0 <= row < len(names) or not 0 <= column < len(COLUMNS):
+            return QModelIndex()
+        rel = f"{rel_dir}/{names[row]}" if rel_dir else names[row]
+        return self.createIndex(row, column, self._id(rel))
+
+    def parent(self, index=None):
+        if index is None:
+            return super().parent()
+        if not index.isValid():
+            return QModelIndex()
+        return self._make_index(self._rel(index).rpartition("/")[0])
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        rel = self._rel(parent)
+        return len(self.archive_index.children.get(rel, ())) if self.archive_index.is_dir(rel) else 0
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(COLUMNS)
+
+    def hasChildren(self, parent=QModelIndex()):
+        return self.archive_index.is_dir(self._rel(parent)) and parent.column() <= 0
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        rel = self._rel(index)
+        is_dir, size, mtime, _ = self.archive_index.entries[rel]
+        column = index.column()
+        if role == Qt.DisplayRole:
+            if column == 0:
+                return rel.rpartition("/")[2]
+            if column == 1:
+                return "" if is_dir else human_size(size)
+            if column == 2:
+                return "Папка" if is_dir else (os.path.splitext(rel)[1][1:].upper() or "Файл")
+            if column == 3:
+                return datetime.fromtimestamp(mtime / 1e9).strftime("%d.%m.%Y %H:%M") if mtime else ""
+        elif role == Qt.DecorationRole and column == 0:
+            return self._dir_icon if is_dir else self._file_icon
+        elif role == Qt.TextAlignmentRole and column == 1:
+            return Qt.AlignRight | Qt.AlignVCenter
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return COLUMNS[section]
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self.layoutAboutToBeChanged.emit()
+        old = self.persistentIndexList()
+        rels = [(self._rel(i), i.column()) for i in old]
+        self._sort_column, self._order = column, order
+        self._sorted = {}
+        self.changePersistentIndexList(old, [self._make_index(rel, col) for rel, col in rels])
+        self.layoutChanged.emit()
+
+    # ---- QFileSystemModel-like API ----
+    def filePath(self, index):
+        rel = self._rel(index)
+        return os.path.join(self.archive, *rel.split("/")) if rel else self.archive
+
+    def fileName(self, index):
+        return self._rel(index).rpartition("/")[2]
+
+    def isDir(self, index):
+        return self.archive_index.is_dir(self._rel(index))
+
+    def pathIndex(self, path, column=0):
+        """Index of a virtual path below the archive; the archive itself is the (invalid) root."""
+        if os.path.normcase(path) == os.path.normcase(self.archive):
+            return QModelIndex()
+        rel = os.path.relpath(path, self.archive).replace(os.sep, "/")
+        if rel not in self.archive_index.entries:
+            return QModelIndex()
+        return self._make_index(rel, column)
@@ -0,0 +1,395 @@
+import collections
+import lzma
+import os
+import stat
+import struct
+import tarfile
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from jobs import Job, JobCancelled
+
+ZIP = "zip"
+TAR = "tar"
+TAR_GZ = "tar.gz"
+TAR_XZ = "tar.xz"
+
+PACK_FORMATS = [
+    (ZIP, "ZIP (*.zip)"),
+    (TAR_GZ, "tar.gz (*.tar.gz)"),
+    (TAR_XZ, "tar.xz (*.tar.xz)"),
+    (TAR, "tar (*.tar)"),
+]
+
+PACK_WORKERS = os.cpu_count() or 2
+DEFLATE_CHUNK = 1024 * 1024      # uncompressed bytes per deflate task
+XZ_CHUNK = 8 * 1024 * 1024       # per xz block; each becomes its own xz stream
+DEFLATE_LEVEL = 6
+XZ_PRESET = 6
+WINDOW = 32 * 1024               # deflate history carried between chunks
+ZIP64_LIMIT = 0xFFFFFFFF
+
+
+def format_for(path: str):
+    lower = path.lower()
+    for fmt, suffixes in ((TAR_GZ, (".tar.gz", ".tgz")), (TAR_XZ, (".tar.xz", ".txz")),
+                          (TAR, (".tar",)), (ZIP, (".zip",))):
+        if lower.endswith(suffixes):
+            return fmt
+    return None
+
+
+# ---------------------------
+# Parallel compression primitives (zlib and lzma release the GIL)
+# ---------------------------
+def _deflate_chunk(data, zdict, last, level=DEFLATE_LEVEL):
+    """
+    Raw deflate of one chunk, primed with the previous chunk's tail.
+
+    Non-final chunks end with a sync flush (byte aligned, no final-block
+    bit), so the pieces concatenate into one valid deflate stream - the
+    same trick pigz uses.
+    """
+    if zdict:
+        c = zlib.compressobj(level, zlib.DEFLATED, -15, 9, zlib.Z_DEFAULT_STRATEGY, zdict)
+    else:
+        c = zlib.compressobj(level, zlib.DEFLATED, -15)
+    return c.compress(data) + c.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+
+
+def _xz_chunk(data):
+    return lzma.compress(data, format=lzma.FORMAT_XZ, preset=XZ_PRESET)
+
+
+class _OrderedPipeline:
+    """
+    Tasks run on a pool, results are handed to sink(tag, result) in
+    submission order; at most `depth` tasks are in flight so memory stays
+    bounded however large the input is.
+    """
+
+    def __init__(self, pool, sink, depth):
+        self.pool = pool
+        self.sink = sink
+        self.depth = depth
+        self.items = collections.deque()
+
+    def submit(self, tag, fn, *args):
+        self.items.append((tag, self.pool.submit(fn, *args)))
+        while len(self.items) > self.depth:
+            self._drain_one()
+
+    def marker(self, tag, value=None):
+        """Pass value to the sink once everything submitted before it has been."""
+        self.items.append((tag, value))
+
+    def _drain_one(self):
+        tag, item = self.items.popleft()
+        self.sink(tag, item.result() if hasattr(item, "result") else item)
+
+    def flush(self):
+        while self.items:
+            self._drain_one()
+
+
+class _ParallelStream:
+    """
+    Write-only file object compressing into gzip or xz on a pool.
+
+    Used as the fileobj of a streaming TarFile. Input is cut into blocks:
+    gzip blocks are deflate chunks of one member, xz blocks are separate
+    xz streams (decoders read concatenated streams as one).
+    """
+
+    def __init__(self, out, fmt, pool, depth):
+        self.out = out
+        self.fmt = fmt
+        self.block = DEFLATE_CHUNK if fmt == TAR_GZ else XZ_CHUNK
+        self.buffer = bytearray()
+        self.crc = 0
+        self.size = 0
+        self.tail = b""
+        self.pipeline = _OrderedPipeline(pool, lambda _tag, data: self.out.write(data), depth)
+        if fmt == TAR_GZ:
+            # magic, deflate, no flags, mtime, no extra flags, OS = unix
+            out.write(b"\x1f\x8b\x08\x00" + struct.pack("<I", int(time.time())) + b"\x00\x03")
+
+    def write(self, data):
+        self.buffer += data
+        while len(self.buffer) >= self.block:
+            chunk = bytes(self.buffer[:self.block])
+            del self.buffer[:self.block]
+            self._submit(chunk, False)
+        return len(data)
+
+    def _submit(self, chunk, last):
+        if self.fmt == TAR_GZ:
+            self.crc = zlib.crc32(chunk, self.crc)
+            self.size += len(chunk)
+            self.pipeline.submit(None, _deflate_chunk, chunk, self.tail, last)
+            self.tail = chunk[-WINDOW:]
+        else:
+            if chunk:
+                self.pipeline.submit(None, _xz_chunk, chunk)
+
+    def close(self):
+        self._submit(bytes(self.buffer), True)
+        self.buffer = bytearray()
+        self.pipeline.flush()
+        if self.fmt == TAR_GZ:
+            self.out.write(struct.pack("<II", self.crc, self.size & 0xFFFFFFFF))
+
+
+class _ProgressReader:
+    """File wrapper for TarFile.addfile(): reports bytes and honours pause/cancel."""
+
+    def __init__(self, f, job):
+        self.f = f
+        self.job = job
+
+    def read(self, n=-1):
+        self.job.check()
+        data = self.f.read(n)
+        self.job.add_bytes(len(data))
+        return data
+
+    def readinto(self, b):
+        self.job.check()
+        n = self.f.readinto(b)
+        self.job.add_bytes(n or 0)
+        return n
+
+
+# ---------------------------
+# ZIP writer
+# ---------------------------
+def _dos_time(mtime):
+    t = time.localtime(max(mtime, 315532800))  # the format starts in 1980
+    return (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2), ((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
+
+
+class _ZipEntry:
+    __slots__ = ("name", "offset", "zip64", "crc", "csize", "usize", "method", "dos", "mode", "is_dir")
+
+
+class _ZipWriter:
+    """
+    Minimal streaming ZIP writer (deflate, UTF-8 names, ZIP64 when needed).
+
+    The local header is written with placeholders and patched once the
+    member's data, CRC and sizes are known, so nothing is held in memory.
+    entry() only describes a member; its header is written by begin(),
+    which may come later, once the members before it are complete.
+    """
+
+    def __init__(self, f):
+        self.f = f
+        self.entries = []
+
+    def entry(self, arcname, st, is_dir):
+        e = _ZipEntry()
+        e.name = arcname.replace(os.sep, "/") + ("/" if is_dir else "")
+        e.offset = 0
+        e.zip64 = not is_dir and st.st_size > ZIP64_LIMIT * 0.95
+        e.crc = e.csize = e.usize = 0
+        e.method = 0 if is_dir else zlib.DEFLATED
+        e.dos = _dos_time(st.st_mtime)
+        e.mode = st.st_mode
+        e.is_dir = is_dir
+        return e
+
+    def begin(self, e):
+        e.offset = self.f.tell()
+        name = e.name.encode("utf-8")
+        extra = struct.pack("<HHQQ", 1, 16, 0, 0) if e.zip64 else b""
+        sizes = ZIP64_LIMIT if e.zip64 else 0
+        self.f.write(struct.pack("<IHHHHHIIIHH", 0x04034b50, 45 if e.zip64 else 20, 0x800, e.method,
+                                 e.dos[0], e.dos[1], 0, sizes, sizes, len(name), len(extra)) + name + extra)
+        self.entries.append(e)
+
+    def end(self, e):
+        end = self.f.tell()
+        if e.zip64:
+            self.f.seek(e.offset + 14)
+            self.f.write(struct.pack("<I", e.crc))
+            self.f.seek(e.offset + 30 + len(e.name.encode("utf-8")) + 4)
+            self.f.write(struct.pack("<QQ", e.usize, e.csize))
+        else:
+            if e.csize > ZIP64_LIMIT:
+                raise OSError(f"{e.name}: сжатые данные больше 4 ГБ")
+            self.f.seek(e.offset + 14)
+            self.f.write(struct.pack("<III", e.crc, e.csize, e.usize))
+        self.f.seek(end)
+
+    def close(self):
+        cd_start = self.f.tell()
+        for e in self.entries:
+            name = e.name.encode("utf-8")
+            big = e.usize >= ZIP64_LIMIT or e.csize >= ZIP64_LIMIT or e.offset >= ZIP64_LIMIT
+            extra = struct.pack("<HHQQQ", 1, 24, e.usize, e.csize, e.offset) if big else b""
+            attrs = (e.mode & 0xFFFF) << 16 | (0x10 if e.is_dir else 0)
+            self.f.write(struct.pack(
+                "<IHHHHHHIIIHHHHHII", 0x02014b50, (3 << 8) | 45, 45 if big else 20, 0x800, e.method,
+                e.dos[0], e.dos[1], e.crc,
+                ZIP64_LIMIT if big else e.csize, ZIP64_LIMIT if big else e.usize,
+                len(name), len(extra), 0, 0, 0, attrs, ZIP64_LIMIT if big else e.offset) + name + extra)
+        cd_end = self.f.tell()
+        count, cd_size = len(self.entries), cd_end - cd_start
+        if count >= 0xFFFF or cd_start >= ZIP64_LIMIT or cd_size >= ZIP64_LIMIT:
+            self.f.write(struct.pack("<IQHHIIQQQQ", 0x06064b50, 44, (3 << 8) | 45, 45, 0, 0,
+                                     count, count, cd_size, cd_start))
+            self.f.write(struct.pack("<IIQI", 0x07064b50, 0, cd_end, 1))
+            self.f.write(struct.pack("<IHHHHIIH", 0x06054b50, 0, 0, 0xFFFF, 0xFFFF,
+                                     ZIP64_LIMIT, ZIP64_LIMIT, 0))
+        else:
+            self.f.write(struct.pack("<IHHHHIIH", 0x06054b50, 0, 0, count, count, cd_size, cd_start, 0))
+
+
+# ---------------------------
+# Job
+# ---------------------------
+class PackJob(Job):
+    """
+    Pack files and folders into a zip / tar / tar.gz / tar.xz archive.
+
+    Sources are read sequentially; compression runs on PACK_WORKERS
+    threads (per-chunk deflate for zip and gzip, per-block xz), and the
+    archive is written to a temp file renamed into place at the end.
+    """
+
+    def __init__(self, sources, target: str, fmt: str):
+        names = ", ".join(os.path.basename(s.rstrip("/\\")) or s for s in sources[:3])
+        if len(sources) > 3:
+            names += f" и ещё {len(sources) - 3}"
+        super().__init__(f"Архивация: {names} → {os.path.basename(target)}")
+        self.sources = list(sources)
+        self.target = target
+        self.fmt = fmt
+
+    def _plan(self):
+        """[(path, arcname, stat)] for every entry; arcnames are relative to each source's parent."""
+        entries = []
+        target = os.path.realpath(self.target)
+        for src in self.sources:
+            base = os.path.dirname(src.rstrip("/\\"))
+            stack = [src]
+            while stack:
+                self.check()
+                path = stack.pop()
+                try:
+                    st = os.stat(path, follow_symlinks=False)
+                except OSError as e:
+                    self.error(path, e)
+                    continue
+                if os.path.realpath(path) == target:
+                    continue
+                entries.append((path, os.path.relpath(path, base), st))
+                if stat.S_ISDIR(st.st_mode):
+                    self.current = path
+                    try:
+                        with os.scandir(path) as it:
+                            stack.extend(sorted((entry.path for entry in it), reverse=True))
+                    except OSError as e:
+                        self.error(path, e)
+        return entries
+
+    def run(self):
+        entries = self._plan()
+        files = [st for _, _, st in entries if stat.S_ISREG(st.st_mode)]
+        self.total_items = len(entries)
+        self.total_bytes = sum(st.st_size for st in files)
+        tmp = f"{self.target}.part"
+        try:
+            with open(tmp, "wb") as out, ThreadPoolExecutor(max_workers=PACK_WORKERS) as pool:
+                try:
+                    if self.fmt == ZIP:
+                        self._write_zip(out, entries, pool)
+                    else:
+                        self._write_tar(out, entries, pool)
+                except JobCancelled:
+                    pool.shutdown(wait=True, cancel_futures=True)
+                    raise
+            os.replace(tmp, self.target)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+
+    def _write_zip(self, out, entries, pool):
+        writer = _ZipWriter(out)
+
+        def sink(tag, data):
+            if tag == "begin":
+                writer.begin(data)
+            elif tag == "end":
+                writer.end(data)
+                self.add_items()
+            else:
+                out.write(data)
+                tag.csize += len(data)
+
+        # headers and sizes go through the ordered sink too, so the pool keeps
+        # deflating the next members (a small file is one chunk, one task)
+        # while the earlier ones are still being written
+        pipeline = _OrderedPipeline(pool, sink, PACK_WORKERS * 3)
+        for path, arcname, st in entries:
+            self.current = path
+            is_dir = stat.S_ISDIR(st.st_mode)
+            if not is_dir and not stat.S_ISREG(st.st_mode):
+                # zip has no portable form for links and devices: report them instead of dropping silently
+                kind = "ссылка" if stat.S_ISLNK(st.st_mode) else "специальный файл"
+                self.error(path, f"Не добавлено в ZIP: {kind}")
+                self.add_items()
+                continue
+            try:
+                f = None if is_dir else open(path, "rb")
+            except OSError as e:
+                self.error(path, e)
+                self.add_items()
+                continue
+            entry = writer.entry(arcname, st, is_dir)
+            pipeline.marker("begin", entry)
+            if f is not None:
+                with f:
+                    tail = b""
+                    chunk = f.read(DEFLATE_CHUNK)
+                    while True:
+                        self.check()
+                        following = f.read(DEFLATE_CHUNK) if len(chunk) == DEFLATE_CHUNK else b""
+                        last = not following
+                        entry.crc = zlib.crc32(chunk, entry.crc)
+                        entry.usize += len(chunk)
+                        self.add_bytes(len(chunk))
+                        pipeline.submit(entry, _deflate_chunk, chunk, tail, last)
+                        if last:
+                            break
+                        tail = chunk[-WINDOW:]
+                        chunk = following
+            pipeline.marker("end", entry)
+        pipeline.flush()
+        writer.close()
+
+    def _write_tar(self, out, entries, pool):
+        stream = out if self.fmt == TAR else _ParallelStream(out, self.fmt, pool, PACK_WORKERS * 2)
+        with tarfile.open(fileobj=stream, mode="w|", format=tarfile.PAX_FORMAT) as tf:
+            for path, arcname, st in entries:
+                self.check()
+                self.current = path
+                try:
+                    info = tf.gettarinfo(path, arcname)
+                    if info is None:  # sockets and the like
+                        continue
+                    if info.isreg():
+                        with open(path, "rb") as f:
+                            tf.addfile(info, _ProgressReader(f, self))
+                    else:
+                        tf.addfile(info)
+                except OSError as e:
+                    self.error(path, e)
+                finally:
+                    self.add_items()
+        if stream is not out:
+            stream.close()
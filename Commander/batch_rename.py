@@ -0,0 +1,273 @@
+import json
+import os
+import re
+
+from appdata import data_path, atomic_write
+from jobs import Job, JobCancelled
+
+CASE_KEEP = "keep"
+CASE_LOWER = "lower"
+CASE_UPPER = "upper"
+CASE_TITLE = "title"
+
+CASE_MODES = [
+    (CASE_KEEP, "Регистр без изменений"),
+    (CASE_LOWER, "строчные"),
+    (CASE_UPPER, "ПРОПИСНЫЕ"),
+    (CASE_TITLE, "Как В Заголовке"),
+]
+
+# statuses of a planned rename
+OK = "ok"
+UNCHANGED = "unchanged"
+INVALID = "invalid"
+DUPLICATE = "duplicate"  # two files would get the same name
+EXISTS = "exists"        # a file that is not being renamed already has that name
+
+STATUS_NAMES = {
+    OK: "",
+    UNCHANGED: "без изменений",
+    INVALID: "недопустимое имя",
+    DUPLICATE: "совпадает с другим",
+    EXISTS: "имя занято",
+}
+
+JOURNAL = "rename_journal.json"
+_TOKEN_RE = re.compile(r"\[([NEPC])(?::(\d+))?\]")
+_WORD_RE = re.compile(r"[^\W_]+(?:'[^\W_]+)*")  # letters/digits, "don't" is one word
+_BAD_CHARS = set('/\\\0') | (set('<>:"|?*') if os.name == "nt" else set())
+
+
+def _key(path):
+    return os.path.normcase(path)
+
+
+class RenameRule:
+    """
+    New name = pattern with tokens expanded, then find/replace, then case.
+
+    Tokens: [N] name without extension, [E] extension (without the dot),
+    [P] parent folder name, [C] counter, [C:3] counter padded to 3 digits.
+    A trailing dot left by an empty [E] is dropped. Raises re.error for a
+    bad regular expression.
+    """
+
+    def __init__(self, pattern="[N].[E]", find="", replace="", regex=False, ignore_case=True,
+                 case=CASE_KEEP, start=1, step=1):
+        self.pattern = pattern or "[N].[E]"
+        self.replace = replace
+        self.case = case
+        self.start = start
+        self.step = step
+        self.find = None
+        if find:
+            flags = re.IGNORECASE if ignore_case else 0
+            self.find = re.compile(find if regex else re.escape(find), flags)
+            if not regex:
+                self.replace = replace.replace("\\", "\\\\")
+
+    def apply(self, stem, ext, parent, n):
+        """New name for the n-th (0-based) item; ext comes without the dot."""
+        def token(m):
+            kind, width = m.group(1), m.group(2)
+            if kind == "N":
+                return stem
+            if kind == "E":
+                return ext
+            if kind == "P":
+                return parent
+            return str(self.start + n * self.step).zfill(int(width or 0))
+
+        new = _TOKEN_RE.sub(token, self.pattern)
+        if not ext and new.endswith(".") and self.pattern.endswith(".[E]"):
+            new = new[:-1]
+        if self.find is not None:
+            new = self.find.sub(self.replace, new)
+        if self.case == CASE_LOWER:
+            new = new.lower()
+        elif self.case == CASE_UPPER:
+            new = new.upper()
+        elif self.case == CASE_TITLE:
+            # only the name part: "photo.JPG" must not become "Photo.Jpg"
+            head, tail = os.path.splitext(new) if ext else (new, "")
+            new = _WORD_RE.sub(lambda m: m.group().capitalize(), head) + tail
+        return new
+
+
+def prepare_items(items):
+    """
+    Split [(path, is_dir)] once into (folder, name, stem, ext, parent name)
+    so that recomputing the preview on every keystroke does no path parsing.
+    """
+    out = []
+    for path, is_dir in items:
+        folder, name = os.path.split(path)
+        stem, ext = (name, "") if is_dir else os.path.splitext(name)
+        out.append((folder, name, stem, ext[1:], os.path.basename(folder)))
+    return out
+
+
+def list_names(folders):
+    """{folder key: set of name keys} - one listing per folder, used for 'name taken' checks."""
+    out = {}
+    for folder in folders:
+        try:
+            out[_key(folder)] = {_key(name) for name in os.listdir(folder)}
+        except OSError:
+            out[_key(folder)] = set()
+    return out
+
+
+def plan_renames(prepared, rule, existing):
+    """
+    Apply rule to prepare_items() output -> [(new_name, status)], one per item.
+
+    existing is list_names() of the folders involved. A name held by a file
+    that is itself being renamed away is free, so swaps and chains
+    (a→b, b→c) are fine; order_steps() works out the order later.
+    """
+    new_names = []
+    targets = {}
+    leaving = set()
+    for n, (folder, name, stem, ext, parent) in enumerate(prepared):
+        new = rule.apply(stem, ext, parent, n)
+        new_names.append(new)
+        if new != name:
+            folder_key = _key(folder)
+            leaving.add((folder_key, _key(name)))
+            dst = (folder_key, _key(new))
+            targets[dst] = targets.get(dst, 0) + 1
+
+    result = []
+    for (folder, name, _stem, _ext, _parent), new in zip(prepared, new_names):
+        if new == name:
+            result.append((new, UNCHANGED))
+            continue
+        if not new or new in (".", "..") or not _BAD_CHARS.isdisjoint(new):
+            result.append((new, INVALID))
+            continue
+        folder_key, new_key = _key(folder), _key(new)
+        dst = (folder_key, new_key)
+        if targets[dst] > 1:
+            status = DUPLICATE
+        elif new_key in existing.get(folder_key, ()) and dst not in leaving and new_key != _key(name):
+            status = EXISTS
+        else:
+            status = OK
+        result.append((new, status))
+    return result
+
+
+def order_steps(pairs):
+    """
+    Order renames [(src, dst)] so that no step lands on a name that is
+    still waiting to move. Chains run from their free end; a cycle
+    (a→b, b→a, or a case-only change on a case-insensitive disk) is broken
+    by moving one member to a temporary name first.
+    """
+    by_src = {_key(src): (src, dst) for src, dst in pairs}
+    done = set()
+    steps = []
+    temp_no = 0
+    for start in by_src:
+        if start in done:
+            continue
+        chain, seen = [], set()
+        key = start
+        while key in by_src and key not in done and key not in seen:
+            chain.append(key)
+            seen.add(key)
+            key = _key(by_src[key][1])
+        done.update(chain)
+        if key in seen:
+            # every member of a cycle is in chain (each name has one incoming rename)
+            first_src, first_dst = by_src[chain[0]]
+            temp_no += 1
+            temp = os.path.join(os.path.dirname(first_src),
+                                f".{os.path.basename(first_src)}.rename-{os.getpid()}-{temp_no}")
+            steps.append((first_src, temp))
+            steps.extend(by_src[k] for k in reversed(chain[1:]))
+            steps.append((temp, first_dst))
+        else:
+            steps.extend(by_src[k] for k in reversed(chain))
+    return steps
+
+
+# ---------------------------
+# Journal
+# ---------------------------
+def write_journal(steps, state):
+    atomic_write(data_path(JOURNAL), json.dumps({"state": state, "steps": steps}).encode("utf-8"))
+
+
+def load_journal():
+    """(state, steps) of the last batch rename, or (None, [])."""
+    try:
+        with open(data_path(JOURNAL), "rb") as f:
+            data = json.loads(f.read())
+        return data["state"], [tuple(s) for s in data["steps"]]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None, []
+
+
+def rollback(steps, job):
+    """
+    Undo steps in reverse. A step is undone only if its target exists and
+    its source does not, so this is safe whether the batch finished, failed
+    half way or was interrupted by a crash.
+    """
+    for src, dst in reversed(steps):
+        if os.path.lexists(dst) and not os.path.lexists(src):
+            try:
+                os.rename(dst, src)
+            except OSError as e:
+                job.error(dst, e)
+
+
+class BatchRenameJob(Job):
+    """
+    Apply a batch of renames as one transaction.
+
+    The planned steps are journaled before the first rename; if any step
+    fails or the job is cancelled, the completed ones are rolled back.
+    The journal of the last successful batch allows undoing it later.
+    """
+
+    def __init__(self, pairs):
+        super().__init__(f"Переименование: {len(pairs)} файлов")
+        self.pairs = pairs
+
+    def run(self):
+        steps = order_steps(self.pairs)
+        self.total_items = len(steps)
+        write_journal(steps, "running")
+        try:
+            for src, dst in steps:
+                self.check()
+                self.current = src
+                if os.path.lexists(dst) and _key(dst) != _key(src):
+                    raise FileExistsError(f"Имя занято: {dst}")
+                os.rename(src, dst)
+                self.add_items()
+        except (OSError, JobCancelled):
+            # the queue records the error; the batch is all or nothing
+            rollback(steps, self)
+            write_journal(steps, "rolled_back")
+            raise
+        write_journal(steps, "done")
+
+
+class RenameUndoJob(Job):
+    """Roll back the batch recorded in the journal (finished or interrupted)."""
+
+    def __init__(self):
+        super().__init__("Отмена группового переименования")
+
+    def run(self):
+        state, steps = load_journal()
+        if state not in ("done", "running"):
+            return
+        self.total_items = 1
+        rollback(steps, self)
+        write_journal(steps, "rolled_back")
+        self.add_items()
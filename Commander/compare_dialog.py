@@ -0,0 +1,191 @@
+import os
+import threading
+from datetime import datetime
+
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QCheckBox, QComboBox,
+    QTreeWidget, QTreeWidgetItem, QHeaderView, QMessageBox
+)
+from PyQt5.QtCore import Qt, QObject, pyqtSignal
+from PyQt5.QtGui import QColor
+
+from dir_compare import (
+    compare_trees, build_sync_plan, SyncJob, STATUS_NAMES, ONE_WAY, TWO_WAY,
+    LEFT_ONLY, RIGHT_ONLY, LEFT_NEWER, RIGHT_NEWER, DIFFERENT
+)
+from utils import human_size
+
+STATUS_COLORS = {
+    LEFT_ONLY: "#4caf50",
+    RIGHT_ONLY: "#2196f3",
+    LEFT_NEWER: "#ff9800",
+    RIGHT_NEWER: "#ff9800",
+    DIFFERENT: "#f44336",
+}
+CONTAINS_DIFF_COLOR = "#c0a000"
+MAX_SHOWN = 50000
+
+
+class CompareSignals(QObject):
+    progress = pyqtSignal(str)
+    done = pyqtSignal(object)  # diffs
+
+
+class CompareThread(threading.Thread):
+    def __init__(self, left, right, use_hash, signals: CompareSignals):
+        super().__init__(daemon=True)
+        self.left = left
+        self.right = right
+        self.use_hash = use_hash
+        self.signals = signals
+        self._cancel = threading.Event()
+
+    def stop(self):
+        self._cancel.set()
+
+    def run(self):
+        diffs = compare_trees(self.left, self.right, self.use_hash, self._cancel, self.signals.progress.emit)
+        self.signals.done.emit(None if self._cancel.is_set() else diffs)
+
+
+def _describe(info):
+    if info is None:
+        return ""
+    is_dir, size, mtime = info
+    when = datetime.fromtimestamp(mtime / 1e9).strftime("%Y-%m-%d %H:%M")
+    return f"папка, {when}" if is_dir else f"{human_size(size)}, {when}"
+
+
+class CompareDialog(QDialog):
+    """
+    Compare the roots of the two panels and synchronise them.
+
+    Differences are listed here and also coloured inline in both panels
+    (folders that contain differences get their own colour).
+    """
+
+    def __init__(self, left_root, right_root, left_proxy, right_proxy, left_tree, right_tree,
+                 submit_job, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Сравнение папок")
+        self.setAttribute(Qt.WA_DeleteOnClose)
+        self.resize(960, 600)
+        self.left_root = left_root
+        self.right_root = right_root
+        self.proxies = (left_proxy, right_proxy)
+        self.trees = (left_tree, right_tree)
+        self.submit_job = submit_job
+        self.diffs = []
+        self.worker = None
+
+        layout = QVBoxLayout()
+        self.setLayout(layout)
+        layout.addWidget(QLabel(f"Слева: {left_root}\nСправа: {right_root}"))
+
+        row = QHBoxLayout()
+        self.hash_cb = QCheckBox("Сравнивать содержимое (хэши)")
+        self.compare_btn = QPushButton("Сравнить")
+        self.compare_btn.clicked.connect(self.toggle_compare)
+        row.addWidget(self.hash_cb)
+        row.addStretch()
+        row.addWidget(self.compare_btn)
+        layout.addLayout(row)
+
+        self.view = QTreeWidget()
+        self.view.setRootIsDecorated(False)
+        self.view.setHeaderLabels(["Путь", "Состояние", "Слева", "Справа"])
+        self.view.header().setSectionResizeMode(0, QHeaderView.Stretch)
+        layout.addWidget(self.view)
+
+        sync_row = QHBoxLayout()
+        self.mode_combo = QComboBox()
+        self.mode_combo.addItem("Слева → справа", ONE_WAY)
+        self.mode_combo.addItem("В обе стороны (новее побеждает)", TWO_WAY)
+        self.delete_cb = QCheckBox("Удалять лишнее справа")
+        self.sync_btn = QPushButton("Синхронизировать")
+        self.sync_btn.setEnabled(False)
+        self.sync_btn.clicked.connect(self.sync)
+        sync_row.addWidget(QLabel("Синхронизация:"))
+        sync_row.addWidget(self.mode_combo)
+        sync_row.addWidget(self.delete_cb)
+        sync_row.addStretch()
+        sync_row.addWidget(self.sync_btn)
+        layout.addLayout(sync_row)
+
+        self.info = QLabel("")
+        layout.addWidget(self.info)
+
+        self.signals = CompareSignals()
+        self.signals.progress.connect(self.info.setText)
+        self.signals.done.connect(self.on_done)
+
+    def toggle_compare(self):
+        if self.worker is not None:
+            self.worker.stop()
+            return
+        self.view.clear()
+        self.sync_btn.setEnabled(False)
+        self.worker = CompareThread(self.left_root, self.right_root, self.hash_cb.isChecked(), self.signals)
+        self.worker.start()
+        self.compare_btn.setText("Стоп")
+
+    def on_done(self, diffs):
+        self.worker = None
+        self.compare_btn.setText("Сравнить")
+        if diffs is None:
+            self.info.setText("Сравнение остановлено")
+            return
+        self.diffs = diffs
+        items = []
+        for rel, status, l, r in diffs[:MAX_SHOWN]:
+            item = QTreeWidgetItem([rel, STATUS_NAMES[status], _describe(l), _describe(r)])
+            item.setForeground(1, QColor(STATUS_COLORS[status]))
+            items.append(item)
+        self.view.addTopLevelItems(items)
+        shown = f" (показаны первые {MAX_SHOWN})" if len(diffs) > MAX_SHOWN else ""
+        self.info.setText(f"Различий: {len(diffs)}{shown}" if diffs else "Папки совпадают")
+        self.sync_btn.setEnabled(bool(diffs))
+        self.mark_panels()
+
+    def mark_panels(self):
+        left, right = {}, {}
+        for rel, status, _l, _r in self.diffs:
+            color = STATUS_COLORS[status]
+            if status != RIGHT_ONLY:
+                left[os.path.join(self.left_root, rel)] = color
+            if status != LEFT_ONLY:
+                right[os.path.join(self.right_root, rel)] = color
+            parent = os.path.dirname(rel)
+            while parent:
+                for marks, root in ((left, self.left_root), (right, self.right_root)):
+                    marks.setdefault(os.path.join(root, parent), CONTAINS_DIFF_COLOR)
+                parent = os.path.dirname(parent)
+        for proxy, tree, marks in zip(self.proxies, self.trees, (left, right)):
+            proxy.set_marks(marks)
+            tree.viewport().update()
+
+    def clear_marks(self):
+        for proxy, tree in zip(self.proxies, self.trees):
+            proxy.set_marks({})
+            tree.viewport().update()
+
+    def sync(self):
+        mode = self.mode_combo.currentData()
+        copies, deletes = build_sync_plan(self.left_root, self.right_root, self.diffs, mode,
+                                          self.delete_cb.isChecked() and mode == ONE_WAY)
+        if not copies and not deletes:
+            self.info.setText("Нечего синхронизировать")
+            return
+        text = f"Скопировать: {len(copies)}\nУдалить: {len(deletes)}\n\nПродолжить?"
+        if QMessageBox.question(self, "Синхронизация", text, QMessageBox.Yes | QMessageBox.No) != QMessageBox.Yes:
+            return
+        title = f"Синхронизация: {os.path.basename(self.left_root) or self.left_root} ↔ " \
+                f"{os.path.basename(self.right_root) or self.right_root}"
+        self.submit_job(SyncJob(copies, deletes, title))
+        self.sync_btn.setEnabled(False)
+
+    def closeEvent(self, event):
+        if self.worker is not None:
+            self.worker.stop()
+        self.clear_marks()
+        super().closeEvent(event)
@@ -0,0 +1,267 @@
+import mmap
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+SNIFF_BYTES = 8192
+SNIPPET_CHARS = 200
+FILES_PER_TASK = 64            # amortises the inter-process round trip over many small files
+MAX_MATCHES_PER_FILE = 1000
+SKIP_DIR_NAMES = {".git", ".hg", ".svn", "__pycache__", "node_modules", ".venv", "venv", ".tox"}
+
+_regex = None  # compiled once per worker process by _init_worker
+
+
+MAX_CLASS_RANGE = 1024         # non-ASCII characters a [а-я] range may expand to
+
+
+def _char(ch, encoding, ignore_case):
+    """One character as a bytes regex atom; a multi-byte one is grouped so a quantifier covers all of it."""
+    forms = (ch.lower(), ch.upper()) if ignore_case else (ch,)
+    variants = list(dict.fromkeys(v.encode(encoding, errors="replace") for v in forms))
+    if len(variants) == 1 and len(variants[0]) == 1:
+        return re.escape(variants[0])
+    return b"(?:" + b"|".join(map(re.escape, variants)) + b")"
+
+
+def _class(body, encoding, ignore_case):
+    """
+    A character class (the text between [ and ]). Classes of ASCII only
+    stay as they are; others become an alternation of an ASCII class and
+    the non-ASCII members, since a bytes class would hold single bytes.
+    """
+    if body.isascii():
+        return b"[" + body.encode(encoding) + b"]"
+    if body.startswith("^"):
+        raise re.error("символы не ASCII в [^...] не поддерживаются")
+    ascii_part, members = [], []
+    i = 0
+    while i < len(body):
+        ch = body[i]
+        if ch == "\\" and i + 1 < len(body):
+            ch = body[i + 1]
+            i += 2
+            if ch.isascii():
+                ascii_part.append("\\" + ch)
+                continue
+        else:
+            i += 1
+        if i + 1 < len(body) and body[i] == "-":
+            last = body[i + 1]
+            i += 2
+            if ch.isascii() and last.isascii():
+                ascii_part.append(f"{ch}-{last}")
+                continue
+            if ord(last) < ord(ch) or ord(last) - ord(ch) > MAX_CLASS_RANGE:
+                raise re.error(f"диапазон {ch}-{last} не поддерживается")
+            members.extend(chr(c) for c in range(ord(ch), ord(last) + 1))
+        elif ch.isascii():
+            ascii_part.append(re.escape(ch))
+        else:
+            members.append(ch)
+    atoms = [b"[" + "".join(ascii_part).encode(encoding) + b"]"] if ascii_part else []
+    atoms += [_char(ch, encoding, ignore_case) for ch in dict.fromkeys(members) if not ch.isascii()]
+    atoms += [_char(ch, encoding, False) for ch in dict.fromkeys(members) if ch.isascii()]
+    return b"(?:" + b"|".join(atoms) + b")"
+
+
+def _class_end(text, i):
+    """Index of the ] closing a class whose body starts at text[i], or -1."""
+    if text.startswith("^", i):
+        i += 1
+    if text.startswith("]", i):  # a leading ] is literal
+        i += 1
+    while i < len(text):
+        if text[i] == "\\":
+            i += 2
+        elif text[i] == "]":
+            return i
+        else:
+            i += 1
+    return -1
+
+
+def byte_pattern(text: str, encoding: str = "utf-8", ignore_case: bool = False, use_regex: bool = False):
+    """
+    Compile text to a bytes regex. A non-ASCII character is grouped, so
+    "я+" repeats the whole character, and with ignore_case it becomes an
+    alternation of its lower and upper case forms (bytes regexes only fold
+    ASCII). In regex mode escapes are kept and character classes holding
+    non-ASCII are rewritten as alternations; raises re.error.
+    """
+    parts = []
+    i = 0
+    while i < len(text):
+        ch = text[i]
+        i += 1
+        if use_regex and ch == "\\" and i < len(text):
+            ch = text[i]
+            i += 1
+            if ch.isascii():
+                parts.append(b"\\" + ch.encode(encoding))
+                continue
+        elif use_regex and ch == "[":
+            end = _class_end(text, i)
+            if end >= 0:
+                parts.append(_class(text[i:end], encoding, ignore_case))
+                i = end + 1
+            else:
+                parts.append(b"[")  # unterminated: let re report it
+            continue
+        elif use_regex and ch.isascii():
+            parts.append(ch.encode(encoding))
+            continue
+        parts.append(_char(ch, encoding, ignore_case))
+    return re.compile(b"".join(parts), re.IGNORECASE if ignore_case else 0)
+
+
+def compile_pattern(text: str, use_regex: bool, ignore_case: bool):
+    """Compile the user's pattern to a bytes regex (the files are searched as raw bytes)."""
+    return byte_pattern(text, "utf-8", ignore_case, use_regex)
+
+
+def _init_worker(pattern: bytes, flags: int):
+    global _regex
+    _regex = re.compile(pattern, flags)
+
+
+def grep_file(path: str, regex):
+    """Return [(line_no, snippet)] for lines of path matching regex; binary files give []."""
+    results = []
+    try:
+        with open(path, "rb") as f:
+            head = f.read(SNIFF_BYTES)
+            if not head or b"\x00" in head:
+                return results
+            if len(head) < SNIFF_BYTES:
+                data = head  # small file: already in memory, no need to map it
+            else:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                line_no = 1
+                counted_to = 0
+                pos = 0
+                size = len(data)
+                while pos <= size and len(results) < MAX_MATCHES_PER_FILE:
+                    m = regex.search(data, pos)
+                    if m is None:
+                        break
+                    start = m.start()
+                    line_start = data.rfind(b"\n", 0, start) + 1
+                    line_end = data.find(b"\n", start)
+                    if line_end < 0:
+                        line_end = size
+                    line_no += _count_newlines(data, counted_to, line_start)
+                    counted_to = line_start
+                    snippet = bytes(data[line_start:min(line_end, line_start + SNIPPET_CHARS * 4)])
+                    results.append((line_no, snippet.decode("utf-8", errors="replace").strip()[:SNIPPET_CHARS]))
+                    pos = line_end + 1  # one hit per line is enough
+            finally:
+                if not isinstance(data, bytes):
+                    data.close()
+    except (OSError, ValueError):
+        pass
+    return results
+
+
+def _count_newlines(data, start, end):
+    if isinstance(data, bytes):
+        return data.count(b"\n", start, end)
+    # mmap has no count(); walk find() instead of copying the slice
+    n = 0
+    pos = data.find(b"\n", start, end)
+    while pos >= 0:
+        n += 1
+        pos = data.find(b"\n", pos + 1, end)
+    return n
+
+
+def _grep_batch(paths):
+    out = []
+    for path in paths:
+        hits = grep_file(path, _regex)
+        if hits:
+            out.append((path, hits))
+    return out
+
+
+def iter_files(root: str, cancel=None, name_filter=None, skip_dirs=SKIP_DIR_NAMES):
+    """Yield file paths under root (os.scandir, no symlink following)."""
+    stack = [root]
+    while stack:
+        if cancel is not None and cancel.is_set():
+            return
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in skip_dirs:
+                                stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            if name_filter is None or name_filter.search(entry.name):
+                                yield entry.path
+                    except OSError:
+                        pass
+        except OSError:
+            pass
+
+
+def search_tree(root, regex, on_matches, cancel=None, name_filter=None, workers=None, on_progress=None):
+    """
+    Grep every text file under root in a process pool.
+
+    on_matches(list of (path, [(line_no, snippet)])) is called as soon as a
+    batch finishes, so results stream in while the walk continues.
+    on_progress(files_scanned) is called periodically. Returns the number
+    of files scanned.
+    """
+    workers = workers or os.cpu_count() or 2
+    scanned = 0
+    last_report = 0.0
+    # spawn, not fork: the pool is started from a worker thread of a Qt process
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_init_worker,
+                             initargs=(regex.pattern, regex.flags)) as pool:
+        running = set()
+        batch = []
+
+        def drain(block):
+            nonlocal scanned, running
+            done, running = wait(running, timeout=None if block else 0, return_when=FIRST_COMPLETED)
+            for fut in done:
+                found, count = fut.result(), fut.batch_size
+                scanned += count
+                if found:
+                    on_matches(found)
+
+        for path in iter_files(root, cancel, name_filter):
+            batch.append(path)
+            if len(batch) >= FILES_PER_TASK:
+                fut = pool.submit(_grep_batch, batch)
+                fut.batch_size = len(batch)
+                running.add(fut)
+                batch = []
+                if len(running) >= workers * 4:
+                    drain(True)
+                elif running:
+                    drain(False)
+            now = time.monotonic()
+            if on_progress is not None and now - last_report > 0.2:
+                last_report = now
+                on_progress(scanned)
+        if batch and not (cancel is not None and cancel.is_set()):
+            fut = pool.submit(_grep_batch, batch)
+            fut.batch_size = len(batch)
+            running.add(fut)
+        while running:
+            if cancel is not None and cancel.is_set():
+                pool.shutdown(wait=True, cancel_futures=True)
+                break
+            drain(True)
+    if on_progress is not None:
+        on_progress(scanned)
+    return scanned
@@ -0,0 +1,159 @@
+import re
+import threading
+import time
+
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLineEdit, QPushButton, QLabel, QCheckBox,
+    QTreeWidget, QTreeWidgetItem, QHeaderView
+)
+from PyQt5.QtCore import Qt, QObject, pyqtSignal
+
+from content_search import compile_pattern, search_tree
+from file_filter import compile_filter
+
+MAX_SHOWN = 20000  # results kept in the view; the search itself goes on counting
+
+
+class GrepSignals(QObject):
+    matches = pyqtSignal(object)   # list of (path, [(line_no, snippet)])
+    progress = pyqtSignal(int)
+    done = pyqtSignal(int, float)  # files scanned, seconds
+    failed = pyqtSignal(str)
+
+
+class GrepThread(threading.Thread):
+    def __init__(self, root, regex, name_filter, signals: GrepSignals):
+        super().__init__(daemon=True)
+        self.root = root
+        self.regex = regex
+        self.name_filter = name_filter
+        self.signals = signals
+        self._cancel = threading.Event()
+
+    def stop(self):
+        self._cancel.set()
+
+    def run(self):
+        start = time.monotonic()
+        try:
+            scanned = search_tree(self.root, self.regex, self.signals.matches.emit, cancel=self._cancel,
+                                  name_filter=self.name_filter, on_progress=self.signals.progress.emit)
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+            return
+        self.signals.done.emit(scanned, time.monotonic() - start)
+
+
+class ContentSearchDialog(QDialog):
+    """Find text inside files under a folder; results stream in while the search runs."""
+
+    open_path = pyqtSignal(str)
+
+    def __init__(self, root: str, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(f"Поиск в файлах — {root}")
+        self.setAttribute(Qt.WA_DeleteOnClose)
+        self.resize(900, 560)
+        self.root = root
+        self.worker = None
+        self.files_found = 0
+        self.lines_found = 0
+
+        layout = QVBoxLayout()
+        self.setLayout(layout)
+
+        row = QHBoxLayout()
+        self.pattern = QLineEdit()
+        self.pattern.setPlaceholderText("Текст для поиска")
+        self.pattern.returnPressed.connect(self.start)
+        self.mask = QLineEdit()
+        self.mask.setPlaceholderText("Маска файлов: *.py; *.txt")
+        self.mask.setMaximumWidth(200)
+        self.start_btn = QPushButton("Искать")
+        self.start_btn.clicked.connect(self.toggle)
+        row.addWidget(self.pattern)
+        row.addWidget(self.mask)
+        row.addWidget(self.start_btn)
+        layout.addLayout(row)
+
+        opts = QHBoxLayout()
+        self.regex_cb = QCheckBox("Регулярное выражение")
+        self.case_cb = QCheckBox("Учитывать регистр")
+        opts.addWidget(self.regex_cb)
+        opts.addWidget(self.case_cb)
+        opts.addStretch()
+        layout.addLayout(opts)
+
+        self.results = QTreeWidget()
+        self.results.setHeaderLabels(["Файл / строка", "Текст"])
+        self.results.header().setSectionResizeMode(1, QHeaderView.Stretch)
+        self.results.itemDoubleClicked.connect(self.on_double_click)
+        layout.addWidget(self.results)
+
+        self.info = QLabel("")
+        layout.addWidget(self.info)
+
+        self.signals = GrepSignals()
+        self.signals.matches.connect(self.on_matches)
+        self.signals.progress.connect(self.on_progress)
+        self.signals.done.connect(self.on_done)
+        self.signals.failed.connect(self.on_failed)
+
+    def toggle(self):
+        if self.worker is not None:
+            self.worker.stop()
+        else:
+            self.start()
+
+    def start(self):
+        if self.worker is not None or not self.pattern.text():
+            return
+        try:
+            regex = compile_pattern(self.pattern.text(), self.regex_cb.isChecked(), not self.case_cb.isChecked())
+            name_filter = compile_filter(self.mask.text())
+        except re.error as e:
+            self.info.setText(f"Ошибка в выражении: {e}")
+            return
+        self.results.clear()
+        self.files_found = self.lines_found = 0
+        self.worker = GrepThread(self.root, regex, name_filter, self.signals)
+        self.worker.start()
+        self.start_btn.setText("Стоп")
+
+    def on_matches(self, batch):
+        for path, hits in batch:
+            self.files_found += 1
+            self.lines_found += len(hits)
+            if self.results.topLevelItemCount() >= MAX_SHOWN:
+                continue
+            parent = QTreeWidgetItem([path, f"{len(hits)} совп."])
+            parent.setData(0, Qt.UserRole, path)
+            for line_no, snippet in hits:
+                child = QTreeWidgetItem([str(line_no), snippet])
+                child.setData(0, Qt.UserRole, path)
+                parent.addChild(child)
+            self.results.addTopLevelItem(parent)
+
+    def on_progress(self, scanned):
+        self.info.setText(f"Просмотрено файлов: {scanned}, найдено в {self.files_found} файлах ({self.lines_found} строк)")
+
+    def on_done(self, scanned, seconds):
+        self.worker = None
+        self.start_btn.setText("Искать")
+        self.info.setText(f"Готово за {seconds:.1f} с: просмотрено {scanned} файлов, "
+                          f"совпадения в {self.files_found} файлах ({self.lines_found} строк)")
+
+    def on_failed(self, message):
+        self.worker = None
+        self.start_btn.setText("Искать")
+        self.info.setText(f"Ошибка: {message}")
+
+    def on_double_click(self, item, _column):
+        path = item.data(0, Qt.UserRole)
+        if path:
+            self.open_path.emit(path)
+
+    def closeEvent(self, event):
+        if self.worker is not None:
+            self.worker.stop()
+        super().closeEvent(event)
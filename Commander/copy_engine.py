@@ -0,0 +1,267 @@
+import errno
+import itertools
+import os
+import shutil
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from jobs import Job, JobCancelled
+from delete_engine import remove_tree
+
+CHUNK = 8 * 1024 * 1024          # per kernel call / buffered read
+SMALL_FILE = 1024 * 1024         # files below this are copied by the parallel pool
+SMALL_WORKERS = min(16, (os.cpu_count() or 2) * 2)
+
+SKIP = "skip"
+OVERWRITE = "overwrite"
+NEWER = "newer"
+RENAME = "rename"
+
+CONFLICT_POLICIES = [
+    (SKIP, "Пропустить"),
+    (OVERWRITE, "Заменить"),
+    (NEWER, "Заменить, если новее"),
+    (RENAME, "Переименовать"),
+]
+
+_has_copy_file_range = hasattr(os, "copy_file_range")
+_has_sendfile = hasattr(os, "sendfile") and sys.platform.startswith("linux")
+# errors meaning "this kernel path is not available here", as opposed to real I/O errors
+_FALLBACK_ERRNOS = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EBADF, errno.ENOTSUP}
+
+
+def unique_name(path: str) -> str:
+    """'a.txt' -> 'a (1).txt', 'a (2).txt', ... - first name that does not exist."""
+    base, ext = os.path.splitext(path)
+    for i in itertools.count(1):
+        candidate = f"{base} ({i}){ext}"
+        if not os.path.lexists(candidate):
+            return candidate
+
+
+def resolve_conflict(src_stat, dst: str, policy: str):
+    """Return the destination path to write to, or None to skip this file."""
+    try:
+        dst_stat = os.stat(dst)
+    except FileNotFoundError:
+        return dst
+    if policy == OVERWRITE:
+        return dst
+    if policy == NEWER:
+        return dst if src_stat.st_mtime > dst_stat.st_mtime else None
+    if policy == RENAME:
+        return unique_name(dst)
+    return None
+
+
+def _copy_range(fsrc, fdst, job):
+    """
+    Kernel-side copy: copy_file_range (reflink / server-side copy where the
+    filesystem supports it), then sendfile. Returns False without writing
+    anything if neither is usable, so the caller can fall back to read/write.
+    """
+    global _has_copy_file_range, _has_sendfile
+    infd, outfd = fsrc.fileno(), fdst.fileno()
+    offset = 0
+    if _has_copy_file_range:
+        try:
+            while True:
+                job.check()
+                n = os.copy_file_range(infd, outfd, CHUNK)
+                if n == 0:
+                    return True
+                offset += n
+                job.add_bytes(n)
+        except OSError as e:
+            if offset or e.errno not in _FALLBACK_ERRNOS:
+                raise
+            if e.errno == errno.ENOSYS:
+                _has_copy_file_range = False
+    if _has_sendfile:
+        try:
+            while True:
+                job.check()
+                n = os.sendfile(outfd, infd, offset, CHUNK)
+                if n == 0:
+                    return True
+                offset += n
+                job.add_bytes(n)
+        except OSError as e:
+            if offset or e.errno not in _FALLBACK_ERRNOS:
+                raise
+            _has_sendfile = False
+    return False
+
+
+def _copy_buffered(fsrc, fdst, job):
+    buf = bytearray(CHUNK)
+    view = memoryview(buf)
+    while True:
+        job.check()
+        n = fsrc.readinto(buf)
+        if not n:
+            break
+        fdst.write(view[:n])
+        job.add_bytes(n)
+
+
+def copy_file(src: str, dst: str, job: Job, large: bool = True):
+    """Copy one file's data and metadata, reporting bytes to job. A partial dst is removed on failure."""
+    try:
+        with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+            if not (large and _copy_range(fsrc, fdst, job)):
+                _copy_buffered(fsrc, fdst, job)
+    except BaseException:
+        try:
+            os.remove(dst)
+        except OSError:
+            pass
+        raise
+    shutil.copystat(src, dst)
+
+
+def _same_device(src: str, dst_dir: str) -> bool:
+    try:
+        return os.stat(src).st_dev == os.stat(dst_dir).st_dev
+    except OSError:
+        return False
+
+
+def _inside(path: str, root: str) -> bool:
+    """path is root or somewhere below it."""
+    root = root.rstrip("/\\") or root
+    return path == root or path.startswith(root + os.sep) or path.startswith(root + "/")
+
+
+class CopyJob(Job):
+    """
+    Copy (or move) files/folders into target_dir.
+
+    Files of SMALL_FILE bytes and more go through the kernel copy path one
+    at a time; small files are spread over a thread pool, which is where
+    most of the time goes for trees with many tiny files.
+    """
+
+    def __init__(self, sources, target_dir: str, move: bool = False, policy: str = SKIP):
+        names = ", ".join(os.path.basename(s.rstrip("/\\")) or s for s in sources[:3])
+        if len(sources) > 3:
+            names += f" и ещё {len(sources) - 3}"
+        super().__init__(f"{'Перемещение' if move else 'Копирование'}: {names} → {target_dir}")
+        self.sources = list(sources)
+        self.target_dir = target_dir
+        self.move = move
+        self.policy = policy
+        self.skipped = set()  # sources left alone by the conflict policy; a move must keep them
+
+    def run(self):
+        dirs, files, moved_sources = self._plan()
+        for d in dirs:
+            try:
+                os.makedirs(d, exist_ok=True)
+            except OSError as e:
+                self.error(d, e)
+
+        small = [f for f in files if f[2].st_size < SMALL_FILE]
+        large = [f for f in files if f[2].st_size >= SMALL_FILE]
+        for src, dst, st in large:
+            self.check()
+            self._copy_one(src, dst, st, True)
+        if small:
+            with ThreadPoolExecutor(max_workers=SMALL_WORKERS) as pool:
+                for fut in [pool.submit(self._copy_one, src, dst, st, False) for src, dst, st in small]:
+                    try:
+                        fut.result()
+                    except JobCancelled:
+                        self.cancel()
+                        pool.shutdown(wait=True, cancel_futures=True)
+                        raise
+        self.check()
+        if self.move:
+            kept = self.skipped.union(path for path, _ in self.errors)
+            for src in self.sources:
+                if src in moved_sources:
+                    continue
+                if any(_inside(path, src) for path in kept):
+                    continue  # keep the original if part of it was skipped or failed to copy
+                remove_tree(src, self)
+
+    def _plan(self):
+        """Walk sources with os.scandir; collect dirs to create and (src, dst, stat) for each file."""
+        dirs, files, moved = [], [], set()
+        for src in self.sources:
+            self.check()
+            name = os.path.basename(src.rstrip("/\\"))
+            dst = os.path.join(self.target_dir, name)
+            real_src = os.path.realpath(src)
+            if os.path.realpath(dst) == real_src:
+                if self.move or self.policy != RENAME:
+                    self.error(src, "Источник и назначение совпадают")
+                    continue
+                dst = unique_name(dst)
+            elif os.path.realpath(self.target_dir).startswith(real_src + os.sep):
+                self.error(src, "Нельзя копировать папку саму в себя")
+                continue
+            if self.move and _same_device(src, self.target_dir) and not os.path.lexists(dst):
+                try:
+                    os.rename(src, dst)
+                    moved.add(src)
+                    self.add_items()
+                    continue
+                except OSError:
+                    pass
+            try:
+                st = os.stat(src, follow_symlinks=False)
+            except OSError as e:
+                self.error(src, e)
+                continue
+            if os.path.isdir(src) and not os.path.islink(src):
+                self._plan_dir(src, dst, dirs, files)
+            else:
+                files.append((src, dst, st))
+        self.total_items = len(files) + self.done_items
+        self.total_bytes = sum(st.st_size for _, _, st in files)
+        return dirs, files, moved
+
+    def _plan_dir(self, src_root, dst_root, dirs, files):
+        if os.path.isdir(dst_root) and self.policy == RENAME:
+            dst_root = unique_name(dst_root)
+        stack = [(src_root, dst_root)]
+        while stack:
+            self.check()
+            src_dir, dst_dir = stack.pop()
+            dirs.append(dst_dir)
+            self.current = src_dir
+            try:
+                with os.scandir(src_dir) as it:
+                    for entry in it:
+                        target = os.path.join(dst_dir, entry.name)
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                stack.append((entry.path, target))
+                            else:
+                                files.append((entry.path, target, entry.stat(follow_symlinks=False)))
+                        except OSError as e:
+                            self.error(entry.path, e)
+            except OSError as e:
+                self.error(src_dir, e)
+
+    def _copy_one(self, src, dst, st, large):
+        self.check()
+        self.current = src
+        try:
+            target = resolve_conflict(st, dst, self.policy)
+            if target is None:
+                self.skipped.add(src)
+                self.add_bytes(st.st_size)
+            elif os.path.islink(src):
+                if os.path.lexists(target):
+                    os.remove(target)
+                os.symlink(os.readlink(src), target)
+                self.add_bytes(st.st_size)
+            else:
+                copy_file(src, target, self, large)
+        except JobCancelled:
+            raise
+        except OSError as e:
+            self.error(src, e)
+        self.add_items()
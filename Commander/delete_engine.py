@@ -0,0 +1,201 @@
+import os
+import stat
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+from jobs import Job, JobCancelled
+
+try:
+    from send2trash import send2trash
+except ImportError:
+    send2trash = None
+
+DELETE_WORKERS = min(16, (os.cpu_count() or 2) * 2)
+BATCH = 512  # files handed to one pool task
+
+
+def _clear_readonly(path):
+    """Read-only files and folders on Windows refuse deletion; elsewhere a PermissionError is real."""
+    if os.name != 'nt':
+        return False
+    os.chmod(path, os.lstat(path).st_mode | stat.S_IWRITE)
+    return True
+
+
+def _unlink(path):
+    try:
+        os.unlink(path)
+    except PermissionError:
+        # read-only files on Windows: clear the flag and retry once
+        if not _clear_readonly(path):
+            raise
+        os.unlink(path)
+
+
+def _rmdir(path):
+    try:
+        os.rmdir(path)
+    except PermissionError:
+        if not _clear_readonly(path):
+            raise
+        os.rmdir(path)
+
+
+def scan_tree(root, job):
+    """Return (dirs in top-down order, files) under root using os.scandir; symlinks are not followed."""
+    dirs, files = [], []
+    stack = [root]
+    base = job.total_items
+    while stack:
+        job.check()
+        current = stack.pop()
+        dirs.append(current)
+        job.current = current
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        else:
+                            files.append(entry.path)
+                    except OSError as e:
+                        job.error(entry.path, e)
+        except OSError as e:
+            job.error(current, e)
+        job.total_items = base + len(dirs) + len(files)
+    return dirs, files
+
+
+def remove_tree(root, job, pool=None):
+    """
+    Delete root (file, symlink or folder) reporting progress to job.
+
+    Files are unlinked in batches across a thread pool; directories are
+    removed afterwards, deepest first. Returns True if everything was removed.
+    """
+    if os.path.islink(root) or not os.path.isdir(root):
+        job.total_items += 1
+        try:
+            _unlink(root)
+        except OSError as e:
+            job.error(root, e)
+            return False
+        job.add_items()
+        return True
+
+    dirs, files = scan_tree(root, job)
+    errors_before = len(job.errors)
+
+    def unlink_batch(batch):
+        for path in batch:
+            job.check()
+            try:
+                _unlink(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                job.error(path, e)
+            job.add_items()
+
+    own_pool = pool is None
+    if own_pool:
+        pool = ThreadPoolExecutor(max_workers=DELETE_WORKERS)
+    try:
+        futures = [pool.submit(unlink_batch, files[i:i + BATCH]) for i in range(0, len(files), BATCH)]
+        for fut in futures:
+            try:
+                fut.result()
+            except JobCancelled:
+                job.cancel()
+                for f in futures:
+                    f.cancel()
+                raise
+    finally:
+        if own_pool:
+            pool.shutdown(wait=True)
+
+    # deeper paths always come later in top-down order, so reverse is bottom-up
+    for path in reversed(dirs):
+        job.check()
+        job.current = path
+        try:
+            _rmdir(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            if len(job.errors) == errors_before:
+                job.error(path, e)
+        job.add_items()
+    return len(job.errors) == errors_before
+
+
+def _freedesktop_trash(path):
+    """Move path to ~/.local/share/Trash as described by the freedesktop.org trash spec."""
+    data_home = os.environ.get("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share")
+    trash = os.path.join(data_home, "Trash")
+    files_dir = os.path.join(trash, "files")
+    info_dir = os.path.join(trash, "info")
+    os.makedirs(files_dir, exist_ok=True)
+    os.makedirs(info_dir, exist_ok=True)
+    if os.stat(path, follow_symlinks=False).st_dev != os.stat(files_dir).st_dev:
+        raise OSError(f"Корзина находится на другом диске: {path}")
+
+    base = os.path.basename(path.rstrip("/"))
+    name, ext = os.path.splitext(base)
+    candidate, n = base, 1
+    while True:
+        info_path = os.path.join(info_dir, candidate + ".trashinfo")
+        try:
+            fd = os.open(info_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o600)
+            break
+        except FileExistsError:
+            n += 1
+            candidate = f"{name}.{n}{ext}"
+    with os.fdopen(fd, "w") as f:
+        f.write("[Trash Info]\n")
+        f.write(f"Path={quote(os.path.abspath(path))}\n")
+        f.write(f"DeletionDate={time.strftime('%Y-%m-%dT%H:%M:%S')}\n")
+    try:
+        os.rename(path, os.path.join(files_dir, candidate))
+    except OSError:
+        os.remove(info_path)
+        raise
+
+
+def move_to_trash(path):
+    if send2trash is not None:
+        send2trash(path)
+    elif sys.platform.startswith("linux"):
+        _freedesktop_trash(path)
+    else:
+        raise OSError("Для корзины установите пакет send2trash")
+
+
+class DeleteJob(Job):
+    def __init__(self, paths, trash: bool = False):
+        names = ", ".join(os.path.basename(p.rstrip("/\\")) or p for p in paths[:3])
+        if len(paths) > 3:
+            names += f" и ещё {len(paths) - 3}"
+        super().__init__(f"{'В корзину' if trash else 'Удаление'}: {names}")
+        self.paths = list(paths)
+        self.trash = trash
+
+    def run(self):
+        if self.trash:
+            self.total_items = len(self.paths)
+            for path in self.paths:
+                self.check()
+                self.current = path
+                try:
+                    move_to_trash(path)
+                except Exception as e:
+                    self.error(path, e)
+                self.add_items()
+            return
+        with ThreadPoolExecutor(max_workers=DELETE_WORKERS) as pool:
+            for path in self.paths:
+                self.check()
+                remove_tree(path, self, pool)
@@ -0,0 +1,167 @@
+import os
+import threading
+
+from copy_engine import CopyJob, OVERWRITE
+from delete_engine import remove_tree
+from hash_cache import cached_hashes
+from walker import parallel_walk
+
+LEFT_ONLY = "left_only"
+RIGHT_ONLY = "right_only"
+LEFT_NEWER = "left_newer"
+RIGHT_NEWER = "right_newer"
+DIFFERENT = "different"   # same mtime, different size or content
+
+STATUS_NAMES = {
+    LEFT_ONLY: "только слева",
+    RIGHT_ONLY: "только справа",
+    LEFT_NEWER: "новее слева",
+    RIGHT_NEWER: "новее справа",
+    DIFFERENT: "отличается",
+}
+
+MTIME_SLACK_NS = 2 * 10**9  # FAT and some network shares keep 2-second timestamps
+
+ONE_WAY = "one_way"   # make right a copy of left
+TWO_WAY = "two_way"   # newer wins, one-sided entries are copied across
+
+
+def snapshot(root, cancel=None):
+    """Map relative path -> (is_dir, size, mtime_ns) for everything under root."""
+    result = {}
+    prefix = len(root.rstrip("/\\")) + 1
+    for dir_path, entries in parallel_walk(root, cancel):
+        rel_dir = dir_path[prefix:] if len(dir_path) >= prefix else ""
+        for name, is_dir, size, mtime in entries:
+            result[os.path.join(rel_dir, name) if rel_dir else name] = (is_dir, size, mtime)
+    return result
+
+
+def compare_trees(left, right, use_hash=False, cancel=None, progress=None):
+    """
+    Return a sorted list of (rel_path, status, left_info, right_info).
+
+    Files are equal when size matches and mtimes agree within
+    MTIME_SLACK_NS. With use_hash, same-size files whose mtimes differ are
+    hashed (through the persistent hash cache, misses in a process pool)
+    and only reported if the content differs.
+    Children of a folder that exists on one side only are not listed.
+    """
+    def report(text):
+        if progress is not None:
+            progress(text)
+
+    report("Чтение папок...")
+    snaps = {}
+    threads = [threading.Thread(target=lambda side, root: snaps.__setitem__(side, snapshot(root, cancel)),
+                                args=(side, root), daemon=True)
+               for side, root in (("left", left), ("right", right))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    if cancel is not None and cancel.is_set():
+        return []
+    lsnap, rsnap = snaps["left"], snaps["right"]
+    report(f"Сравнение: слева {len(lsnap)}, справа {len(rsnap)} записей")
+
+    diffs = []
+    one_sided_dirs = []
+    to_hash = []
+    # sorting by components keeps every folder directly followed by its contents
+    for rel in sorted(lsnap.keys() | rsnap.keys(), key=lambda p: p.split(os.sep)):
+        if one_sided_dirs and rel.startswith(one_sided_dirs[-1]):
+            continue
+        l, r = lsnap.get(rel), rsnap.get(rel)
+        if r is None or l is None:
+            status = LEFT_ONLY if r is None else RIGHT_ONLY
+            diffs.append((rel, status, l, r))
+            if (l or r)[0]:
+                one_sided_dirs.append(rel + os.sep)
+            continue
+        if l[0] or r[0]:
+            if l[0] != r[0]:
+                diffs.append((rel, DIFFERENT, l, r))
+            continue
+        same_time = abs(l[2] - r[2]) <= MTIME_SLACK_NS
+        if l[1] == r[1] and same_time:
+            continue
+        if use_hash and l[1] == r[1]:
+            to_hash.append(rel)
+            continue
+        diffs.append((rel, _newer(l, r), l, r))
+
+    if to_hash:
+        report(f"Сравнение содержимого: {len(to_hash)} файлов")
+        digests = {}
+        paths = [os.path.join(left, rel) for rel in to_hash] + [os.path.join(right, rel) for rel in to_hash]
+        for n, (path, digest, _error) in enumerate(cached_hashes(paths, cancel), 1):
+            digests[path] = digest
+            if n % 500 == 0:
+                report(f"Сравнение содержимого: {n} / {len(paths)}")
+        for rel in to_hash:
+            a, b = digests.get(os.path.join(left, rel)), digests.get(os.path.join(right, rel))
+            if a is None or a != b:
+                diffs.append((rel, _newer(lsnap[rel], rsnap[rel]), lsnap[rel], rsnap[rel]))
+        diffs.sort(key=lambda d: d[0].split(os.sep))
+    return diffs
+
+
+def _newer(l, r):
+    if abs(l[2] - r[2]) <= MTIME_SLACK_NS:
+        return DIFFERENT
+    return LEFT_NEWER if l[2] > r[2] else RIGHT_NEWER
+
+
+def build_sync_plan(left, right, diffs, mode=ONE_WAY, delete_extra=False):
+    """Turn compare_trees() output into (copy pairs [(src, dst)], paths to delete)."""
+    copies, deletes = [], []
+    for rel, status, _l, _r in diffs:
+        lpath, rpath = os.path.join(left, rel), os.path.join(right, rel)
+        if status == LEFT_ONLY or status == LEFT_NEWER:
+            copies.append((lpath, rpath))
+        elif status == RIGHT_ONLY:
+            if mode == TWO_WAY:
+                copies.append((rpath, lpath))
+            elif delete_extra:
+                deletes.append(rpath)
+        elif status == RIGHT_NEWER:
+            copies.append((rpath, lpath) if mode == TWO_WAY else (lpath, rpath))
+        elif status == DIFFERENT and mode == ONE_WAY:
+            copies.append((lpath, rpath))
+        # DIFFERENT in two-way mode is a conflict: left alone
+    return copies, deletes
+
+
+class SyncJob(CopyJob):
+    """CopyJob over explicit (src, dst) pairs, followed by deleting extra entries."""
+
+    def __init__(self, pairs, deletes, title):
+        super().__init__([src for src, _ in pairs], "", policy=OVERWRITE)
+        self.title = title
+        self.pairs = pairs
+        self.deletes = deletes
+
+    def _plan(self):
+        dirs, files = [], []
+        for src, dst in self.pairs:
+            self.check()
+            try:
+                st = os.stat(src, follow_symlinks=False)
+            except OSError as e:
+                self.error(src, e)
+                continue
+            if os.path.isdir(src) and not os.path.islink(src):
+                self._plan_dir(src, dst, dirs, files)
+            else:
+                dirs.append(os.path.dirname(dst))
+                files.append((src, dst, st))
+        self.total_items = len(files)
+        self.total_bytes = sum(st.st_size for _, _, st in files)
+        return list(dict.fromkeys(dirs)), files, set()
+
+    def run(self):
+        super().run()
+        for path in self.deletes:
+            self.check()
+            remove_tree(path, self)
@@ -0,0 +1,138 @@
+import os
+import re
+import stat
+from array import array
+
+SCAN_BATCH = 5000  # entries handed over per batch while a folder is listed
+
+# entry flags
+DIR = 1
+LINK = 2
+
+_DIGITS = re.compile(r"\d+")
+
+
+def _digit_run(match):
+    digits = match.group().lstrip("0") or "0"
+    return f"\x01{chr(0x20 + len(digits))}{digits}"
+
+
+def natural_key(name: str) -> str:
+    """
+    Case-insensitive sort key where digit runs compare by value (file2 < file10).
+
+    The key is a plain str - each number becomes a marker, its length and
+    its digits - so sorting compares keys in C instead of tuples.
+    """
+    return _DIGITS.sub(_digit_run, name.lower())
+
+
+def _type_key(name: str, key: str) -> str:
+    """Extension first, then the natural key - still one str per entry."""
+    dot = name.rfind(".")
+    return (name[dot:].lower() if dot > 0 else "") + "\0" + key
+
+
+class DirListing:
+    """
+    Entries of one folder in parallel arrays (names, sort keys, sizes,
+    mtimes, flags) instead of an object per entry, so a folder with
+    hundreds of thousands of files stays cheap to hold and to sort.
+    """
+
+    __slots__ = ("names", "keys", "sizes", "mtimes", "flags")
+
+    def __init__(self):
+        self.names = []
+        self.keys = []
+        self.sizes = array("q")
+        self.mtimes = array("d")
+        self.flags = array("B")
+
+    def __len__(self):
+        return len(self.names)
+
+    def extend(self, batch):
+        names, keys, sizes, mtimes, flags = batch
+        self.names.extend(names)
+        self.keys.extend(keys)
+        self.sizes.extend(sizes)
+        self.mtimes.extend(mtimes)
+        self.flags.extend(flags)
+
+    def is_dir(self, i) -> bool:
+        return bool(self.flags[i] & DIR)
+
+    def sorted_order(self, column: int, descending=False) -> array:
+        """
+        Entry indices in display order for a column (0 name, 1 size,
+        2 type, 3 modified); folders come first in either direction.
+        """
+        names, keys = self.names, self.keys
+        if column == 1:
+            key = self.sizes.__getitem__
+        elif column == 2:
+            key = list(map(_type_key, names, keys)).__getitem__
+        elif column == 3:
+            key = self.mtimes.__getitem__
+        else:
+            key = keys.__getitem__
+        order = sorted(range(len(names)), key=key, reverse=descending)
+        flags = self.flags
+        return array("l", [i for i in order if flags[i] & DIR] + [i for i in order if not flags[i] & DIR])
+
+
+def _is_hidden(name, st):
+    if name.startswith("."):
+        return True
+    return bool(getattr(st, "st_file_attributes", 0) & getattr(stat, "FILE_ATTRIBUTE_HIDDEN", 0))
+
+
+def entry_batch(entries):
+    """Build an extend() batch from [(name, stat_result or None, is_dir)]."""
+    names, keys, sizes, mtimes, flags = [], [], [], [], []
+    for name, st, is_dir in entries:
+        names.append(name)
+        keys.append(natural_key(name))
+        link = st is not None and stat.S_ISLNK(st.st_mode)
+        sizes.append(st.st_size if st is not None and not is_dir else 0)
+        mtimes.append(st.st_mtime if st is not None else 0.0)
+        flags.append((DIR if is_dir else 0) | (LINK if link else 0))
+    return names, keys, sizes, mtimes, flags
+
+
+def stat_entry(path: str):
+    """(name, stat, is_dir) for a single path, or None if it is gone."""
+    try:
+        st = os.stat(path, follow_symlinks=False)
+    except OSError:
+        return None
+    is_dir = stat.S_ISDIR(st.st_mode) or (stat.S_ISLNK(st.st_mode) and os.path.isdir(path))
+    return os.path.basename(path.rstrip("/\\")), st, is_dir
+
+
+def scan_batches(path: str, stop=None, batch_size=SCAN_BATCH):
+    """
+    List a folder with os.scandir, yielding extend() batches of up to
+    batch_size entries (sort keys included, so the GUI thread never
+    computes them). Hidden entries are skipped, as in QFileSystemModel.
+    OSError from opening the folder propagates.
+    """
+    pending = []
+    with os.scandir(path) as it:
+        for entry in it:
+            if stop is not None and stop.is_set():
+                return
+            try:
+                st = entry.stat(follow_symlinks=False)
+                is_dir = entry.is_dir()
+            except OSError:
+                st, is_dir = None, False
+            if _is_hidden(entry.name, st):
+                continue
+            pending.append((entry.name, st, is_dir))
+            if len(pending) >= batch_size:
+                yield entry_batch(pending)
+                pending = []
+    if pending:
+        yield entry_batch(pending)
@@ -0,0 +1,446 @@
+import os
+import threading
+from array import array
+from datetime import datetime
+
+from PyQt5.QtCore import Qt, QAbstractItemModel, QModelIndex, QObject, QMimeData, QUrl, pyqtSignal
+from PyQt5.QtWidgets import QFileIconProvider
+
+from dir_listing import DirListing, scan_batches, entry_batch, stat_entry, DIR
+from utils import human_size
+
+COLUMNS = ["Имя", "Размер", "Тип", "Изменён"]
+FETCH_BATCH = 2000  # rows made visible per fetchMore()
+
+_DETACHED = threading.Event()  # stop token of forgotten nodes; never matches a scan
+
+
+class DirScanSignals(QObject):
+    batch = pyqtSignal(int, object, object, bool, str)  # node id, stop event, batch or None, done, error
+
+
+class DirScanThread(threading.Thread):
+    """Lists one folder in batches off the GUI thread."""
+
+    def __init__(self, node_id, path, stop, signals: DirScanSignals):
+        super().__init__(daemon=True)
+        self.node_id = node_id
+        self.path = path
+        self.stop = stop
+        self.signals = signals
+
+    def run(self):
+        try:
+            for batch in scan_batches(self.path, self.stop):
+                self.signals.batch.emit(self.node_id, self.stop, batch, False, "")
+        except OSError as e:
+            self.signals.batch.emit(self.node_id, self.stop, None, True, str(e))
+            return
+        if not self.stop.is_set():
+            self.signals.batch.emit(self.node_id, self.stop, None, True, "")
+
+
+def _inverse(order):
+    """entry index -> row for a row -> entry index array."""
+    rows = array("l", bytes(len(order) * order.itemsize))
+    for row, entry in enumerate(order):
+        rows[entry] = row
+    return rows
+
+
+class _Node:
+    """A folder that has been looked into: its listing and which rows the views see."""
+
+    __slots__ = ("path", "parent", "listing", "order", "rows", "exposed", "stop", "done", "lookup", "stale")
+
+    def __init__(self, path, parent):
+        self.path = path
+        self.parent = parent      # (parent node id, entry index) or None for the top level
+        self.listing = DirListing()
+        self.order = array("l")   # row -> entry index
+        self.rows = array("l")    # entry index -> row
+        self.exposed = 0          # rows 0..exposed-1 are visible to views
+        self.stop = None          # threading.Event of the running/finished scan
+        self.done = False
+        self.lookup = None        # name -> entry index, built when a path is resolved in here
+        self.stale = False        # order is for an older sort; no rows are exposed until it is redone
+
+    def append(self, batch):
+        start = len(self.listing)
+        self.listing.extend(batch)
+        end = len(self.listing)
+        self.rows.extend(range(len(self.order), len(self.order) + end - start))
+        self.order.extend(range(start, end))
+        if self.lookup is not None:
+            self.lookup.update((self.listing.names[i], i) for i in range(start, end))
+
+
+class ScanDirModel(QAbstractItemModel):
+    """
+    Panel model for very large folders, an alternative to QFileSystemModel.
+
+    Each folder is listed with os.scandir in a worker and handed over in
+    batches; views see it grow through canFetchMore()/fetchMore(), so the
+    first screen shows up after the first batch. Entries live in
+    DirListing arrays with precomputed natural sort keys and a folder is
+    sorted once its listing is complete. Index ids are the ids of the
+    parent folder's node; the row maps to an entry through node.order.
+    Nothing is watched - refresh() re-lists a folder.
+    """
+
+    listing_error = pyqtSignal(str, str)  # path, message
+
+    def __init__(self, roots, parent=None):
+        super().__init__(parent)
+        top = _Node("", None)
+        top.done = True
+        top.stop = threading.Event()
+        self._nodes = [top]
+        self._child_ids = {}  # (parent node id, entry index) -> node id
+        self._sort_column = 0
+        self._order = Qt.AscendingOrder
+        self._signals = DirScanSignals(self)
+        self._signals.batch.connect(self._on_batch)
+        icons = QFileIconProvider()
+        self._dir_icon = icons.icon(QFileIconProvider.Folder)
+        self._file_icon = icons.icon(QFileIconProvider.File)
+        entries = []
+        for root in roots:
+            found = stat_entry(root)
+            if found is not None:
+                entries.append((root, found[1], True))
+        top.append(entry_batch(entries))
+        top.exposed = len(top.order)
+
+    # ---- nodes ----
+    def _node_id(self, index):
+        """Node id of the folder an index points at (created on first use); 0 for the top level."""
+        if not index.isValid():
+            return 0
+        parent_id = index.internalId()
+        entry = self._nodes[parent_id].order[index.row()]
+        key = (parent_id, entry)
+        node_id = self._child_ids.get(key)
+        if node_id is None:
+            parent = self._nodes[parent_id]
+            node_id = len(self._nodes)
+            self._nodes.append(_Node(os.path.join(parent.path, parent.listing.names[entry]), key))
+            self._child_ids[key] = node_id
+        return node_id
+
+    def _folder_index(self, node_id):
+        node = self._nodes[node_id]
+        if node.parent is None:
+            return QModelIndex()
+        parent_id, entry = node.parent
+        return self.createIndex(self._nodes[parent_id].rows[entry], 0, parent_id)
+
+    def _entry(self, index):
+        node = self._nodes[index.internalId()]
+        return node, node.order[index.row()]
+
+    def _start_scan(self, node_id):
+        node = self._nodes[node_id]
+        node.stop = threading.Event()
+        DirScanThread(node_id, node.path, node.stop, self._signals).start()
+
+    def _expose(self, node_id, count):
+        node = self._nodes[node_id]
+        self._resort_if_stale(node)
+        last = min(len(node.order), node.exposed + count) - 1
+        if last < node.exposed:
+            return
+        self.beginInsertRows(self._folder_index(node_id), node.exposed, last)
+        node.exposed = last + 1
+        self.endInsertRows()
+
+    def _on_batch(self, node_id, stop, batch, done, error):
+        node = self._nodes[node_id] if node_id < len(self._nodes) else None
+        if node is None or node.stop is not stop:
+            return  # refreshed or shut down meanwhile
+        if batch is not None:
+            if node.lookup is not None:  # drop entries already added by pathIndex()
+                keep = [i for i, name in enumerate(batch[0]) if name not in node.lookup]
+                if len(keep) != len(batch[0]):
+                    batch = tuple([column[i] for i in keep] for column in batch)
+            node.append(batch)
+            if node.exposed < FETCH_BATCH:
+                self._expose(node_id, FETCH_BATCH - node.exposed)
+        if done:
+            node.done = True
+            if error:
+                self.listing_error.emit(node.path, error)
+            self._sort_nodes([node_id])
+
+    def _shown_nodes(self, persistent):
+        """Folders the views can see: those holding or being persistent indexes (roots, expanded, current) and their ancestors."""
+        shown = set()
+        for i in persistent:
+            parent_id = i.internalId()
+            node_id = self._child_ids.get((parent_id, self._nodes[parent_id].order[i.row()]), parent_id)
+            while node_id not in shown:
+                shown.add(node_id)
+                if node_id == parent_id:
+                    node = self._nodes[node_id]
+                    if node.parent is None:
+                        break
+                    parent_id = node.parent[0]
+                node_id = parent_id
+        return shown
+
+    def _resort_if_stale(self, node):
+        """Sort a folder collapsed by an earlier sort() before its rows are shown again."""
+        if node.stale:
+            node.order = node.listing.sorted_order(self._sort_column, self._order == Qt.DescendingOrder)
+            node.rows = _inverse(node.order)
+            node.stale = False
+
+    def _sort_nodes(self, node_ids):
+        """
+        Re-sort finished folders, keeping persistent indexes (current item,
+        view roots) on their entries. Only folders the views can see are
+        sorted now; the others lose their rows and are sorted when fetched again.
+        """
+        node_ids = [i for i in node_ids if self._nodes[i].done and self._nodes[i].parent is not None
+                    and self._nodes[i].stop is not _DETACHED]
+        if not node_ids:
+            return
+        descending = self._order == Qt.DescendingOrder
+        # proxies hand over their persistent indexes only during a layout change
+        self.layoutAboutToBeChanged.emit()
+        old = self.persistentIndexList()
+        shown = self._shown_nodes(old)
+        hidden = [i for i in node_ids if i not in shown]
+        node_ids = [i for i in node_ids if i in shown]
+        new_orders = {i: self._nodes[i].listing.sorted_order(self._sort_column, descending) for i in node_ids}
+        new_rows = {i: _inverse(order) for i, order in new_orders.items()}
+        # keep the row count of each folder; grow it first if a persistent entry lands past the end
+        needed = {}
+        for i in old:
+            node_id = i.internalId()
+            if node_id in new_rows:
+                row = new_rows[node_id][self._nodes[node_id].order[i.row()]]
+                if row >= self._nodes[node_id].exposed:
+                    needed[node_id] = max(needed.get(node_id, 0), row + 1)
+        if needed:
+            self.layoutChanged.emit()
+            for node_id, count in needed.items():
+                self._expose(node_id, count - self._nodes[node_id].exposed)
+            self.layoutAboutToBeChanged.emit()
+            old = self.persistentIndexList()
+        targets = []
+        for i in old:
+            node_id = i.internalId()
+            if node_id in new_rows:
+                entry = self._nodes[node_id].order[i.row()]
+                targets.append(self.createIndex(new_rows[node_id][entry], i.column(), node_id))
+            else:
+                targets.append(i)
+        for node_id in node_ids:
+            node = self._nodes[node_id]
+            node.order, node.rows, node.stale = new_orders[node_id], new_rows[node_id], False
+        self.changePersistentIndexList(old, targets)
+        self.layoutChanged.emit()
+        # children have higher ids than their parents: collapse the deepest first
+        for node_id in sorted(hidden, reverse=True):
+            node = self._nodes[node_id]
+            node.stale = True
+            if node.exposed:
+                self.beginRemoveRows(self._folder_index(node_id), 0, node.exposed - 1)
+                node.exposed = 0
+                self.endRemoveRows()
+
+    def refresh(self, index=QModelIndex()):
+        """List a folder again from scratch (nothing is watched for changes)."""
+        node_id = self._node_id(index)
+        node = self._nodes[node_id]
+        if node.parent is None:
+            return
+        if node.stop is not None:
+            node.stop.set()
+        if node.exposed:
+            self.beginRemoveRows(index, 0, node.exposed - 1)
+            node.exposed = 0
+            self.endRemoveRows()
+        self._detach_children(node_id)
+        node.listing, node.order, node.rows = DirListing(), array("l"), array("l")
+        node.lookup, node.done, node.stale = None, False, False
+        self._start_scan(node_id)
+
+    def _detach_children(self, node_id):
+        """Forget the nodes below a folder: scans are stopped, late batches ignored and listings freed."""
+        stack = [node_id]
+        while stack:
+            parent_id = stack.pop()
+            for key in [k for k in self._child_ids if k[0] == parent_id]:
+                child_id = self._child_ids.pop(key)
+                child = self._nodes[child_id]
+                if child.stop is not None:
+                    child.stop.set()
+                child.stop = _DETACHED
+                child.listing, child.order, child.rows = DirListing(), array("l"), array("l")
+                child.lookup, child.exposed = None, 0
+                stack.append(child_id)
+
+    def shutdown(self):
+        """Stop all running scans, e.g. before the model is replaced."""
+        for node in self._nodes:
+            if node.stop is not None:
+                node.stop.set()
+
+    # ---- QAbstractItemModel ----
+    def index(self, *args):
+        if len(args) in (1, 2) and isinstance(args[0], str):
+            return self.pathIndex(*args)
+        row, column, parent = (args + (QModelIndex(),))[:3]
+        node_id = self._node_id(parent)
+        if not 0 <= row < self._nodes[node_id].exposed or not 0 <= column < len(COLUMNS):
+            return QModelIndex()
+        return self.createIndex(row, column, node_id)
+
+    def parent(self, index=None):
+        if index is None:
+            return super().parent()
+        if not index.isValid():
+            return QModelIndex()
+        return self._folder_index(index.internalId())
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.column() > 0 or not self.isDir(parent):
+            return 0
+        return self._nodes[self._node_id(parent)].exposed
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(COLUMNS)
+
+    def hasChildren(self, parent=QModelIndex()):
+        return parent.column() <= 0 and self.isDir(parent)
+
+    def canFetchMore(self, parent):
+        if parent.column() > 0 or not self.isDir(parent):
+            return False
+        node = self._nodes[self._node_id(parent)]
+        return node.stop is None or node.exposed < len(node.order)
+
+    def fetchMore(self, parent):
+        if not self.isDir(parent):
+            return
+        node_id = self._node_id(parent)
+        if self._nodes[node_id].stop is None:
+            self._start_scan(node_id)
+        self._expose(node_id, FETCH_BATCH)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        node, entry = self._entry(index)
+        listing = node.listing
+        column = index.column()
+        if role == Qt.DisplayRole:
+            is_dir = listing.flags[entry] & DIR
+            name = listing.names[entry]
+            if column == 0:
+                return name
+            if column == 1:
+                return "" if is_dir else human_size(listing.sizes[entry])
+            if column == 2:
+                return "Папка" if is_dir else (os.path.splitext(name)[1][1:].upper() or "Файл")
+            if column == 3:
+                mtime = listing.mtimes[entry]
+                return datetime.fromtimestamp(mtime).strftime("%d.%m.%Y %H:%M") if mtime else ""
+        elif role == Qt.DecorationRole and column == 0:
+            return self._dir_icon if listing.flags[entry] & DIR else self._file_icon
+        elif role == Qt.TextAlignmentRole and column == 1:
+            return Qt.AlignRight | Qt.AlignVCenter
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return COLUMNS[section]
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsDragEnabled
+
+    def mimeTypes(self):
+        return ["text/uri-list"]
+
+    def mimeData(self, indexes):
+        mime = QMimeData()
+        paths = dict.fromkeys(self.filePath(i) for i in indexes)
+        mime.setUrls([QUrl.fromLocalFile(p) for p in paths])
+        return mime
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self._sort_column, self._order = column, order
+        self._sort_nodes(range(1, len(self._nodes)))  # folders out of sight are only marked
+
+    # ---- QFileSystemModel-like API ----
+    def filePath(self, index):
+        if not index.isValid():
+            return ""
+        node, entry = self._entry(index)
+        return os.path.join(node.path, node.listing.names[entry])
+
+    def fileName(self, index):
+        if not index.isValid():
+            return ""
+        node, entry = self._entry(index)
+        return node.listing.names[entry]
+
+    def isDir(self, index):
+        if not index.isValid():
+            return True
+        node, entry = self._entry(index)
+        return bool(node.listing.flags[entry] & DIR)
+
+    def pathIndex(self, path, column=0):
+        """
+        Index of an absolute path. Folders on the way that are not listed
+        yet get just that entry (from a stat), so the panel can be rooted
+        deep inside a huge tree without listing its parents.
+        """
+        if not path:
+            return QModelIndex()
+        path = os.path.abspath(path)
+        key = os.path.normcase(path)
+        top = self._nodes[0]
+        roots = [(len(name), i) for i, name in enumerate(top.listing.names)
+                 if key.startswith(os.path.normcase(name))]
+        if not roots:
+            return QModelIndex()
+        length, entry = max(roots)
+        index = self.createIndex(top.rows[entry], 0, 0)
+        for part in path[length:].split(os.sep):
+            if not part:
+                continue
+            node_id = self._node_id(index)
+            entry = self._find_entry(node_id, part)
+            if entry is None:
+                return QModelIndex()
+            index = self.createIndex(self._nodes[node_id].rows[entry], 0, node_id)
+        return index.sibling(index.row(), column) if column else index
+
+    def _find_entry(self, node_id, name):
+        """Entry index of name in a folder, added from a stat (and made visible) if needed."""
+        node = self._nodes[node_id]
+        self._resort_if_stale(node)
+        if node.lookup is None:
+            node.lookup = {n: i for i, n in enumerate(node.listing.names)}
+        entry = node.lookup.get(name)
+        if entry is None:
+            found = stat_entry(os.path.join(node.path, name))
+            if found is None:
+                return None
+            node.append(entry_batch([found]))
+            entry = len(node.listing) - 1
+        row = node.rows[entry]
+        if row >= node.exposed:
+            # swap it to the first hidden row and show that row
+            other = node.order[node.exposed]
+            node.order[row], node.order[node.exposed] = other, entry
+            node.rows[other], node.rows[entry] = row, node.exposed
+            self._expose(node_id, 1)
+        return entry
@@ -0,0 +1,252 @@
+import hashlib
+import os
+import pickle
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from appdata import data_path, atomic_write, norm_key
+from walker import list_dir, WALK_WORKERS
+
+IS_DIR = 1
+
+
+class SizeTree:
+    """
+    Directory tree stored in parallel arrays instead of one object per file.
+
+    Node i has name[i], parent[i], size[i] (subtree total for folders),
+    mtime[i] (folders only) and flags[i]. Entries of a folder are appended
+    together, so its children are the slice child_start[i] .. + child_count[i].
+    Parents always have smaller indices than their children.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self.names = []
+        self.parent = array("q")
+        self.size = array("q")
+        self.mtime = array("q")
+        self.flags = bytearray()
+        self.child_start = array("q")
+        self.child_count = array("q")
+        self.scanned_at = 0.0
+
+    def __len__(self):
+        return len(self.names)
+
+    def add(self, parent, name, is_dir, size, mtime):
+        self.names.append(name)
+        self.parent.append(parent)
+        self.size.append(size)
+        self.mtime.append(mtime)
+        self.flags.append(IS_DIR if is_dir else 0)
+        self.child_start.append(0)
+        self.child_count.append(0)
+        return len(self.names) - 1
+
+    def is_dir(self, i):
+        return bool(self.flags[i] & IS_DIR)
+
+    def children(self, i):
+        start = self.child_start[i]
+        return range(start, start + self.child_count[i])
+
+    def path(self, i):
+        parts = []
+        while i > 0:
+            parts.append(self.names[i])
+            i = self.parent[i]
+        return os.path.join(self.root, *reversed(parts))
+
+    def find(self, path):
+        """Node index for path under root, or None."""
+        rel = os.path.relpath(path, self.root)
+        i = 0
+        if rel == ".":
+            return i
+        for part in rel.split(os.sep):
+            for c in self.children(i):
+                if self.names[c] == part:
+                    i = c
+                    break
+            else:
+                return None
+        return i
+
+    def total_files(self):
+        return sum(1 for f in self.flags if not f & IS_DIR)
+
+    def sum_sizes(self):
+        """Fill folder sizes bottom-up; relies on children having larger indices."""
+        size, parent = self.size, self.parent
+        for i in range(len(size) - 1, 0, -1):
+            size[parent[i]] += size[i]
+
+    # ---- persistence ----
+    def dumps(self):
+        return pickle.dumps({
+            "root": self.root, "names": self.names, "parent": self.parent, "size": self.size,
+            "mtime": self.mtime, "flags": bytes(self.flags), "child_start": self.child_start,
+            "child_count": self.child_count, "scanned_at": self.scanned_at,
+        }, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def loads(cls, data):
+        d = pickle.loads(data)
+        tree = cls(d["root"])
+        tree.names = d["names"]
+        tree.parent, tree.size, tree.mtime = d["parent"], d["size"], d["mtime"]
+        tree.flags = bytearray(d["flags"])
+        tree.child_start, tree.child_count = d["child_start"], d["child_count"]
+        tree.scanned_at = d["scanned_at"]
+        return tree
+
+
+def _cache_file(root):
+    digest = hashlib.sha1(norm_key(root).encode("utf-8")).hexdigest()[:16]
+    return data_path(f"du_{digest}.pickle")
+
+
+def load_cached(root):
+    try:
+        with open(_cache_file(root), "rb") as f:
+            return SizeTree.loads(f.read())
+    except (OSError, pickle.UnpicklingError, EOFError, KeyError, ValueError):
+        return None
+
+
+def save_cached(tree):
+    try:
+        atomic_write(_cache_file(tree.root), tree.dumps())
+    except OSError:
+        pass
+
+
+def _old_children(old, old_idx):
+    """Entries of a folder taken from the previous scan (no disk access)."""
+    out = []
+    for c in old.children(old_idx):
+        is_dir = old.is_dir(c)
+        out.append((old.names[c], is_dir, 0 if is_dir else old.size[c], old.mtime[c]))
+    return out
+
+
+def scan(root, old=None, cancel=None, progress=None):
+    """
+    Build a SizeTree for root on a thread pool.
+
+    With `old` (a previous tree of the same root) folders whose mtime did
+    not change reuse their entries from `old`; only changed folders are
+    listed again. progress(nodes, listed, reused) is called periodically.
+    Returns None if cancelled.
+    """
+    old_dirs = {}
+    if old is not None:
+        for i in range(len(old)):
+            if old.is_dir(i):
+                old_dirs[old.path(i)] = i
+
+    def task(new_idx, path):
+        try:
+            mtime = os.stat(path, follow_symlinks=False).st_mtime_ns
+        except OSError:
+            return new_idx, 0, [], False
+        old_idx = old_dirs.get(path)
+        if old_idx is not None and old.mtime[old_idx] == mtime:
+            return new_idx, mtime, _old_children(old, old_idx), True
+        _, entries = list_dir(path)
+        return new_idx, mtime, entries or [], False
+
+    tree = SizeTree(root)
+    tree.add(-1, "", True, 0, 0)
+    listed = reused = 0
+    last_report = 0.0
+    with ThreadPoolExecutor(max_workers=WALK_WORKERS) as pool:
+        running = {pool.submit(task, 0, root)}
+        while running:
+            if cancel is not None and cancel.is_set():
+                for f in running:
+                    f.cancel()
+                return None
+            done, running = wait(running, timeout=0.2, return_when=FIRST_COMPLETED)
+            for fut in done:
+                idx, mtime, entries, was_reused = fut.result()
+                if was_reused:
+                    reused += 1
+                else:
+                    listed += 1
+                tree.mtime[idx] = mtime
+                tree.child_start[idx] = len(tree)
+                tree.child_count[idx] = len(entries)
+                dir_nodes = []
+                for name, is_dir, size, m in entries:
+                    node = tree.add(idx, name, is_dir, 0 if is_dir else size, m)
+                    if is_dir:
+                        dir_nodes.append(node)
+                base = tree.path(idx)
+                for node in dir_nodes:
+                    running.add(pool.submit(task, node, os.path.join(base, tree.names[node])))
+            now = time.monotonic()
+            if progress is not None and now - last_report > 0.2:
+                last_report = now
+                progress(len(tree), listed, reused)
+    tree.sum_sizes()
+    tree.scanned_at = time.time()
+    if progress is not None:
+        progress(len(tree), listed, reused)
+    return tree
+
+
+# ---------------------------
+# Squarified treemap
+# ---------------------------
+def _worst(row, length):
+    s = sum(row)
+    if s <= 0 or length <= 0:
+        return float("inf")
+    return max(length * length * max(row) / (s * s), (s * s) / (length * length * min(row)))
+
+
+def squarify(sizes, x, y, w, h):
+    """
+    Squarified treemap layout (Bruls, Huizing, van Wijk).
+
+    sizes must be positive and sorted in descending order; returns one
+    (x, y, w, h) per size, in the same order.
+    """
+    total = float(sum(sizes))
+    if total <= 0 or w <= 0 or h <= 0:
+        return [(x, y, 0, 0) for _ in sizes]
+    scale = w * h / total
+    areas = [s * scale for s in sizes]
+    rects = []
+    i = 0
+    while i < len(areas):
+        length = min(w, h)
+        row = [areas[i]]
+        i += 1
+        while i < len(areas) and _worst(row + [areas[i]], length) <= _worst(row, length):
+            row.append(areas[i])
+            i += 1
+        row_sum = sum(row)
+        if w >= h:
+            # lay the row out as a column on the left
+            col_w = row_sum / h
+            cy = y
+            for a in row:
+                rh = a / col_w
+                rects.append((x, cy, col_w, rh))
+                cy += rh
+            x += col_w
+            w -= col_w
+        else:
+            row_h = row_sum / w
+            cx = x
+            for a in row:
+                rw = a / row_h
+                rects.append((cx, y, rw, row_h))
+                cx += rw
+            y += row_h
+            h -= row_h
+    return rects
@@ -0,0 +1,214 @@
+import threading
+from datetime import datetime
+
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QWidget, QToolTip
+from PyQt5.QtCore import Qt, QObject, QRectF, pyqtSignal
+from PyQt5.QtGui import QPainter, QColor, QPen
+
+from disk_usage import scan, load_cached, save_cached, squarify
+from utils import human_size
+
+MAX_TILES = 400     # children drawn per level; the rest is merged into one tile
+MIN_TILE = 3.0      # px; smaller tiles are not drawn
+DIR_COLORS = ["#3d6fb6", "#4a9f6e", "#b5843a", "#8a56ac", "#b2524f", "#3c9aa5", "#8c8c3a", "#a3557f"]
+FILE_COLOR = "#5a5a5a"
+
+
+class UsageSignals(QObject):
+    progress = pyqtSignal(int, int, int)  # nodes, listed, reused
+    done = pyqtSignal(object)             # SizeTree or None
+
+
+class UsageScanThread(threading.Thread):
+    def __init__(self, root, old, signals: UsageSignals):
+        super().__init__(daemon=True)
+        self.root = root
+        self.old = old
+        self.signals = signals
+        self._cancel = threading.Event()
+
+    def stop(self):
+        self._cancel.set()
+
+    def run(self):
+        tree = scan(self.root, self.old, self._cancel, self.signals.progress.emit)
+        if tree is not None:
+            save_cached(tree)
+        self.signals.done.emit(tree)
+
+
+class TreemapWidget(QWidget):
+    """Squarified treemap of one folder of a SizeTree; click a folder tile to drill down."""
+
+    node_changed = pyqtSignal(int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.tree = None
+        self.node = 0
+        self.tiles = []  # (QRectF, node index or -1 for "other")
+        self.setMouseTracking(True)
+        self.setMinimumSize(400, 300)
+
+    def set_tree(self, tree, node=0):
+        self.tree = tree
+        self.node = node
+        self.layout_tiles()
+
+    def set_node(self, node):
+        self.node = node
+        self.layout_tiles()
+        self.node_changed.emit(node)
+
+    def layout_tiles(self):
+        self.tiles = []
+        tree = self.tree
+        if tree is not None:
+            kids = sorted((c for c in tree.children(self.node) if tree.size[c] > 0),
+                          key=lambda c: tree.size[c], reverse=True)
+            rest = kids[MAX_TILES:]
+            kids = kids[:MAX_TILES]
+            sizes = [tree.size[c] for c in kids]
+            if rest:
+                kids.append(-1)
+                sizes.append(sum(tree.size[c] for c in rest))
+            rects = squarify(sizes, 0, 0, self.width(), self.height()) if sizes else []
+            self.tiles = [(QRectF(*r), c) for r, c in zip(rects, kids)]
+        self.update()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.layout_tiles()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor("#1e1e1e"))
+        if self.tree is None:
+            return
+        pen = QPen(QColor("#101010"))
+        for n, (rect, node) in enumerate(self.tiles):
+            if rect.width() < MIN_TILE or rect.height() < MIN_TILE:
+                continue
+            is_dir = node >= 0 and self.tree.is_dir(node)
+            color = QColor(DIR_COLORS[n % len(DIR_COLORS)] if is_dir else FILE_COLOR)
+            painter.fillRect(rect, color)
+            painter.setPen(pen)
+            painter.drawRect(rect)
+            if rect.width() > 60 and rect.height() > 18:
+                painter.setPen(QColor("white"))
+                name = self.tree.names[node] if node >= 0 else "прочее"
+                size = self.tree.size[node] if node >= 0 else 0
+                label = f"{name}\n{human_size(size)}" if rect.height() > 34 and node >= 0 else name
+                painter.drawText(rect.adjusted(3, 2, -3, -2), Qt.AlignLeft | Qt.AlignTop | Qt.TextWordWrap, label)
+
+    def tile_at(self, pos):
+        for rect, node in self.tiles:
+            if rect.contains(pos):
+                return node
+        return None
+
+    def mouseMoveEvent(self, event):
+        node = self.tile_at(event.pos())
+        if node is not None and node >= 0:
+            QToolTip.showText(event.globalPos(), f"{self.tree.path(node)}\n{human_size(self.tree.size[node])}", self)
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.RightButton:
+            self.go_up()
+            return
+        node = self.tile_at(event.pos())
+        if node is not None and node >= 0 and self.tree.is_dir(node):
+            self.set_node(node)
+
+    def go_up(self):
+        if self.tree is not None and self.node > 0:
+            self.set_node(self.tree.parent[self.node])
+
+
+class DiskUsageDialog(QDialog):
+    """Disk usage of a folder: the cached scan is shown at once, then refreshed incrementally."""
+
+    open_path = pyqtSignal(str)
+
+    def __init__(self, root: str, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(f"Занятое место — {root}")
+        self.setAttribute(Qt.WA_DeleteOnClose)
+        self.resize(1000, 700)
+        self.root = root
+        self.worker = None
+
+        layout = QVBoxLayout()
+        self.setLayout(layout)
+        row = QHBoxLayout()
+        up_btn = QPushButton("Вверх")
+        self.path_label = QLabel(root)
+        self.rescan_btn = QPushButton("Пересканировать")
+        open_btn = QPushButton("Показать в панели")
+        row.addWidget(up_btn)
+        row.addWidget(self.path_label, 1)
+        row.addWidget(open_btn)
+        row.addWidget(self.rescan_btn)
+        layout.addLayout(row)
+
+        self.treemap = TreemapWidget()
+        self.treemap.node_changed.connect(self.on_node_changed)
+        layout.addWidget(self.treemap, 1)
+        self.info = QLabel("")
+        layout.addWidget(self.info)
+
+        up_btn.clicked.connect(self.treemap.go_up)
+        open_btn.clicked.connect(self.reveal_current)
+        self.rescan_btn.clicked.connect(self.toggle_scan)
+
+        self.signals = UsageSignals()
+        self.signals.progress.connect(self.on_progress)
+        self.signals.done.connect(self.on_done)
+
+        cached = load_cached(root)
+        if cached is not None:
+            self.treemap.set_tree(cached)
+            self.on_node_changed(0)
+            when = datetime.fromtimestamp(cached.scanned_at).strftime("%Y-%m-%d %H:%M")
+            self.info.setText(f"Из кэша ({when}), проверяются изменения...")
+        self.start_scan(cached)
+
+    def start_scan(self, old):
+        self.worker = UsageScanThread(self.root, old, self.signals)
+        self.worker.start()
+        self.rescan_btn.setText("Стоп")
+
+    def toggle_scan(self):
+        if self.worker is not None:
+            self.worker.stop()
+        else:
+            self.start_scan(self.treemap.tree)
+
+    def on_progress(self, nodes, listed, reused):
+        self.info.setText(f"Сканирование: {nodes} записей, прочитано папок {listed}, из кэша {reused}")
+
+    def on_done(self, tree):
+        self.worker = None
+        self.rescan_btn.setText("Пересканировать")
+        if tree is None:
+            self.info.setText("Сканирование остановлено")
+            return
+        # keep the user where they were if that folder still exists
+        current = self.treemap.tree.path(self.treemap.node) if self.treemap.tree is not None else self.root
+        node = tree.find(current)
+        self.treemap.set_tree(tree, node if node is not None else 0)
+        self.on_node_changed(self.treemap.node)
+        self.info.setText(f"Всего: {human_size(tree.size[0])}, {len(tree)} записей")
+
+    def on_node_changed(self, node):
+        tree = self.treemap.tree
+        self.path_label.setText(f"{tree.path(node)}   —   {human_size(tree.size[node])}")
+
+    def reveal_current(self):
+        if self.treemap.tree is not None:
+            self.open_path.emit(self.treemap.tree.path(self.treemap.node))
+
+    def closeEvent(self, event):
+        if self.worker is not None:
+            self.worker.stop()
+        super().closeEvent(event)
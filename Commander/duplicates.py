@@ -0,0 +1,156 @@
+import os
+import stat
+from concurrent.futures import ThreadPoolExecutor
+
+from delete_engine import _unlink, move_to_trash
+from hash_cache import cached_hashes
+from hashing import PARTIAL_BLOCK
+from jobs import Job
+from walker import parallel_walk, WALK_WORKERS
+
+DELETE = "delete"
+HARDLINK = "hardlink"
+
+
+def _regular_stat(path):
+    try:
+        st = os.stat(path, follow_symlinks=False)
+    except OSError:
+        return path, None
+    return path, st if stat.S_ISREG(st.st_mode) else None
+
+
+def _group_by_digest(groups, stats, cancel, partial, report, stage):
+    """Split each group of paths by content digest; groups left with one file are dropped."""
+    paths = [p for group in groups for p in group]
+    digests = {}
+    per_task = 32 if partial else 1
+    for n, (path, digest, _error) in enumerate(cached_hashes(paths, cancel, partial, per_task, stats), 1):
+        if digest is not None:
+            digests[path] = digest
+        if n % 200 == 0:
+            report(f"{stage}: {n} / {len(paths)}")
+    out = []
+    for group in groups:
+        by_digest = {}
+        for path in group:
+            if path in digests:
+                by_digest.setdefault(digests[path], []).append(path)
+        out.extend(g for g in by_digest.values() if len(g) > 1)
+    return out
+
+
+def find_duplicates(root, cancel=None, progress=None, min_size=1):
+    """
+    Find files with identical content under root.
+
+    Files are grouped by size first; only sizes shared by several files
+    are hashed, first by partial_hash() (head and tail) and then, for
+    groups that still collide, by a full hash; digests come from the
+    persistent hash cache where files are unchanged. Hard links to one inode
+    count as a single file. Returns [(size, [(path, mtime_ns)])] with the
+    most wasted space first, or None if cancelled.
+    """
+    def report(text):
+        if progress is not None:
+            progress(text)
+
+    by_size = {}
+    scanned = 0
+    for dir_path, entries in parallel_walk(root, cancel):
+        for name, is_dir, size, _mtime in entries:
+            if not is_dir and size >= min_size:
+                by_size.setdefault(size, []).append(os.path.join(dir_path, name))
+        scanned += len(entries)
+        if scanned % 5000 < len(entries):
+            report(f"Чтение папок: {scanned} записей")
+    if cancel is not None and cancel.is_set():
+        return None
+
+    candidates = [p for group in by_size.values() if len(group) > 1 for p in group]
+    report(f"Одинаковый размер у {len(candidates)} файлов")
+    stats = {}
+    with ThreadPoolExecutor(max_workers=WALK_WORKERS) as pool:
+        for path, st in pool.map(_regular_stat, candidates):
+            if st is not None:
+                stats[path] = st
+    groups = []
+    for group in by_size.values():
+        seen = set()
+        unique = []
+        for path in group:
+            st = stats.get(path)
+            if st is not None and (st.st_dev, st.st_ino) not in seen:
+                seen.add((st.st_dev, st.st_ino))
+                unique.append(path)
+        if len(unique) > 1:
+            groups.append(unique)
+    del by_size
+
+    groups = _group_by_digest(groups, stats, cancel, True, report, "Хэш начала и конца")
+    if cancel is not None and cancel.is_set():
+        return None
+    # a partial hash already covers small files completely
+    small = [g for g in groups if stats[g[0]].st_size <= 2 * PARTIAL_BLOCK]
+    large = [g for g in groups if stats[g[0]].st_size > 2 * PARTIAL_BLOCK]
+    groups = small + _group_by_digest(large, stats, cancel, False, report, "Полный хэш")
+    if cancel is not None and cancel.is_set():
+        return None
+
+    result = [(stats[g[0]].st_size, sorted((p, stats[p].st_mtime_ns) for p in g)) for g in groups]
+    result.sort(key=lambda r: r[0] * (len(r[1]) - 1), reverse=True)
+    return result
+
+
+def keep_newest(files):
+    """Paths of a duplicate group other than the most recently modified one."""
+    newest = max(files, key=lambda f: f[1])[0]
+    return [path for path, _ in files if path != newest]
+
+
+class DedupJob(Job):
+    """
+    Delete duplicates or replace them with hard links to the kept copy.
+
+    actions is a list of (path, mtime_ns, keep_path); a file whose mtime or
+    size changed since the scan is left alone.
+    """
+
+    def __init__(self, actions, mode=DELETE, trash=False):
+        verb = "жёсткие ссылки" if mode == HARDLINK else ("в корзину" if trash else "удаление")
+        super().__init__(f"Дубликаты — {verb}: {len(actions)} файлов")
+        self.actions = actions
+        self.mode = mode
+        self.trash = trash
+
+    def run(self):
+        self.total_items = len(self.actions)
+        for path, mtime, keep in self.actions:
+            self.check()
+            self.current = path
+            try:
+                st = os.stat(path, follow_symlinks=False)
+                kst = os.stat(keep)
+                if st.st_mtime_ns != mtime or st.st_size != kst.st_size:
+                    raise OSError("файл изменился после поиска")
+                if self.mode == HARDLINK:
+                    self._link(keep, path)
+                elif self.trash:
+                    move_to_trash(path)
+                else:
+                    _unlink(path)
+                self.add_bytes(st.st_size)
+            except Exception as e:
+                self.error(path, e)
+            self.add_items()
+
+    @staticmethod
+    def _link(keep, path):
+        """Replace path with a hard link to keep; the swap is a single rename."""
+        tmp = f"{path}.pycommander-link"
+        os.link(keep, tmp)
+        try:
+            os.replace(tmp, path)
+        except OSError:
+            os.unlink(tmp)
+            raise
@@ -0,0 +1,185 @@
+import threading
+import time
+from datetime import datetime
+
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QCheckBox, QMessageBox,
+    QTreeWidget, QTreeWidgetItem, QHeaderView
+)
+from PyQt5.QtCore import Qt, QObject, pyqtSignal
+
+from duplicates import find_duplicates, keep_newest, DedupJob, DELETE, HARDLINK
+from utils import human_size
+
+MAX_SHOWN = 5000  # groups listed; the biggest ones come first
+
+
+class DupSignals(QObject):
+    progress = pyqtSignal(str)
+    done = pyqtSignal(object, float)  # groups or None, seconds
+
+
+class DupThread(threading.Thread):
+    def __init__(self, root, signals: DupSignals):
+        super().__init__(daemon=True)
+        self.root = root
+        self.signals = signals
+        self._cancel = threading.Event()
+
+    def stop(self):
+        self._cancel.set()
+
+    def run(self):
+        start = time.monotonic()
+        groups = find_duplicates(self.root, self._cancel, self.signals.progress.emit)
+        self.signals.done.emit(groups, time.monotonic() - start)
+
+
+class DuplicatesDialog(QDialog):
+    """
+    Duplicate files under a folder, one group per content.
+
+    Checked files are the ones acted on; every group must keep at least
+    one unchecked file, which becomes the target of hard links.
+    """
+
+    open_path = pyqtSignal(str)
+
+    def __init__(self, root: str, submit_job, trash=False, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(f"Дубликаты — {root}")
+        self.setAttribute(Qt.WA_DeleteOnClose)
+        self.resize(960, 620)
+        self.root = root
+        self.submit_job = submit_job
+        self.worker = None
+
+        layout = QVBoxLayout()
+        self.setLayout(layout)
+
+        self.view = QTreeWidget()
+        self.view.setHeaderLabels(["Файл", "Размер", "Изменён"])
+        self.view.header().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.view.itemDoubleClicked.connect(self.on_double_click)
+        layout.addWidget(self.view)
+
+        row = QHBoxLayout()
+        self.scan_btn = QPushButton("Искать")
+        self.scan_btn.clicked.connect(self.toggle_scan)
+        newest_btn = QPushButton("Отметить всё, кроме новейших")
+        newest_btn.clicked.connect(self.mark_all_but_newest)
+        clear_btn = QPushButton("Снять отметки")
+        clear_btn.clicked.connect(lambda: self.set_checks(lambda _path: False))
+        self.trash_cb = QCheckBox("В корзину")
+        self.trash_cb.setChecked(trash)
+        delete_btn = QPushButton("Удалить отмеченные")
+        delete_btn.clicked.connect(lambda: self.apply(DELETE))
+        link_btn = QPushButton("Заменить жёсткими ссылками")
+        link_btn.clicked.connect(lambda: self.apply(HARDLINK))
+        row.addWidget(self.scan_btn)
+        row.addWidget(newest_btn)
+        row.addWidget(clear_btn)
+        row.addStretch()
+        row.addWidget(self.trash_cb)
+        row.addWidget(delete_btn)
+        row.addWidget(link_btn)
+        layout.addLayout(row)
+
+        self.info = QLabel("")
+        layout.addWidget(self.info)
+
+        self.signals = DupSignals()
+        self.signals.progress.connect(self.info.setText)
+        self.signals.done.connect(self.on_done)
+        self.toggle_scan()
+
+    def toggle_scan(self):
+        if self.worker is not None:
+            self.worker.stop()
+            return
+        self.view.clear()
+        self.worker = DupThread(self.root, self.signals)
+        self.worker.start()
+        self.scan_btn.setText("Стоп")
+
+    def on_done(self, groups, seconds):
+        self.worker = None
+        self.scan_btn.setText("Искать")
+        if groups is None:
+            self.info.setText("Поиск остановлен")
+            return
+        items = []
+        wasted = 0
+        for size, files in groups[:MAX_SHOWN]:
+            wasted += size * (len(files) - 1)
+            group = QTreeWidgetItem([f"Одинаковых файлов: {len(files)}", human_size(size), ""])
+            for path, mtime in files:
+                child = QTreeWidgetItem([path, human_size(size),
+                                         datetime.fromtimestamp(mtime / 1e9).strftime("%Y-%m-%d %H:%M")])
+                child.setData(0, Qt.UserRole, (path, mtime))
+                child.setFlags(child.flags() | Qt.ItemIsUserCheckable)
+                child.setCheckState(0, Qt.Unchecked)
+                group.addChild(child)
+            items.append(group)
+        self.view.addTopLevelItems(items)
+        self.view.expandAll()
+        shown = f" (показаны первые {MAX_SHOWN})" if len(groups) > MAX_SHOWN else ""
+        self.info.setText(f"Групп: {len(groups)}{shown}, можно освободить {human_size(wasted)}, "
+                          f"за {seconds:.1f} с" if groups else f"Дубликатов нет ({seconds:.1f} с)")
+
+    def groups(self):
+        for i in range(self.view.topLevelItemCount()):
+            group = self.view.topLevelItem(i)
+            yield [group.child(j) for j in range(group.childCount())]
+
+    def set_checks(self, predicate):
+        for children in self.groups():
+            for child in children:
+                path, _mtime = child.data(0, Qt.UserRole)
+                child.setCheckState(0, Qt.Checked if predicate(path) else Qt.Unchecked)
+
+    def mark_all_but_newest(self):
+        marked = set()
+        for children in self.groups():
+            marked.update(keep_newest([child.data(0, Qt.UserRole) for child in children]))
+        self.set_checks(marked.__contains__)
+
+    def apply(self, mode):
+        actions = []
+        for children in self.groups():
+            checked = [c.data(0, Qt.UserRole) for c in children if c.checkState(0) == Qt.Checked]
+            kept = [c.data(0, Qt.UserRole) for c in children if c.checkState(0) != Qt.Checked]
+            if not checked:
+                continue
+            if not kept:
+                QMessageBox.warning(self, "Дубликаты", f"В группе нужно оставить хотя бы один файл:\n{checked[0][0]}")
+                return
+            keep = max(kept, key=lambda f: f[1])[0]
+            actions.extend((path, mtime, keep) for path, mtime in checked)
+        if not actions:
+            self.info.setText("Ничего не отмечено")
+            return
+        verb = "заменить жёсткими ссылками" if mode == HARDLINK else "удалить"
+        if QMessageBox.question(self, "Дубликаты", f"{verb.capitalize()} {len(actions)} файлов?",
+                                QMessageBox.Yes | QMessageBox.No) != QMessageBox.Yes:
+            return
+        self.submit_job(DedupJob(actions, mode, trash=self.trash_cb.isChecked()))
+        # the groups are stale now; drop the acted-on rows
+        done = {path for path, _, _ in actions}
+        for i in reversed(range(self.view.topLevelItemCount())):
+            group = self.view.topLevelItem(i)
+            for j in reversed(range(group.childCount())):
+                if group.child(j).data(0, Qt.UserRole)[0] in done:
+                    group.removeChild(group.child(j))
+            if group.childCount() < 2:
+                self.view.takeTopLevelItem(i)
+
+    def on_double_click(self, item, _column):
+        data = item.data(0, Qt.UserRole)
+        if data:
+            self.open_path.emit(data[0])
+
+    def closeEvent(self, event):
+        if self.worker is not None:
+            self.worker.stop()
+        super().closeEvent(event)
@@ -0,0 +1,103 @@
+import fnmatch
+import os
+import re
+
+from PyQt5.QtCore import Qt, QSortFilterProxyModel, QModelIndex
+from PyQt5.QtGui import QColor
+
+GLOB_CHARS = set("*?[")
+
+
+def compile_filter(text: str):
+    """
+    Turn the filter box text into a single compiled regex (or None for "no filter").
+
+    Accepted forms, several may be joined with ';' or ',':
+        .txt / txt      - extension
+        *.py, data_??   - glob (fnmatch, case-insensitive)
+        re:^test_.*\\.py$ - regular expression (searched in the file name)
+    """
+    text = text.strip()
+    if not text:
+        return None
+    if text.startswith("re:"):
+        return re.compile(text[3:], re.IGNORECASE)
+    parts = []
+    for raw in re.split(r"[;,]", text):
+        item = raw.strip()
+        if not item:
+            continue
+        if GLOB_CHARS & set(item):
+            parts.append(fnmatch.translate(item))
+        else:
+            ext = item if item.startswith(".") else "." + item
+            parts.append(r"(?s:.*)" + re.escape(ext) + r"\Z")
+    if not parts:
+        return None
+    return re.compile("^(?:" + "|".join(parts) + ")", re.IGNORECASE)
+
+
+class FileFilterProxyModel(QSortFilterProxyModel):
+    """
+    Proxy over QFileSystemModel that hides files not matching the filter.
+
+    Folders are always shown so the tree stays navigable. Verdicts are cached
+    by file name, so rows that QFileSystemModel inserts while it keeps loading
+    a directory (and rows re-checked after a resort) cost one dict lookup.
+    Sorting is delegated to the source model to keep "folders first" order.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._matcher = None
+        self._verdicts = {}
+        self._marks = {}  # normalized path -> QColor, e.g. compare results
+        self.setDynamicSortFilter(True)
+
+    def set_filter_text(self, text: str):
+        matcher = compile_filter(text)
+        if (matcher.pattern if matcher else None) == (self._matcher.pattern if self._matcher else None):
+            return
+        self._matcher = matcher
+        self._verdicts = {}
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if self._matcher is None:
+            return True
+        model = self.sourceModel()
+        idx = model.index(source_row, 0, source_parent)
+        if model.isDir(idx):
+            return True
+        name = model.fileName(idx)
+        verdict = self._verdicts.get(name)
+        if verdict is None:
+            verdict = self._matcher.search(name) is not None
+            self._verdicts[name] = verdict
+        return verdict
+
+    def set_marks(self, marks):
+        """Colour rows by path ({path: "#rrggbb"}); an empty dict clears the marks.
+        The caller repaints the view (viewport().update())."""
+        self._marks = {os.path.normcase(os.path.normpath(p)): QColor(c) for p, c in marks.items()}
+
+    def data(self, index, role=Qt.DisplayRole):
+        if self._marks and role == Qt.ForegroundRole:
+            color = self._marks.get(os.path.normcase(os.path.normpath(self.filePath(index))))
+            if color is not None:
+                return color
+        return super().data(index, role)
+
+    def sort(self, column, order):
+        self.sourceModel().sort(column, order)
+
+    # QFileSystemModel-like helpers so the rest of the window can keep calling
+    # tree.model().filePath(index) and friends.
+    def filePath(self, index):
+        return self.sourceModel().filePath(self.mapToSource(index))
+
+    def isDir(self, index):
+        return self.sourceModel().isDir(self.mapToSource(index))
+
+    def pathIndex(self, path: str) -> QModelIndex:
+        return self.mapFromSource(self.sourceModel().index(path))
@@ -0,0 +1,228 @@
+import os
+import threading
+
+from PyQt5.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLineEdit, QPushButton, QCheckBox, QLabel, QAbstractScrollArea,
+    QInputDialog, QShortcut
+)
+from PyQt5.QtCore import Qt, QObject, QTimer, pyqtSignal
+from PyQt5.QtGui import QFont, QPainter, QColor, QKeySequence
+
+from line_index import LineIndex
+from utils import human_size
+
+POLL_MS = 200        # how often indexing progress is picked up
+TAB_WIDTH = 4
+CURRENT_LINE_COLOR = QColor(255, 235, 59, 70)
+GUTTER_COLOR = QColor(128, 128, 128)
+
+
+class LineView(QAbstractScrollArea):
+    """Paints only the lines on screen; the vertical scroll bar counts lines, not pixels."""
+
+    def __init__(self, index: LineIndex, parent=None):
+        super().__init__(parent)
+        self.index = index
+        self.current_line = -1
+        self.setFont(QFont("Consolas" if os.name == 'nt' else "Monospace", 10))
+        self.viewport().setCursor(Qt.IBeamCursor)
+        self.update_range()
+
+    def visible_lines(self):
+        return max(1, self.viewport().height() // self.fontMetrics().height())
+
+    def update_range(self):
+        """Called while indexing: the scroll range grows with the indexed part."""
+        visible = self.visible_lines()
+        bar = self.verticalScrollBar()
+        bar.setRange(0, max(0, self.index.line_count() - visible + 1))
+        bar.setPageStep(visible)
+        self.viewport().update()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.update_range()
+
+    def scrollContentsBy(self, dx, dy):
+        self.viewport().update()
+
+    def go_to_line(self, line):
+        self.current_line = line
+        self.verticalScrollBar().setValue(max(0, line - self.visible_lines() // 2))
+        self.viewport().update()
+
+    def keyPressEvent(self, event):
+        bar = self.verticalScrollBar()
+        key = event.key()
+        if key == Qt.Key_Home and event.modifiers() & Qt.ControlModifier:
+            bar.setValue(0)
+        elif key == Qt.Key_End and event.modifiers() & Qt.ControlModifier:
+            bar.setValue(bar.maximum())
+        elif key == Qt.Key_PageDown:
+            bar.triggerAction(bar.SliderPageStepAdd)
+        elif key == Qt.Key_PageUp:
+            bar.triggerAction(bar.SliderPageStepSub)
+        elif key == Qt.Key_Down:
+            bar.triggerAction(bar.SliderSingleStepAdd)
+        elif key == Qt.Key_Up:
+            bar.triggerAction(bar.SliderSingleStepSub)
+        else:
+            super().keyPressEvent(event)
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        metrics = self.fontMetrics()
+        height = metrics.height()
+        first = self.verticalScrollBar().value()
+        lines = self.index.lines(first, self.visible_lines() + 1)
+        digits = len(str(max(1, self.index.line_count())))
+        gutter = metrics.horizontalAdvance("9" * digits) + 12
+        x = gutter - self.horizontalScrollBar().value()
+        widest = 0
+        for row, text in enumerate(lines):
+            y = row * height
+            if first + row == self.current_line:
+                painter.fillRect(0, y, self.viewport().width(), height, CURRENT_LINE_COLOR)
+            text = text.expandtabs(TAB_WIDTH)
+            painter.setPen(self.palette().text().color())
+            painter.drawText(x, y + metrics.ascent(), text)
+            widest = max(widest, metrics.horizontalAdvance(text))
+            painter.setPen(GUTTER_COLOR)
+            painter.fillRect(0, y, gutter - 6, height, self.palette().base())
+            painter.drawText(0, y, gutter - 10, height, Qt.AlignRight | Qt.AlignVCenter, str(first + row + 1))
+        painter.end()
+        # the horizontal range only grows, from the widest line seen so far
+        hbar = self.horizontalScrollBar()
+        needed = widest + gutter - self.viewport().width()
+        if needed > hbar.maximum():
+            hbar.setRange(0, needed)
+            hbar.setPageStep(self.viewport().width())
+
+
+class ViewerSignals(QObject):
+    found = pyqtSignal(int, object)  # search generation, byte offset or None
+
+
+class FileViewer(QWidget):
+    """
+    Viewer for files of any size (F3): memory-mapped, line index built in
+    the background, virtual scrolling, jump to line and streaming search.
+    """
+
+    def __init__(self, path: str, parent=None):
+        super().__init__(parent, Qt.Window)
+        self.setAttribute(Qt.WA_DeleteOnClose)
+        self.setWindowTitle(f"Просмотр — {path}")
+        self.resize(1000, 700)
+        self.index = LineIndex(path)
+        self._cancel = threading.Event()
+        self._search_cancel = threading.Event()
+        self._search_generation = 0
+        self.searchers = []  # search threads that may still be reading the mapping
+        self.signals = ViewerSignals()
+        self.signals.found.connect(self.on_found)
+
+        layout = QVBoxLayout()
+        self.setLayout(layout)
+        row = QHBoxLayout()
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("Найти (Enter / F3 — следующее)")
+        self.search_edit.returnPressed.connect(self.find_next)
+        self.case_cb = QCheckBox("Учитывать регистр")
+        find_btn = QPushButton("Найти далее")
+        find_btn.clicked.connect(self.find_next)
+        goto_btn = QPushButton("К строке...")
+        goto_btn.clicked.connect(self.go_to_line)
+        row.addWidget(self.search_edit, 1)
+        row.addWidget(self.case_cb)
+        row.addWidget(find_btn)
+        row.addWidget(goto_btn)
+        layout.addLayout(row)
+        self.view = LineView(self.index)
+        layout.addWidget(self.view, 1)
+        self.info = QLabel("")
+        layout.addWidget(self.info)
+
+        QShortcut(QKeySequence("Ctrl+F"), self, self.search_edit.setFocus)
+        QShortcut(QKeySequence("F3"), self, self.find_next)
+        QShortcut(QKeySequence("Ctrl+G"), self, self.go_to_line)
+        QShortcut(QKeySequence("Esc"), self, self.close)
+
+        self.indexer = threading.Thread(target=self.index.build, args=(self._cancel,), daemon=True)
+        self.indexer.start()
+        self.timer = QTimer(self)
+        self.timer.setInterval(POLL_MS)
+        self.timer.timeout.connect(self.poll_index)
+        self.timer.start()
+        self.poll_index()
+        self.view.setFocus()
+
+    def poll_index(self):
+        self.view.update_range()
+        size = human_size(self.index.size)
+        lines = self.index.line_count()
+        if self.index.done:
+            self.timer.stop()
+            self.info.setText(f"{size}, строк: {lines}, кодировка: {self.index.encoding}")
+        else:
+            self.info.setText(f"{size}, индексация {self.index.progress:.0%}: строк пока {lines}")
+
+    def go_to_line(self):
+        total = max(1, self.index.line_count())
+        line, ok = QInputDialog.getInt(self, "Перейти к строке", f"Строка (1–{total}):",
+                                       self.view.current_line + 1 or 1, 1, total)
+        if ok:
+            self.view.go_to_line(line - 1)
+            self.view.setFocus()
+
+    def find_next(self):
+        text = self.search_edit.text()
+        if not text:
+            self.search_edit.setFocus()
+            return
+        self._search_cancel.set()
+        self._search_cancel = cancel = threading.Event()
+        self._search_generation += 1
+        generation = self._search_generation
+        line = self.view.current_line + 1 if self.view.current_line >= 0 else self.view.verticalScrollBar().value()
+        start = self.index.line_offset(line)
+        if start is None:
+            start = 0
+        ignore_case = not self.case_cb.isChecked()
+        self.info.setText(f"Поиск «{text}»...")
+
+        def run():
+            offset = self.index.search(text, start, ignore_case, cancel)
+            if not cancel.is_set():
+                self.signals.found.emit(generation, offset)
+        self.searchers = [t for t in self.searchers if t.is_alive()]
+        searcher = threading.Thread(target=run, daemon=True)
+        self.searchers.append(searcher)
+        searcher.start()
+
+    def on_found(self, generation, offset):
+        if generation != self._search_generation:
+            return
+        if offset is None:
+            self.info.setText(f"«{self.search_edit.text()}» не найдено")
+            return
+        line = self.index.line_of(offset)
+        self.view.go_to_line(line)
+        self.info.setText(f"Найдено в строке {line + 1}")
+
+    def closeEvent(self, event):
+        self._cancel.set()
+        self._search_cancel.set()
+        self.timer.stop()
+        # cancelled searches stop within one SCAN_CHUNK window; the mapping
+        # is closed only when nothing reads it any more, else left to the GC
+        threads = [self.indexer] + self.searchers
+        for thread in threads:
+            thread.join(timeout=1)
+        if not any(thread.is_alive() for thread in threads):
+            try:
+                self.index.close()
+            except BufferError:
+                pass  # a line buffer still references the mapping; it is freed with the index
+
+        super().closeEvent(event)
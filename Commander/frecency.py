@@ -0,0 +1,116 @@
+import heapq
+import json
+import math
+import os
+import time
+
+from appdata import data_path, atomic_write, norm_key
+
+INDEX_FILE = "frecency.json"
+HALF_LIFE = 7 * 24 * 3600   # a visit counts half as much after a week
+MAX_ENTRIES = 2000          # lowest scores are dropped beyond this
+_DECAY = math.log(2) / HALF_LIFE
+
+
+class FrecencyIndex:
+    """
+    Visited folders and opened files ranked by frequency x recency.
+
+    Each path keeps one decayed score: a visit multiplies the old score by
+    2 ** (-elapsed / HALF_LIFE) and adds 1, so no visit history is stored.
+    Lookups scan a pre-lowered in-memory list, which is small enough to
+    stay well under a millisecond.
+    """
+
+    def __init__(self, filename=None):
+        self.filename = filename or data_path(INDEX_FILE)
+        self.entries = {}  # norm key -> [path, score, last_visit, is_dir]
+        self.dirty = False
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.filename, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                self.entries = data
+        except (OSError, ValueError):
+            self.entries = {}
+        self._lowered = None
+
+    def save(self):
+        if not self.dirty:
+            return
+        try:
+            atomic_write(self.filename, json.dumps(self.entries, ensure_ascii=False,
+                                                   separators=(",", ":")).encode("utf-8"))
+            self.dirty = False
+        except OSError:
+            pass
+
+    def record(self, path, is_dir=True, now=None):
+        now = now or time.time()
+        key = norm_key(path)
+        entry = self.entries.get(key)
+        if entry is None:
+            self.entries[key] = [path, 1.0, now, is_dir]
+            self._lowered = None
+            if len(self.entries) > MAX_ENTRIES:
+                self._prune(now)
+        else:
+            entry[1] = entry[1] * math.exp(-_DECAY * (now - entry[2])) + 1.0
+            entry[2] = now
+            self._lowered = None
+        self.dirty = True
+
+    def forget(self, path):
+        if self.entries.pop(norm_key(path), None) is not None:
+            self._lowered = None
+            self.dirty = True
+
+    def _prune(self, now):
+        ranked = sorted(self.entries.items(), key=lambda kv: self._score(kv[1], now), reverse=True)
+        self.entries = dict(ranked[:MAX_ENTRIES * 9 // 10])
+        self._lowered = None
+
+    @staticmethod
+    def _score(entry, now):
+        return entry[1] * math.exp(-_DECAY * (now - entry[2]))
+
+    def _search_list(self):
+        """(lowered path, lowered name, rank, path, is_dir) per entry, rebuilt after changes.
+        rank = log(score) + decay * last_visit orders entries like the decayed score
+        at any fixed moment, so queries need no exp() per entry."""
+        if self._lowered is None:
+            self._lowered = []
+            for path, score, last, is_dir in self.entries.values():
+                lowered = path.lower()
+                name = os.path.basename(lowered.rstrip("/\\")) or lowered
+                self._lowered.append((lowered, name, math.log(score) + _DECAY * last, path, is_dir))
+        return self._lowered
+
+    def query(self, text, limit=10):
+        """
+        Best matches for space-separated fragments, e.g. "proj src".
+
+        Every fragment must occur in the path, in order, case-insensitively,
+        and the last one must occur in the final path component.
+        Returns [(path, is_dir)] best first.
+        """
+        fragments = text.lower().split()
+        if not fragments:
+            return []
+        last = fragments[-1]
+        matches = []
+        for lowered, name, rank, path, is_dir in self._search_list():
+            if last not in name:
+                continue
+            pos = 0
+            for fragment in fragments:
+                pos = lowered.find(fragment, pos)
+                if pos < 0:
+                    break
+                pos += len(fragment)
+            else:
+                matches.append((rank, path, is_dir))
+        return [(path, is_dir) for _, path, is_dir in heapq.nlargest(limit, matches)]
@@ -0,0 +1,218 @@
+import os
+import sqlite3
+import stat
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from appdata import data_path
+from hashing import hash_files, PATHS_PER_TASK
+from jobs import Job, JobCancelled
+from walker import parallel_walk, WALK_WORKERS
+
+CACHE_FILE = "hash_cache.sqlite"
+FULL = "f"
+PARTIAL = "p"
+KEEP_DAYS = 180       # entries not used for this long are pruned
+TOUCH_DAYS = 7        # a hit refreshes the entry's last-used day at most this often
+STAT_BATCH = 256      # paths per stat task
+COMMIT_EVERY = 2000   # computed digests per write transaction
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS hashes (
+    dev INTEGER NOT NULL,
+    ino INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    used INTEGER NOT NULL,
+    PRIMARY KEY (dev, ino, size, mtime_ns, kind)
+) WITHOUT ROWID;
+"""
+
+
+def _today():
+    return int(time.time() // 86400)
+
+
+def file_key(st):
+    """Cache key of a stat result, or None when the filesystem has no stable inode numbers."""
+    if not st.st_ino:
+        return None
+    return st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns
+
+
+class HashCache:
+    """
+    Content digests keyed by (device, inode, size, mtime_ns) in SQLite.
+
+    A renamed or moved file keeps its entry; any write changes mtime_ns
+    and so misses. Full and partial digests are kept side by side. One
+    connection is shared by all threads behind a lock.
+    """
+
+    def __init__(self, filename=None):
+        self.filename = filename or data_path(CACHE_FILE)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.filename, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.prune()
+
+    def prune(self, keep_days=KEEP_DAYS):
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM hashes WHERE used < ?", (_today() - keep_days,))
+
+    def lookup(self, keys, kind=FULL):
+        """{key: digest} for the keys that are cached (one join against a temp table)."""
+        today = _today()
+        with self._lock:
+            conn = self.conn
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS wanted (dev, ino, size, mtime_ns)")
+            conn.executemany("INSERT INTO wanted VALUES (?, ?, ?, ?)", keys)
+            rows = conn.execute(
+                "SELECT h.dev, h.ino, h.size, h.mtime_ns, h.digest, h.used FROM wanted w JOIN hashes h "
+                "ON h.dev = w.dev AND h.ino = w.ino AND h.size = w.size AND h.mtime_ns = w.mtime_ns "
+                "AND h.kind = ?", (kind,)).fetchall()
+            conn.execute("DELETE FROM wanted")
+            stale = [(today, dev, ino, size, mtime, kind)
+                     for dev, ino, size, mtime, _digest, used in rows if used < today - TOUCH_DAYS]
+            if stale:
+                with conn:
+                    conn.executemany("UPDATE hashes SET used = ? WHERE dev = ? AND ino = ? AND size = ? "
+                                     "AND mtime_ns = ? AND kind = ?", stale)
+            conn.commit()
+        return {(dev, ino, size, mtime): digest for dev, ino, size, mtime, digest, _used in rows}
+
+    def store(self, items, kind=FULL):
+        """Save [(key, digest)]."""
+        today = _today()
+        rows = [(dev, ino, size, mtime, kind, digest, today) for (dev, ino, size, mtime), digest in items]
+        if not rows:
+            return
+        with self._lock, self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_cache():
+    """The process-wide HashCache, opened on first use; None if the database cannot be opened."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            try:
+                _shared = HashCache()
+            except sqlite3.Error:
+                return None
+        return _shared
+
+
+def _stat_batch(paths):
+    out = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        if stat.S_ISREG(st.st_mode):
+            out.append((path, st))
+    return out
+
+
+def cached_hashes(paths, cancel=None, partial=False, per_task=PATHS_PER_TASK, stats=None, cache=None):
+    """
+    hash_files() with the persistent cache in front: yields (path, digest,
+    error) - cached digests first, then the misses as the process pool
+    hashes them. Computed digests are stored only if the file did not
+    change while it was read.
+
+    stats ({path: stat_result}) saves the stat calls when the caller has them.
+    """
+    cache = cache or shared_cache()
+    paths = list(paths)
+    if cache is None:
+        yield from hash_files(paths, cancel, partial=partial, per_task=per_task)
+        return
+    kind = PARTIAL if partial else FULL
+    stats = dict(stats or {})
+    missing = [p for p in paths if p not in stats]
+    if missing:
+        with ThreadPoolExecutor(max_workers=WALK_WORKERS) as pool:
+            batches = (missing[i:i + STAT_BATCH] for i in range(0, len(missing), STAT_BATCH))
+            for found in pool.map(_stat_batch, batches):
+                stats.update(found)
+    keys = {}
+    for path in paths:
+        st = stats.get(path)
+        key = file_key(st) if st is not None else None
+        if key is not None:
+            keys[path] = key
+    if cancel is not None and cancel.is_set():
+        return
+    found = cache.lookup(set(keys.values()), kind)
+
+    to_hash = []
+    for path in paths:
+        digest = found.get(keys.get(path))
+        if digest is not None:
+            yield path, digest, None
+        else:
+            to_hash.append(path)
+    if cancel is not None and cancel.is_set():
+        return
+    pending = []
+    try:
+        for path, digest, error in hash_files(to_hash, cancel, partial=partial, per_task=per_task):
+            key = keys.get(path)
+            if digest is not None and key is not None:
+                try:
+                    after = file_key(os.stat(path))
+                except OSError:
+                    after = None
+                if after == key:
+                    pending.append((key, digest))
+                    if len(pending) >= COMMIT_EVERY:
+                        cache.store(pending, kind)
+                        pending = []
+            yield path, digest, error
+    finally:
+        # also when the caller stops early (GeneratorExit): keep what was hashed
+        cache.store(pending, kind)
+
+
+class HashTreeJob(Job):
+    """Hash every file under a folder into the cache, so later compares and duplicate searches are fast."""
+
+    def __init__(self, root: str):
+        super().__init__(f"Хэши: {root}")
+        self.root = root
+
+    def run(self):
+        stats = {}
+        self.current = self.root
+        for dir_path, entries in parallel_walk(self.root, self._cancel):
+            self.check()
+            for name, is_dir, size, _mtime in entries:
+                if not is_dir:
+                    stats[os.path.join(dir_path, name)] = size
+        self.check()
+        self.total_items = len(stats)
+        self.total_bytes = sum(stats.values())
+        for path, _digest, error in cached_hashes(stats, self._cancel, per_task=1):
+            self.check()  # Pause blocks here, so no further batches are handed to the pool
+            self.current = path
+            if error is not None:
+                self.error(path, error)
+            self.add_bytes(stats[path])
+            self.add_items()
+        if self.cancelled:
+            raise JobCancelled()
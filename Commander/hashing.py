@@ -0,0 +1,84 @@
+import hashlib
+import itertools
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+HASH_CHUNK = 1024 * 1024
+PARTIAL_BLOCK = 64 * 1024  # head and tail read by partial_hash()
+PATHS_PER_TASK = 32  # many small files per round trip to the pool
+
+
+def hash_file(path: str) -> str:
+    """blake2b hex digest of a file's contents."""
+    h = hashlib.blake2b(digest_size=20)
+    with open(path, "rb", buffering=0) as f:
+        buf = bytearray(HASH_CHUNK)
+        view = memoryview(buf)
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            h.update(view[:n])
+    return h.hexdigest()
+
+
+def partial_hash(path: str) -> str:
+    """
+    blake2b of the first and last PARTIAL_BLOCK bytes plus the size.
+
+    For files up to 2 * PARTIAL_BLOCK this covers the whole content, so
+    the result is as good as a full hash.
+    """
+    h = hashlib.blake2b(digest_size=20)
+    with open(path, "rb", buffering=0) as f:
+        size = os.fstat(f.fileno()).st_size
+        h.update(size.to_bytes(8, "little"))
+        h.update(f.read(PARTIAL_BLOCK))
+        if size > PARTIAL_BLOCK:
+            f.seek(max(PARTIAL_BLOCK, size - PARTIAL_BLOCK))
+            h.update(f.read(PARTIAL_BLOCK))
+    return h.hexdigest()
+
+
+def _hash_batch(paths, partial=False):
+    func = partial_hash if partial else hash_file
+    out = []
+    for path in paths:
+        try:
+            out.append((path, func(path), None))
+        except OSError as e:
+            out.append((path, None, str(e)))
+    return out
+
+
+def hash_files(paths, cancel=None, workers=None, partial=False, per_task=PATHS_PER_TASK):
+    """
+    Hash many files in a process pool, yielding (path, digest, error) as batches finish.
+    With partial, partial_hash() is used instead of hash_file(); large files
+    are better sent with a small per_task so one worker does not get them all.
+
+    Only a few batches per worker are in flight, so a huge path list is
+    never pickled up front and cancel takes effect quickly.
+    """
+    workers = workers or os.cpu_count() or 2
+    it = iter(paths)
+    # spawn, not fork: the pool is started from a worker thread of a Qt process
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        running = set()
+        exhausted = False
+        while running or not exhausted:
+            if cancel is not None and cancel.is_set():
+                pool.shutdown(wait=True, cancel_futures=True)
+                return
+            while not exhausted and len(running) < workers * 2:
+                batch = list(itertools.islice(it, per_task))
+                if not batch:
+                    exhausted = True
+                    break
+                running.add(pool.submit(_hash_batch, batch, partial))
+            if not running:
+                break
+            done, running = wait(running, timeout=0.2, return_when=FIRST_COMPLETED)
+            for fut in done:
+                yield from fut.result()
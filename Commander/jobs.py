@@ -0,0 +1,160 @@
+import itertools
+import queue
+import threading
+import time
+
+QUEUED = "queued"
+RUNNING = "running"
+PAUSED = "paused"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+STATE_NAMES = {
+    QUEUED: "В очереди",
+    RUNNING: "Выполняется",
+    PAUSED: "Пауза",
+    DONE: "Готово",
+    FAILED: "Ошибка",
+    CANCELLED: "Отменено",
+}
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    """
+    Base class for long file operations run by JobQueue.
+
+    Subclasses implement run() and call check() often (between files and
+    between chunks) so pause and cancel take effect quickly. Progress
+    counters are plain attributes: workers add to them, the GUI polls them.
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, title: str):
+        self.id = next(self._ids)
+        self.title = title
+        self.state = QUEUED
+        self.total_bytes = 0
+        self.done_bytes = 0
+        self.total_items = 0
+        self.done_items = 0
+        self.current = ""
+        self.errors = []
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+        self._resume = threading.Event()
+        self._resume.set()
+        self._cancel = threading.Event()
+
+    # --- control, called from the GUI thread ---
+    def pause(self):
+        if self.state in (QUEUED, RUNNING):
+            self._resume.clear()
+            self.state = PAUSED
+
+    def resume(self):
+        if self.state == PAUSED:
+            self.state = RUNNING if self.started_at else QUEUED
+            self._resume.set()
+
+    def cancel(self):
+        self._cancel.set()
+        self._resume.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    @property
+    def finished(self):
+        return self.state in (DONE, FAILED, CANCELLED)
+
+    # --- helpers for run() ---
+    def check(self):
+        """Block while paused; raise JobCancelled if the job was cancelled."""
+        if not self._resume.is_set():
+            self._resume.wait()
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def add_bytes(self, n: int):
+        with self._lock:
+            self.done_bytes += n
+
+    def add_items(self, n: int = 1):
+        with self._lock:
+            self.done_items += n
+
+    def error(self, path: str, exc):
+        with self._lock:
+            self.errors.append((path, str(exc)))
+
+    def run(self):
+        raise NotImplementedError
+
+
+class JobQueue:
+    """
+    FIFO of jobs executed by a small pool of runner threads.
+
+    listener(job) is called from the runner thread whenever a job changes
+    state; GUI code should forward it through a Qt signal.
+    """
+
+    def __init__(self, runners: int = 2, listener=None):
+        self.listener = listener
+        self.jobs = []
+        self._queue = queue.Queue()
+        self._threads = []
+        for i in range(runners):
+            t = threading.Thread(target=self._loop, name=f"job-runner-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def submit(self, job: Job) -> Job:
+        self.jobs.append(job)
+        self._queue.put(job)
+        self._notify(job)
+        return job
+
+    def active(self):
+        return [j for j in self.jobs if not j.finished]
+
+    def clear_finished(self):
+        self.jobs = [j for j in self.jobs if not j.finished]
+
+    def _notify(self, job):
+        if self.listener is not None:
+            try:
+                self.listener(job)
+            except Exception:
+                pass
+
+    def _loop(self):
+        while True:
+            job = self._queue.get()
+            try:
+                job.check()
+            except JobCancelled:
+                job.state = CANCELLED
+                self._notify(job)
+                continue
+            job.state = RUNNING
+            job.started_at = time.monotonic()
+            self._notify(job)
+            try:
+                job.run()
+                job.state = FAILED if job.errors and not job.done_items else DONE
+            except JobCancelled:
+                job.state = CANCELLED
+            except Exception as e:
+                job.error(job.title, e)
+                job.state = FAILED
+            job.finished_at = time.monotonic()
+            self._notify(job)
@@ -0,0 +1,165 @@
+import time
+
+from PyQt5.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QTreeWidget, QTreeWidgetItem, QPushButton,
+    QComboBox, QLabel, QProgressBar, QHeaderView
+)
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from jobs import JobQueue, STATE_NAMES, RUNNING, PAUSED, DONE
+from copy_engine import CONFLICT_POLICIES
+from utils import human_size, format_eta
+
+
+class JobSignals(QObject):
+    changed = pyqtSignal(object)
+
+
+class JobsPanel(QWidget):
+    """
+    Queue of background file jobs with progress, speed and ETA.
+
+    State changes arrive through JobSignals; byte counters are polled on a
+    timer so a fast copy does not flood the event loop with signals.
+    """
+
+    finished = pyqtSignal(object)  # job
+
+    def __init__(self, parent=None, runners=2):
+        super().__init__(parent)
+        self.signals = JobSignals()
+        self.signals.changed.connect(self.on_job_changed)
+        self.queue = JobQueue(runners=runners, listener=self.signals.changed.emit)
+        self.items = {}   # job.id -> (job, QTreeWidgetItem, QProgressBar)
+        self.rates = {}   # job.id -> (last_time, last_bytes, bytes_per_sec)
+
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.setLayout(layout)
+
+        self.view = QTreeWidget()
+        self.view.setRootIsDecorated(False)
+        self.view.setHeaderLabels(["Задача", "Прогресс", "Скорость", "Осталось", "Статус"])
+        self.view.header().setSectionResizeMode(0, QHeaderView.Stretch)
+        layout.addWidget(self.view)
+
+        bar = QHBoxLayout()
+        bar.addWidget(QLabel("При конфликте:"))
+        self.policy_combo = QComboBox()
+        for key, title in CONFLICT_POLICIES:
+            self.policy_combo.addItem(title, key)
+        bar.addWidget(self.policy_combo)
+        bar.addStretch()
+        self.pause_btn = QPushButton("Пауза / продолжить")
+        self.pause_btn.clicked.connect(self.toggle_pause)
+        cancel_btn = QPushButton("Отмена")
+        cancel_btn.clicked.connect(self.cancel_selected)
+        clear_btn = QPushButton("Убрать завершённые")
+        clear_btn.clicked.connect(self.clear_finished)
+        bar.addWidget(self.pause_btn)
+        bar.addWidget(cancel_btn)
+        bar.addWidget(clear_btn)
+        layout.addLayout(bar)
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(500)
+        self.timer.timeout.connect(self.refresh)
+
+    @property
+    def conflict_policy(self):
+        return self.policy_combo.currentData()
+
+    def submit(self, job):
+        item = QTreeWidgetItem([job.title, "", "", "", STATE_NAMES[job.state]])
+        item.setToolTip(0, job.title)
+        bar = QProgressBar()
+        bar.setRange(0, 1000)
+        bar.setTextVisible(True)
+        self.view.addTopLevelItem(item)
+        self.view.setItemWidget(item, 1, bar)
+        self.items[job.id] = (job, item, bar)
+        self.queue.submit(job)
+        self.timer.start()
+        return job
+
+    def selected_jobs(self):
+        selected = {id(i) for i in self.view.selectedItems()}
+        jobs = [job for job, item, _ in self.items.values() if id(item) in selected]
+        return jobs or [j for j, _, _ in self.items.values() if not j.finished][:1]
+
+    def toggle_pause(self):
+        for job in self.selected_jobs():
+            if job.state == PAUSED:
+                job.resume()
+            else:
+                job.pause()
+        self.refresh()
+
+    def cancel_selected(self):
+        for job in self.selected_jobs():
+            job.cancel()
+        self.refresh()
+
+    def clear_finished(self):
+        for job_id, (job, item, _) in list(self.items.items()):
+            if job.finished:
+                self.view.takeTopLevelItem(self.view.indexOfTopLevelItem(item))
+                del self.items[job_id]
+                self.rates.pop(job_id, None)
+        self.queue.clear_finished()
+
+    def on_job_changed(self, job):
+        self.update_row(job)
+        if job.finished:
+            self.finished.emit(job)
+
+    def refresh(self):
+        for job, _, _ in self.items.values():
+            self.update_row(job)
+        if not self.queue.active():
+            self.timer.stop()
+
+    def update_row(self, job):
+        entry = self.items.get(job.id)
+        if entry is None:
+            return
+        _, item, bar = entry
+        total = job.total_bytes or 0
+        done = min(job.done_bytes, total) if total else job.done_bytes
+        if total:
+            bar.setValue(int(done * 1000 / total))
+            bar.setFormat(f"{human_size(done)} / {human_size(total)}")
+        elif job.total_items:
+            bar.setValue(int(job.done_items * 1000 / job.total_items))
+            bar.setFormat(f"{job.done_items} / {job.total_items}")
+        if job.state == DONE:
+            bar.setValue(1000)
+
+        rate = self._rate(job)
+        if job.state == RUNNING and rate:
+            item.setText(2, f"{human_size(rate)}/s")
+            item.setText(3, format_eta((total - done) / rate) if total else "—")
+        else:
+            item.setText(2, "")
+            item.setText(3, "")
+        status = STATE_NAMES[job.state]
+        if job.errors:
+            status += f" (ошибок: {len(job.errors)})"
+            item.setToolTip(4, "\n".join(f"{p}: {e}" for p, e in job.errors[:20]))
+        item.setText(4, status)
+
+    def _rate(self, job):
+        """Bytes per second, smoothed with an exponential moving average."""
+        now = time.monotonic()
+        last = self.rates.get(job.id)
+        if last is None or job.state != RUNNING:
+            self.rates[job.id] = (now, job.done_bytes, last[2] if last else 0.0)
+            return last[2] if last else 0.0
+        t0, b0, rate = last
+        dt = now - t0
+        if dt < 0.2:
+            return rate
+        current = max(0, job.done_bytes - b0) / dt
+        rate = current if not rate else rate * 0.7 + current * 0.3
+        self.rates[job.id] = (now, job.done_bytes, rate)
+        return rate
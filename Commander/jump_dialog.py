@@ -0,0 +1,63 @@
+import os
+
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QLineEdit, QListWidget, QListWidgetItem
+from PyQt5.QtCore import Qt, pyqtSignal
+
+from frecency import FrecencyIndex
+
+SHOWN = 12
+
+
+class JumpDialog(QDialog):
+    """Type fragments of a path, Enter re-roots the active panel at the best match."""
+
+    jump = pyqtSignal(str)
+
+    def __init__(self, index: FrecencyIndex, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Перейти")
+        self.setAttribute(Qt.WA_DeleteOnClose)
+        self.resize(640, 320)
+        self.index = index
+
+        layout = QVBoxLayout()
+        self.setLayout(layout)
+        self.edit = QLineEdit()
+        self.edit.setPlaceholderText("Части пути, например: proj src")
+        self.edit.textChanged.connect(self.refresh)
+        self.edit.returnPressed.connect(self.accept_current)
+        self.edit.installEventFilter(self)
+        self.results = QListWidget()
+        self.results.itemActivated.connect(lambda _item: self.accept_current())
+        layout.addWidget(self.edit)
+        layout.addWidget(self.results)
+
+    def refresh(self, text):
+        self.results.clear()
+        for path, is_dir in self.index.query(text, SHOWN):
+            item = QListWidgetItem(path if is_dir else f"{path}   (файл)")
+            item.setData(Qt.UserRole, path)
+            self.results.addItem(item)
+        if self.results.count():
+            self.results.setCurrentRow(0)
+
+    def eventFilter(self, obj, event):
+        # Up/Down in the edit move through the results
+        if obj is self.edit and event.type() == event.KeyPress and event.key() in (Qt.Key_Up, Qt.Key_Down):
+            row = self.results.currentRow() + (1 if event.key() == Qt.Key_Down else -1)
+            if 0 <= row < self.results.count():
+                self.results.setCurrentRow(row)
+            return True
+        return super().eventFilter(obj, event)
+
+    def accept_current(self):
+        """Jump to the selected match, skipping (and forgetting) paths that no longer exist."""
+        start = max(self.results.currentRow(), 0)
+        for row in range(start, self.results.count()):
+            path = self.results.item(row).data(Qt.UserRole)
+            if os.path.exists(path):
+                self.jump.emit(path)
+                self.accept()
+                return
+            self.index.forget(path)
+        self.refresh(self.edit.text())
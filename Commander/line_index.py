@@ -0,0 +1,142 @@
+import bisect
+import mmap
+import os
+from array import array
+
+from content_search import byte_pattern
+from preview import detect_encoding, SNIFF_BYTES
+
+INDEX_BLOCK = 64 * 1024          # newlines are counted per block of this many bytes
+SCAN_CHUNK = 16 * 1024 * 1024    # bytes taken per step while indexing or searching
+MAX_LINE_BYTES = 16 * 1024       # longer lines are cut for display
+
+
+class LineIndex:
+    """
+    Line access to a file of any size through a read-only memory map.
+
+    Instead of one offset per line the index keeps, for every INDEX_BLOCK
+    bytes, how many newlines come before that block (about 1.3 MB for
+    10 GB), so building it is a C-speed bytes.count() pass and a line is
+    found by bisecting the blocks and stepping over at most one block.
+    build() may run in a worker while lines are already being read: the
+    indexed prefix simply grows. Encodings must be ASCII-compatible
+    (UTF-8, cp1251, ...); binary files are shown as latin-1.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self.size = os.fstat(self._file.fileno()).st_size
+        self.mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else None
+        head = self.mm[:SNIFF_BYTES] if self.mm is not None else b""
+        encoding = detect_encoding(head)
+        if encoding is None or encoding.startswith(("utf-16", "utf-32")):
+            encoding = "latin-1"
+        self.encoding = encoding
+        self.newlines_before = array("q", [0])  # per block; one more entry than indexed blocks
+        self.indexed = 0                        # bytes covered by the index
+        self.done = self.size == 0
+
+    def close(self):
+        if self.mm is not None:
+            self.mm.close()
+        self._file.close()
+
+    # ---- index ----
+    def build(self, cancel=None):
+        """Count newlines block by block until the end of the file (or until cancel is set)."""
+        count = self.newlines_before[-1]
+        pos = self.indexed
+        while pos < self.size:
+            if cancel is not None and cancel.is_set():
+                return
+            end = min(pos + SCAN_CHUNK, self.size)
+            chunk = self.mm[pos:end]
+            counts = array("q")
+            for start in range(0, len(chunk), INDEX_BLOCK):
+                count += chunk.count(b"\n", start, start + INDEX_BLOCK)
+                counts.append(count)
+            self.newlines_before.extend(counts)
+            self.indexed = pos = end
+        self.done = True
+
+    @property
+    def progress(self) -> float:
+        return 1.0 if self.done else self.indexed / self.size
+
+    def line_count(self) -> int:
+        """Lines known so far; final once done is set."""
+        count = self.newlines_before[-1]
+        if self.done and self.size and self.mm[self.size - 1] != 0x0A:
+            count += 1  # last line without a trailing newline
+        return count
+
+    def line_offset(self, n: int):
+        """Byte offset where line n (0-based) starts, or None if it is past the indexed part."""
+        if n <= 0:
+            return 0
+        blocks = self.newlines_before
+        block = bisect.bisect_left(blocks, n) - 1  # the n-th newline is in this block
+        if block + 1 >= len(blocks):
+            return None
+        pos = block * INDEX_BLOCK - 1
+        for _ in range(n - blocks[block]):
+            pos = self.mm.find(b"\n", pos + 1)
+        return pos + 1
+
+    def line_of(self, offset: int) -> int:
+        """0-based number of the line containing a byte offset."""
+        block = min(offset // INDEX_BLOCK, len(self.newlines_before) - 1)
+        count = self.newlines_before[block]
+        pos = block * INDEX_BLOCK
+        while pos < offset:
+            end = min(offset, pos + SCAN_CHUNK)
+            count += self.mm[pos:end].count(b"\n")
+            pos = end
+        return count
+
+    def lines(self, first: int, count: int):
+        """Up to count decoded lines starting at line first."""
+        pos = self.line_offset(first)
+        if pos is None or self.mm is None:
+            return []
+        out = []
+        while len(out) < count and pos < self.size:
+            end = self.mm.find(b"\n", pos, pos + MAX_LINE_BYTES)
+            if end < 0:
+                if pos + MAX_LINE_BYTES >= self.size:
+                    end = next_pos = self.size
+                else:
+                    # a very long line: show its start, continue after its real end
+                    end = pos + MAX_LINE_BYTES
+                    nl = self.mm.find(b"\n", end)
+                    next_pos = self.size if nl < 0 else nl + 1
+            else:
+                next_pos = end + 1
+            out.append(self.mm[pos:end].decode(self.encoding, errors="replace").rstrip("\r"))
+            pos = next_pos
+        return out
+
+    # ---- search ----
+    def search(self, text: str, start: int = 0, ignore_case=True, cancel=None):
+        """
+        Byte offset of the next occurrence of text at or after start,
+        wrapping around to the beginning; None if not found or cancelled.
+        The mapping is searched in SCAN_CHUNK windows, never copied.
+        """
+        if not text or self.mm is None:
+            return None
+        pattern = byte_pattern(text, self.encoding, ignore_case)
+        overlap = len(text.encode(self.encoding, errors="replace")) * 2
+        for lo, hi in ((start, self.size), (0, min(start + overlap, self.size))):
+            pos = lo
+            while pos < hi:
+                if cancel is not None and cancel.is_set():
+                    return None
+                end = min(pos + SCAN_CHUNK + overlap, hi)
+                match = pattern.search(self.mm, pos, end)
+                if match is not None:
+                    return match.start()
+                pos += SCAN_CHUNK
+        return None
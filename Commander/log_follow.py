@@ -0,0 +1,121 @@
+import codecs
+import os
+
+from preview import detect_encoding, SNIFF_BYTES
+
+FOLLOW_SUFFIXES = (".log",)
+INITIAL_TAIL = 64 * 1024         # bytes shown when following starts
+MAX_READ = 4 * 1024 * 1024       # per poll; a writer further ahead is skipped to its recent output
+SCROLLBACK_LINES = 20000         # lines kept by the preview while following
+FOLLOW_POLL_MS = 250             # stat interval while following
+KEEP_OPEN = os.name != 'nt'      # see LogFollower
+
+
+def is_log(path: str) -> bool:
+    return path.lower().endswith(FOLLOW_SUFFIXES)
+
+
+class LogFollower:
+    """
+    tail -f for one file: poll() returns only the complete lines appended
+    since the last call.
+
+    The read offset and the file identity (device, inode) are remembered;
+    a shrinking file is read again from the start (truncation) and a new
+    inode behind the same name is switched to after draining the old
+    handle (rotation). Growth is detected by stat polling, which costs one
+    stat per poll and needs no platform-specific watcher.
+
+    On Windows an open handle stops the writer from renaming or deleting
+    the log, so there the file is opened only for the duration of a read;
+    what the old file got after the last poll is then lost on rotation.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+        self._open(tail=True)
+
+    def _open(self, tail):
+        f = open(self.path, "rb")
+        st = os.fstat(f.fileno())
+        encoding = detect_encoding(f.read(SNIFF_BYTES)) or "latin-1"
+        if self._file is not None:
+            self._file.close()
+        if KEEP_OPEN:
+            self._file = f
+        else:
+            f.close()
+            self._file = None
+        self._id = (st.st_dev, st.st_ino)
+        self.encoding = encoding
+        self._reset(max(0, st.st_size - INITIAL_TAIL) if tail else 0)
+
+    def _reset(self, offset):
+        self.offset = offset
+        self._decoder = codecs.getincrementaldecoder(self.encoding)(errors="replace")
+        self._pending = ""
+        self._skip_partial = offset > 0  # started mid-line: drop text up to the first newline
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _drain(self):
+        """What the followed file got since the last read, even if its name now points elsewhere."""
+        if self._file is None:
+            return ""
+        return self._read(os.fstat(self._file.fileno()).st_size)
+
+    def poll(self):
+        """(text, event): new complete lines (may be ""), event is None, "truncated" or "rotated"."""
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            # between rename and re-create during rotation: drain what the old file got
+            return self._drain(), None
+        if (st.st_dev, st.st_ino) != self._id:
+            tail = self._drain()
+            try:
+                self._open(tail=False)
+                size = os.stat(self.path).st_size
+            except OSError:
+                return tail, None
+            return tail + self._read(size), "rotated"
+        if st.st_size < self.offset:
+            self._reset(0)
+            return self._read(st.st_size), "truncated"
+        return self._read(st.st_size), None
+
+    def _read(self, size):
+        if size <= self.offset:
+            return ""
+        if self._file is not None:
+            return self._read_from(self._file, size)
+        try:
+            with open(self.path, "rb") as f:
+                st = os.fstat(f.fileno())
+                if (st.st_dev, st.st_ino) != self._id:
+                    return ""  # replaced since the stat; the next poll switches over
+                return self._read_from(f, size)
+        except OSError:
+            return ""
+
+    def _read_from(self, f, size):
+        if size - self.offset > MAX_READ:
+            self._reset(size - MAX_READ)
+        f.seek(self.offset)
+        data = f.read(size - self.offset)
+        self.offset += len(data)
+        text = self._pending + self._decoder.decode(data)
+        if self._skip_partial:
+            newline = text.find("\n")
+            if newline < 0:
+                self._pending = ""
+                return ""
+            text = text[newline + 1:]
+            self._skip_partial = False
+        cut = text.rfind("\n") + 1
+        self._pending = text[cut:]
+        return text[:cut].replace("\r\n", "\n")
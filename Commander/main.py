@@ -1,20 +1,46 @@
+import time
+_PROCESS_START = time.perf_counter()  # for --profile-startup; taken before the heavy imports
+
 import sys
 import os
-import shutil
+import multiprocessing
 import psutil
-import time
+import re
+import threading
 from datetime import datetime
 
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QTreeView, QFileSystemModel, QSplitter,
     QMenu, QAction, QMessageBox, QStatusBar, QComboBox, QVBoxLayout,
     QWidget, QFileDialog, QInputDialog, QCheckBox, QLabel, QHBoxLayout,
-    QTextEdit, QPushButton, QSizePolicy, QLineEdit
+    QPlainTextEdit, QPushButton, QSizePolicy, QLineEdit, QDialog, QDialogButtonBox, QDockWidget,
+    QStackedWidget
+)
+from PyQt5.QtCore import (
+    Qt, QEvent, QPoint, QProcess, QObject, QTimer, QModelIndex, QPersistentModelIndex, pyqtSignal
 )
-from PyQt5.QtCore import Qt, QPoint, QProcess
 from PyQt5.QtGui import QIcon, QPixmap, QFont
 from PyQt5.QtWidgets import QSplashScreen
 
+from size_cache import DirSizeCache, SizeCancelled, compute_dir_size
+from file_filter import FileFilterProxyModel
+from copy_engine import CopyJob
+from archive_fs import ExtractJob, is_archive, split_archive_path
+from archive_model import ArchiveModel, ArchiveSignals, ArchiveIndexThread
+from delete_engine import DeleteJob
+from jobs import STATE_NAMES
+from jobs_panel import JobsPanel
+from frecency import FrecencyIndex
+from hash_cache import HashTreeJob
+from log_follow import LogFollower, is_log, SCROLLBACK_LINES, FOLLOW_POLL_MS
+from utils import human_size
+from preview import PreviewCache, PreviewLoader
+from table_data import is_table
+from table_preview import TablePreview
+from search_panel import SearchPanel
+from terminal_view import TerminalView
+# Tool dialogs (content search, compare, disk usage) are imported when first opened.
+
 # ---------------------------
 # Utility: resource path
 # ---------------------------
@@ -47,26 +73,185 @@ def get_disks():
             disks = ['/']
     return disks or (['/'] if os.name != 'nt' else ['C:/'])
 
-def human_size(num):
-    for unit in ['B','KB','MB','GB','TB']:
-        if abs(num) < 1024.0:
-            return f"{num:3.1f} {unit}"
-        num /= 1024.0
-    return f"{num:.1f} PB"
+# ---------------------------
+# Directory size (background)
+# ---------------------------
+class SizeSignals(QObject):
+    progress = pyqtSignal(object, object, str)  # bytes, files, current dir
+    done = pyqtSignal(object, object)
+    cancelled = pyqtSignal()
+
+
+class DirSizeThread(threading.Thread):
+    def __init__(self, path: str, cache: DirSizeCache, signals: SizeSignals):
+        super().__init__(daemon=True)
+        self.path = path
+        self.cache = cache
+        self.signals = signals
+        self._cancel = threading.Event()
+
+    def stop(self):
+        self._cancel.set()
+
+    def run(self):
+        try:
+            total, files = compute_dir_size(self.path, self.cache, cancel=self._cancel,
+                                            progress=self.signals.progress.emit)
+        except SizeCancelled:
+            self.cache.save()
+            self.signals.cancelled.emit()
+            return
+        self.cache.save()
+        self.signals.done.emit(total, files)
+
+
+class PropertiesDialog(QDialog):
+    """Non-blocking folder properties; the size is filled in by DirSizeThread."""
+
+    def __init__(self, path: str, cache: DirSizeCache, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Свойства")
+        self.setAttribute(Qt.WA_DeleteOnClose)
+        self.path = path
+        self.setMinimumWidth(460)
+
+        layout = QVBoxLayout()
+        self.setLayout(layout)
+        created = time.ctime(os.path.getctime(path))
+        modified = time.ctime(os.path.getmtime(path))
+        self.info = QLabel(f"Путь: {path}\nТип: Папка\nСоздан: {created}\nИзменён: {modified}")
+        self.info.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        self.size_label = QLabel("Размер: подсчёт...")
+        self.current_label = QLabel("")
+        self.current_label.setWordWrap(True)
+        buttons = QDialogButtonBox(QDialogButtonBox.Close)
+        self.stop_btn = buttons.addButton("Остановить", QDialogButtonBox.ActionRole)
+        self.stop_btn.clicked.connect(self.stop)
+        buttons.rejected.connect(self.close)
+        layout.addWidget(self.info)
+        layout.addWidget(self.size_label)
+        layout.addWidget(self.current_label)
+        layout.addWidget(buttons)
+
+        cached = cache.cached_total(path)
+        if cached:
+            self.size_label.setText(f"Размер: {human_size(cached[0])} ({cached[1]} файлов, из кэша, проверяется...)")
+
+        self.signals = SizeSignals()
+        self.signals.progress.connect(self.on_progress)
+        self.signals.done.connect(self.on_done)
+        self.signals.cancelled.connect(self.on_cancelled)
+        self.worker = DirSizeThread(path, cache, self.signals)
+        self.worker.start()
+
+    def stop(self):
+        self.worker.stop()
+
+    def on_progress(self, size, files, current):
+        self.size_label.setText(f"Размер: {human_size(size)} ({files} файлов)...")
+        self.current_label.setText(current)
+
+    def on_done(self, size, files):
+        self.size_label.setText(f"Размер: {human_size(size)} ({files} файлов)")
+        self.current_label.setText("")
+        self.stop_btn.setEnabled(False)
+
+    def on_cancelled(self):
+        self.size_label.setText(self.size_label.text().rstrip(".") + " — остановлено")
+        self.current_label.setText("")
+        self.stop_btn.setEnabled(False)
+
+    def closeEvent(self, event):
+        self.worker.stop()
+        super().closeEvent(event)
+
+
+# ---------------------------
+# Preview (background)
+# ---------------------------
+class PreviewSignals(QObject):
+    loaded = pyqtSignal(int, object)  # generation, result dict
+
+
+# ---------------------------
+# Startup profiling (--profile-startup)
+# ---------------------------
+class StartupProfiler:
+    """Collects named phase timings and prints them once the window is interactive."""
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.last = _PROCESS_START
+        self.phases = []
+
+    def mark(self, name):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.phases.append((name, now - self.last))
+        self.last = now
+
+    def report(self):
+        if not self.enabled:
+            return
+        total = self.last - _PROCESS_START
+        print("Startup profile:")
+        for name, seconds in self.phases:
+            print(f"  {name:<34} {seconds * 1000:8.1f} ms")
+        print(f"  {'total':<34} {total * 1000:8.1f} ms")
+
+
+class AfterFirstPaint(QObject):
+    """
+    Runs callback once the window has painted its first frame: the first
+    Paint event of any widget in it posts the callback with a zero timer,
+    so it runs after that paint pass. A zero timer started before the
+    event loop can fire ahead of the expose and paint events.
+    """
+
+    def __init__(self, window, callback):
+        super().__init__(window)
+        self.window = window
+        self.callback = callback
+        QApplication.instance().installEventFilter(self)
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint and isinstance(obj, QWidget) and obj.window() is self.window:
+            QApplication.instance().removeEventFilter(self)
+            QTimer.singleShot(0, self.callback)
+        return False
+
 
 # ---------------------------
 # Main Window
 # ---------------------------
 class FileManager(QMainWindow):
-    def __init__(self):
+    def __init__(self, profiler=None):
         super().__init__()
+        self.profiler = profiler or StartupProfiler()
         self.setWindowTitle("PyCommander")
         self.setGeometry(80, 80, 1300, 800)
         self.dark_mode = True
-        self.filter_ext = ""  # e.g. ".txt" or "" for no filter
+        self.filter_pattern = ""  # ".txt", "*.py; *.md", "re:^test_" or "" for no filter
+        self._size_cache = None
+        self.delete_to_trash = False
+        self.archive_signals = ArchiveSignals()
+        self.archive_signals.done.connect(self.on_archive_index)
+        self.panel_stacks = {}  # tree -> QStackedWidget(tree[, thumbnail grid])
+        self.grids = {}         # tree -> ThumbnailView, created on first use
+        self.thumbs = None      # shared ThumbnailService
+        self._frecency = None
 
         self.init_ui()
         self.apply_theme()
+        self.profiler.mark("theme")
+
+    def deferred_init(self):
+        """Work that does not need to block the first frame: right panel model and the shell."""
+        self.attach_panel_model('right')
+        self.profiler.mark("right panel model")
+        self.start_shell()
+        self.profiler.mark("shell started")
 
     def init_ui(self):
         # Status bar
@@ -76,9 +261,12 @@ class FileManager(QMainWindow):
         # Top-level splitter for panels and right-side tools
         main_splitter = QSplitter(Qt.Horizontal)
 
-        # Left and right panel widgets
+        # Left and right panel widgets; the right panel gets its model after the first paint
+        self.disks = get_disks()
         left_widget = self.create_panel(side='left')
+        self.attach_panel_model('left')
         right_widget = self.create_panel(side='right')
+        self.profiler.mark("panels")
 
         # Right side: preview + terminal
         right_side = QWidget()
@@ -88,26 +276,53 @@ class FileManager(QMainWindow):
         # Preview panel
         preview_label = QLabel("Preview")
         preview_label.setFont(QFont("Arial", 10, QFont.Bold))
-        self.preview_area = QTextEdit()
+        self.follow_cb = QCheckBox("Следить за .log (tail -f)")
+        self.follow_cb.setChecked(True)
+        self.follow_cb.stateChanged.connect(self.toggle_follow)
+        preview_header = QHBoxLayout()
+        preview_header.addWidget(preview_label)
+        preview_header.addStretch()
+        preview_header.addWidget(self.follow_cb)
+        self.preview_area = QPlainTextEdit()
         self.preview_area.setReadOnly(True)
-        self.preview_area.setFixedHeight(240)
+        self.preview_area.setFont(QFont("Consolas" if os.name == 'nt' else "Monospace", 9))
+        # CSV/JSON files get a lazily loaded table instead of raw text
+        self.table_preview = TablePreview()
+        self.preview_stack = QStackedWidget()
+        self.preview_stack.addWidget(self.preview_area)
+        self.preview_stack.addWidget(self.table_preview)
+        self.preview_stack.setFixedHeight(240)
+        self.preview_path = None
+        self._pressed_current = None  # index made current by a mouse press, its clicked() follows
+        self.preview_cache = PreviewCache()
+        self.preview_signals = PreviewSignals()
+        self.preview_signals.loaded.connect(self.on_preview_loaded)
+        self.preview_loader = PreviewLoader(self.preview_cache, self.preview_signals.loaded.emit)
+        self.follower = None
+        self.follow_timer = QTimer(self)
+        self.follow_timer.setInterval(FOLLOW_POLL_MS)
+        self.follow_timer.timeout.connect(self.poll_follow)
 
         # Terminal panel (simple)
         term_label = QLabel("Terminal")
         term_label.setFont(QFont("Arial", 10, QFont.Bold))
-        self.terminal = QTextEdit()
-        self.terminal.setReadOnly(True)
+        self.spill_cb = QCheckBox("Полный вывод в файл")
+        self.spill_cb.stateChanged.connect(self.toggle_terminal_spill)
+        term_header = QHBoxLayout()
+        term_header.addWidget(term_label)
+        term_header.addStretch()
+        term_header.addWidget(self.spill_cb)
+        self.terminal = TerminalView()
         self.terminal.setStyleSheet("background-color: black; color: lightgreen;")
         self.terminal.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
         self.proc = QProcess(self)
         self.proc.readyReadStandardOutput.connect(self.on_proc_stdout)
         self.proc.readyReadStandardError.connect(self.on_proc_stderr)
-        # Start shell
-        self.start_shell()
+        # The shell itself is started from deferred_init()
 
-        right_side_layout.addWidget(preview_label)
-        right_side_layout.addWidget(self.preview_area)
-        right_side_layout.addWidget(term_label)
+        right_side_layout.addLayout(preview_header)
+        right_side_layout.addWidget(self.preview_stack)
+        right_side_layout.addLayout(term_header)
         right_side_layout.addWidget(self.terminal)
 
         main_splitter.addWidget(left_widget)
@@ -123,8 +338,14 @@ class FileManager(QMainWindow):
         bottom_bar.setLayout(bottom_layout)
 
         self.filter_input = QLineEdit()
-        self.filter_input.setPlaceholderText("Фильтр по расширению, например .txt  (Enter применяет)")
+        self.filter_input.setPlaceholderText("Фильтр: .txt, *.py; *.md или re:^test_  (применяется при вводе)")
         self.filter_input.returnPressed.connect(self.apply_filter)
+        # Debounce typing so a folder with 200k files is re-filtered once per pause, not per key
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(250)
+        self.filter_timer.timeout.connect(self.apply_filter)
+        self.filter_input.textChanged.connect(self.filter_timer.start)
 
         apply_btn = QPushButton("Применить фильтр")
         apply_btn.clicked.connect(self.apply_filter)
@@ -149,59 +370,279 @@ class FileManager(QMainWindow):
         central_layout.addWidget(bottom_bar)
         self.setCentralWidget(central)
 
+        # Background jobs (copy / move) in a bottom dock, shown on first use
+        self.jobs_panel = JobsPanel(self)
+        self.jobs_panel.finished.connect(self.on_job_finished)
+        self.jobs_dock = QDockWidget("Задачи", self)
+        self.jobs_dock.setWidget(self.jobs_panel)
+        self.addDockWidget(Qt.BottomDockWidgetArea, self.jobs_dock)
+        self.jobs_dock.hide()
+
+        # File-name search over the persistent index
+        self.search_panel = SearchPanel(get_disks, self)
+        self.search_panel.open_path.connect(self.reveal_path)
+        self.search_dock = QDockWidget("Поиск файлов", self)
+        self.search_dock.setWidget(self.search_panel)
+        self.addDockWidget(Qt.BottomDockWidgetArea, self.search_dock)
+        self.search_dock.hide()
+
+        self.init_menu()
+        self.profiler.mark("docks and menu")
+
+    def init_menu(self):
+        view_menu = self.menuBar().addMenu("Вид")
+        thumbs_action = QAction("Эскизы / список (активная панель)", self)
+        thumbs_action.setShortcut("Ctrl+T")
+        thumbs_action.triggered.connect(self.toggle_thumbnails)
+        view_menu.addAction(thumbs_action)
+        jump_action = QAction("Перейти к папке...", self)
+        jump_action.setShortcut("Ctrl+J")
+        jump_action.triggered.connect(self.open_jump)
+        view_menu.addAction(jump_action)
+        fast_action = QAction("Быстрый список для больших папок (активная панель)", self)
+        fast_action.triggered.connect(self.toggle_fast_listing)
+        view_menu.addAction(fast_action)
+        refresh_action = QAction("Обновить", self)
+        refresh_action.setShortcut("Ctrl+R")
+        refresh_action.triggered.connect(self.refresh_panel)
+        view_menu.addAction(refresh_action)
+        tools = self.menuBar().addMenu("Инструменты")
+        search_action = QAction("Поиск файлов по имени", self)
+        search_action.setShortcut("Ctrl+F")
+        search_action.triggered.connect(lambda: self.toggle_dock(self.search_dock))
+        tools.addAction(search_action)
+        grep_action = QAction("Поиск текста в файлах", self)
+        grep_action.setShortcut("Ctrl+Shift+F")
+        grep_action.triggered.connect(self.open_content_search)
+        tools.addAction(grep_action)
+        compare_action = QAction("Сравнить панели", self)
+        compare_action.triggered.connect(self.open_compare)
+        tools.addAction(compare_action)
+        usage_action = QAction("Занятое место", self)
+        usage_action.triggered.connect(lambda: self.open_disk_usage(self.active_root()))
+        tools.addAction(usage_action)
+        dup_action = QAction("Поиск дубликатов", self)
+        dup_action.triggered.connect(lambda: self.open_duplicates(self.active_root()))
+        tools.addAction(dup_action)
+        rename_action = QAction("Групповое переименование", self)
+        rename_action.setShortcut("Ctrl+M")
+        rename_action.triggered.connect(self.open_batch_rename)
+        tools.addAction(rename_action)
+        pack_action = QAction("Создать архив", self)
+        pack_action.setShortcut("Alt+F5")
+        pack_action.triggered.connect(lambda: self.pack_items())
+        tools.addAction(pack_action)
+        viewer_action = QAction("Просмотр файла", self)
+        viewer_action.setShortcut("F3")
+        viewer_action.triggered.connect(lambda: self.open_viewer())
+        tools.addAction(viewer_action)
+        jobs_action = QAction("Задачи", self)
+        jobs_action.triggered.connect(lambda: self.toggle_dock(self.jobs_dock))
+        tools.addAction(jobs_action)
+
         # Set application icon if exists
         ico_path = resource_path(os.path.join("icons", "app.ico"))
         if os.path.exists(ico_path):
             self.setWindowIcon(QIcon(ico_path))
 
+    def toggle_dock(self, dock):
+        dock.setVisible(not dock.isVisible())
+        if dock.isVisible():
+            dock.raise_()
+
     def create_panel(self, side='left'):
-        """Create panel widget with combo (disks) + tree view."""
+        """Create panel widget with combo (disks) + tree view. The model is set by attach_panel_model()."""
         panel_widget = QWidget()
         layout = QVBoxLayout()
         panel_widget.setLayout(layout)
 
         combo = QComboBox()
-        combo.addItems(get_disks())
+        combo.addItems(self.disks)
         combo.setEditable(False)
 
-        model = QFileSystemModel()
-        model.setRootPath('')
+        proxy = FileFilterProxyModel(self)
 
         tree = QTreeView()
-        tree.setModel(model)
+        if side == 'left':
+            self.active_tree = tree
         tree.setAnimated(False)
         tree.setIndentation(20)
         tree.setSortingEnabled(True)
+        tree.setSelectionMode(QTreeView.ExtendedSelection)
         tree.setContextMenuPolicy(Qt.CustomContextMenu)
         tree.customContextMenuRequested.connect(lambda pos, t=tree: self.show_menu(pos, t))
         tree.clicked.connect(lambda idx, t=tree: self.on_item_clicked(idx, t))
+        tree.doubleClicked.connect(lambda idx, t=tree: self.on_item_activated(idx, t))
         # Enable drag/drop
         tree.setDragEnabled(True)
         tree.setAcceptDrops(True)
         tree.setDropIndicatorShown(True)
         tree.setDefaultDropAction(Qt.CopyAction)
 
-        # set initial root
-        initial = combo.currentText()
-        tree.setRootIndex(model.index(initial))
-
         # wiring based on side
         if side == 'left':
             self.combo_left = combo
-            self.model_left = model
+            self.model_left = None
+            self.proxy_left = proxy
             self.tree_left = tree
         else:
             self.combo_right = combo
-            self.model_right = model
+            self.model_right = None
+            self.proxy_right = proxy
             self.tree_right = tree
 
-        combo.currentTextChanged.connect(lambda path, m=model, t=tree: t.setRootIndex(m.index(path)))
+        combo.currentTextChanged.connect(lambda path, t=tree: self.set_panel_root(t, path))
 
-        # pack
+        # pack; the stack gets a thumbnail grid when that view is first switched on
+        stack = QStackedWidget()
+        stack.addWidget(tree)
+        self.panel_stacks[tree] = stack
         layout.addWidget(combo)
-        layout.addWidget(tree)
+        layout.addWidget(stack)
         return panel_widget
 
+    def attach_panel_model(self, side):
+        """Create the QFileSystemModel of a panel (it starts watcher threads, so it is not free)."""
+        if side == 'left':
+            combo, proxy, tree = self.combo_left, self.proxy_left, self.tree_left
+        else:
+            combo, proxy, tree = self.combo_right, self.proxy_right, self.tree_right
+        if proxy.sourceModel() is not None:
+            return
+        model = QFileSystemModel()
+        model.setRootPath('')
+        proxy.setSourceModel(model)
+        tree.setModel(proxy)
+        tree.selectionModel().currentChanged.connect(lambda idx, _prev, t=tree: self.on_current_changed(idx, t))
+        tree.setRootIndex(proxy.pathIndex(combo.currentText()))
+        if side == 'left':
+            self.model_left = model
+        else:
+            self.model_right = model
+
+    def set_root_index(self, tree, index):
+        tree.setRootIndex(index)
+        grid = self.grids.get(tree)
+        if grid is not None:
+            grid.setRootIndex(index)
+        if not self.in_archive(tree):
+            path = tree.model().filePath(index)
+            if path:
+                self.frecency.record(path)
+
+    def panel_view(self, tree):
+        """The widget currently showing a panel: its tree or its thumbnail grid."""
+        return self.panel_stacks[tree].currentWidget()
+
+    # -----------------------
+    # Thumbnail grid
+    # -----------------------
+    def toggle_thumbnails(self):
+        from thumbnails import ThumbnailService, ThumbnailView
+        tree = self.active_tree
+        stack = self.panel_stacks[tree]
+        grid = self.grids.get(tree)
+        if grid is None:
+            if self.thumbs is None:
+                self.thumbs = ThumbnailService(self)
+            grid = ThumbnailView(self.thumbs)
+            grid.setModel(tree.model())
+            grid.setRootIndex(tree.rootIndex())
+            grid.setContextMenuPolicy(Qt.CustomContextMenu)
+            grid.customContextMenuRequested.connect(lambda pos, t=tree, g=grid: self.show_menu(pos, t, g))
+            grid.clicked.connect(lambda idx, t=tree: self.on_item_clicked(idx, t))
+            grid.doubleClicked.connect(lambda idx, t=tree: self.on_grid_activated(idx, t))
+            stack.addWidget(grid)
+            self.grids[tree] = grid
+        stack.setCurrentWidget(tree if stack.currentWidget() is grid else grid)
+        stack.currentWidget().setFocus()
+
+    def on_grid_activated(self, index, tree):
+        if tree.model().isDir(index):
+            self.set_root_index(tree, index)
+        else:
+            self.on_item_activated(index, tree)
+
+    def panel_fs_model(self, tree):
+        return self.model_left if tree is self.tree_left else self.model_right
+
+    def toggle_fast_listing(self):
+        """Switch the active panel between QFileSystemModel and ScanDirModel (batched scandir listing)."""
+        from dir_model import ScanDirModel
+        tree = self.active_tree
+        if self.in_archive(tree):
+            self.close_archive(tree)
+        side = 'left' if tree is self.tree_left else 'right'
+        self.attach_panel_model(side)
+        path = self.active_root()
+        old = self.panel_fs_model(tree)
+        if isinstance(old, ScanDirModel):
+            old.shutdown()
+            model = QFileSystemModel()
+            model.setRootPath('')
+            self.status.showMessage("Обычный список")
+        else:
+            model = ScanDirModel([d for d in self.disks if os.path.isdir(d)] or [os.path.abspath(os.sep)], self)
+            model.listing_error.connect(lambda p, e: self.status.showMessage(f"{p}: {e}"))
+            self.status.showMessage("Быстрый список: изменения на диске показываются по Ctrl+R")
+        header = tree.header()
+        model.sort(header.sortIndicatorSection(), header.sortIndicatorOrder())
+        proxy = tree.model()
+        proxy.setSourceModel(model)
+        if side == 'left':
+            self.model_left = model
+        else:
+            self.model_right = model
+        old.deleteLater()
+        self.set_root_index(tree, proxy.pathIndex(path))
+
+    def refresh_panel(self):
+        """Re-list the active panel's folder; only ScanDirModel needs it, QFileSystemModel watches the disk."""
+        tree = self.active_tree
+        proxy = tree.model()
+        source = proxy.sourceModel()
+        if hasattr(source, "refresh"):
+            source.refresh(proxy.mapToSource(tree.rootIndex()))
+
+    def set_panel_root(self, tree, path):
+        if self.in_archive(tree):
+            self.close_archive(tree)
+        self.set_root_index(tree, tree.model().pathIndex(path))
+
+    # -----------------------
+    # Archives as virtual folders
+    # -----------------------
+    def in_archive(self, tree):
+        return isinstance(tree.model().sourceModel(), ArchiveModel)
+
+    def on_item_activated(self, index, tree):
+        model = tree.model()
+        path = model.filePath(index)
+        if model.isDir(index) or self.in_archive(tree):
+            return
+        self.frecency.record(path, is_dir=False)
+        if is_archive(path):
+            self.status.showMessage(f"Чтение архива: {path}")
+            ArchiveIndexThread(path, tree, self.archive_signals).start()
+
+    def on_archive_index(self, tree, index, error):
+        if index is None:
+            QMessageBox.warning(self, "Архив", f"Не удалось открыть архив:\n{error}")
+            return
+        tree.model().setSourceModel(ArchiveModel(index, self))
+        self.set_root_index(tree, QModelIndex())
+        self.status.showMessage(f"Архив: {index.archive} ({len(index.entries) - 1} записей)")
+
+    def close_archive(self, tree):
+        proxy = tree.model()
+        archive_model = proxy.sourceModel()
+        proxy.setSourceModel(self.panel_fs_model(tree))
+        archive_model.deleteLater()
+        index = proxy.pathIndex(archive_model.archive)
+        self.set_root_index(tree, index.parent())
+        tree.setCurrentIndex(index)
+        tree.scrollTo(index)
+
     # -----------------------
     # Theme
     # -----------------------
@@ -213,7 +654,7 @@ class FileManager(QMainWindow):
                 QComboBox { background-color: #3c3c3c; color: white; }
                 QPushButton { background-color: #4CAF50; color: white; padding: 6px; border-radius: 4px; }
                 QLineEdit { background-color: #1e1e1e; color: white; }
-                QTextEdit { background-color: #121212; color: #dcdcdc; }
+                QPlainTextEdit { background-color: #121212; color: #dcdcdc; }
                 QLabel { color: white; }
             """)
         else:
@@ -226,15 +667,28 @@ class FileManager(QMainWindow):
     # -----------------------
     # Context menu and file ops
     # -----------------------
-    def show_menu(self, pos: QPoint, tree: QTreeView):
-        index = tree.indexAt(pos)
+    def show_menu(self, pos: QPoint, tree: QTreeView, view=None):
+        view = view or tree
+        index = view.indexAt(pos)
         menu = QMenu()
+        if self.in_archive(tree):
+            # archives are read-only: extract or leave
+            if index.isValid():
+                member = tree.model().filePath(index)
+                extract_action = QAction("Извлечь...", self)
+                extract_action.triggered.connect(lambda: self.copy_item(member))
+                menu.addAction(extract_action)
+            close_action = QAction("Закрыть архив", self)
+            close_action.triggered.connect(lambda: self.close_archive(tree))
+            menu.addAction(close_action)
+            menu.exec_(view.viewport().mapToGlobal(pos))
+            return
         # If empty area -> allow create folder
         if not index.isValid():
             create_action = QAction("Создать папку", self)
             create_action.triggered.connect(lambda t=tree: self.create_folder(t))
             menu.addAction(create_action)
-            menu.exec_(tree.viewport().mapToGlobal(pos))
+            menu.exec_(view.viewport().mapToGlobal(pos))
             return
 
         file_path = tree.model().filePath(index)
@@ -245,22 +699,51 @@ class FileManager(QMainWindow):
         rename_icon_path = resource_path(os.path.join("icons", "rename.png"))
 
         copy_action = QAction(QIcon(copy_icon_path) if os.path.exists(copy_icon_path) else None, "Копировать", self)
+        move_action = QAction("Переместить", self)
         delete_action = QAction(QIcon(delete_icon_path) if os.path.exists(delete_icon_path) else None, "Удалить", self)
         rename_action = QAction(QIcon(rename_icon_path) if os.path.exists(rename_icon_path) else None, "Переименовать", self)
         properties_action = QAction("Свойства", self)
 
         copy_action.triggered.connect(lambda: self.copy_item(file_path))
+        move_action.triggered.connect(lambda: self.copy_item(file_path, move=True))
         delete_action.triggered.connect(lambda: self.delete_item(file_path))
         rename_action.triggered.connect(lambda: self.rename_item(file_path))
         properties_action.triggered.connect(lambda: self.show_properties(file_path))
 
         menu.addAction(copy_action)
+        menu.addAction(move_action)
         menu.addAction(delete_action)
         menu.addAction(rename_action)
+        batch_action = QAction("Групповое переименование", self)
+        batch_action.triggered.connect(self.open_batch_rename)
+        menu.addAction(batch_action)
+        selected = [tree.model().filePath(i) for i in view.selectionModel().selectedRows(0)]
+        pack_paths = selected if file_path in selected else [file_path]
+        pack_action = QAction("Создать архив...", self)
+        pack_action.triggered.connect(lambda: self.pack_items(pack_paths))
+        menu.addAction(pack_action)
         menu.addSeparator()
+        if not os.path.isdir(file_path):
+            view_action = QAction("Просмотр", self)
+            view_action.triggered.connect(lambda: self.open_viewer(file_path))
+            menu.addAction(view_action)
+        if is_archive(file_path):
+            open_action = QAction("Открыть архив", self)
+            open_action.triggered.connect(lambda: self.on_item_activated(index, tree))
+            menu.addAction(open_action)
+        if os.path.isdir(file_path):
+            usage_action = QAction("Занятое место", self)
+            usage_action.triggered.connect(lambda: self.open_disk_usage(file_path))
+            menu.addAction(usage_action)
+            dup_action = QAction("Поиск дубликатов", self)
+            dup_action.triggered.connect(lambda: self.open_duplicates(file_path))
+            menu.addAction(dup_action)
+            hash_action = QAction("Посчитать хэши заранее", self)
+            hash_action.triggered.connect(lambda: self.submit_job(HashTreeJob(file_path)))
+            menu.addAction(hash_action)
         menu.addAction(properties_action)
 
-        menu.exec_(tree.viewport().mapToGlobal(pos))
+        menu.exec_(view.viewport().mapToGlobal(pos))
 
     def create_folder(self, tree):
         root_index = tree.rootIndex()
@@ -277,36 +760,161 @@ class FileManager(QMainWindow):
             except Exception as e:
                 QMessageBox.critical(self, "Ошибка", str(e))
 
-    def copy_item(self, source):
-        target = QFileDialog.getExistingDirectory(self, "Выберите папку назначения")
+    def copy_item(self, source, move=False):
+        in_archive = split_archive_path(source)[0] is not None
+        if move and in_archive:
+            QMessageBox.information(self, "Архив", "Архив открыт только для чтения.")
+            return
+        title = "Куда переместить" if move else "Выберите папку назначения"
+        target = QFileDialog.getExistingDirectory(self, title, self.other_panel_root(source))
         if not target:
             return
+        if in_archive:
+            self.submit_job(ExtractJob([source], target, self.jobs_panel.conflict_policy))
+            return
+        self.submit_job(CopyJob([source], target, move=move, policy=self.jobs_panel.conflict_policy))
+
+    def other_panel_root(self, path):
+        """Root of the panel that does not show path - the usual copy target."""
+        self.attach_panel_model('right')
+        left = self.proxy_left.filePath(self.tree_left.rootIndex())
+        right = self.proxy_right.filePath(self.tree_right.rootIndex())
+        return right if path.startswith(left) and not path.startswith(right) else left
+
+    def active_root(self):
+        tree = self.active_tree
+        return tree.model().filePath(tree.rootIndex())
+
+    def open_content_search(self):
+        from content_search_dialog import ContentSearchDialog
+        dialog = ContentSearchDialog(self.active_root(), self)
+        dialog.open_path.connect(self.reveal_path)
+        dialog.show()
+
+    def open_compare(self):
+        from compare_dialog import CompareDialog
+        self.attach_panel_model('right')
+        left = self.proxy_left.filePath(self.tree_left.rootIndex())
+        right = self.proxy_right.filePath(self.tree_right.rootIndex())
+        if not left or not right or os.path.normcase(left) == os.path.normcase(right):
+            QMessageBox.information(self, "Сравнение", "Откройте в панелях две разные папки.")
+            return
+        dialog = CompareDialog(left, right, self.proxy_left, self.proxy_right,
+                               self.tree_left, self.tree_right, self.submit_job, self)
+        dialog.show()
+
+    def open_disk_usage(self, root):
+        from disk_usage_dialog import DiskUsageDialog
+        dialog = DiskUsageDialog(root, self)
+        dialog.open_path.connect(self.reveal_path)
+        dialog.show()
+
+    def open_viewer(self, path=None):
+        """Open a file (by default the active panel's current one) in the large-file viewer."""
+        from file_viewer import FileViewer
+        tree = self.active_tree
+        if path is None:
+            path = tree.model().filePath(self.panel_view(tree).currentIndex())
+        if not path or os.path.isdir(path):
+            return
+        if split_archive_path(path)[0] is not None:
+            QMessageBox.information(self, "Просмотр", "Файлы внутри архива сначала нужно извлечь.")
+            return
         try:
-            if os.path.isdir(source):
-                dest = os.path.join(target, os.path.basename(source))
-                shutil.copytree(source, dest)
-            else:
-                shutil.copy2(source, target)
-            QMessageBox.information(self, "Успех", "Копирование завершено")
-        except PermissionError:
-            QMessageBox.critical(self, "Ошибка", "Нет прав доступа. Запусти от имени администратора.")
-        except Exception as e:
+            FileViewer(path, self).show()
+        except OSError as e:
             QMessageBox.critical(self, "Ошибка", str(e))
 
+    def open_duplicates(self, root):
+        from duplicates_dialog import DuplicatesDialog
+        dialog = DuplicatesDialog(root, self.submit_job, self.delete_to_trash, self)
+        dialog.open_path.connect(self.reveal_path)
+        dialog.show()
+
+    def reveal_path(self, path):
+        """Show path in the active panel: root at its folder and select it."""
+        tree = self.active_tree
+        if self.in_archive(tree):
+            self.close_archive(tree)
+        proxy = tree.model()
+        folder = path if os.path.isdir(path) else os.path.dirname(path)
+        self.set_root_index(tree, proxy.pathIndex(folder))
+        if folder != path:
+            index = proxy.pathIndex(path)
+            tree.setCurrentIndex(index)
+            tree.scrollTo(index)
+        tree.setFocus()
+
+    def submit_job(self, job):
+        self.jobs_dock.show()
+        self.jobs_panel.submit(job)
+        self.status.showMessage(job.title)
+
+    def on_job_finished(self, job):
+        msg = f"{job.title}: {STATE_NAMES[job.state].lower()}"
+        if job.errors:
+            msg += f", ошибок: {len(job.errors)} (подробности в подсказке в списке задач)"
+        self.status.showMessage(msg)
+
     def delete_item(self, path):
-        reply = QMessageBox.question(self, "Подтвердите удаление", f"Удалить {path} ?", QMessageBox.Yes | QMessageBox.No)
-        if reply != QMessageBox.Yes:
+        box = QMessageBox(QMessageBox.Question, "Подтвердите удаление", f"Удалить {path} ?",
+                          QMessageBox.Yes | QMessageBox.No, self)
+        trash_cb = QCheckBox("Переместить в корзину")
+        trash_cb.setChecked(self.delete_to_trash)
+        box.setCheckBox(trash_cb)
+        if box.exec_() != QMessageBox.Yes:
             return
-        try:
-            if os.path.isdir(path):
-                shutil.rmtree(path)
-            else:
-                os.remove(path)
-            QMessageBox.information(self, "Удалено", "Удаление выполнено")
-        except PermissionError:
-            QMessageBox.critical(self, "Ошибка", "Нет прав доступа. Запусти от имени администратора.")
-        except Exception as e:
-            QMessageBox.critical(self, "Ошибка", str(e))
+        self.delete_to_trash = trash_cb.isChecked()
+        self.submit_job(DeleteJob([path], trash=self.delete_to_trash))
+
+    def open_batch_rename(self):
+        """Rename the selected items, or everything in the panel's folder if at most one is selected."""
+        from rename_dialog import BatchRenameDialog
+        tree = self.active_tree
+        if self.in_archive(tree):
+            QMessageBox.information(self, "Архив", "Архив открыт только для чтения.")
+            return
+        model = tree.model()
+        rows = self.panel_view(tree).selectionModel().selectedRows(0)
+        if len(rows) > 1:
+            items = [(model.filePath(i), model.isDir(i)) for i in rows]
+        else:
+            root = self.active_root()
+            try:
+                with os.scandir(root) as it:
+                    items = [(e.path, e.is_dir(follow_symlinks=False)) for e in it]
+            except OSError as e:
+                QMessageBox.critical(self, "Ошибка", str(e))
+                return
+        items.sort(key=lambda item: os.path.basename(item[0]).lower())
+        if items:
+            BatchRenameDialog(items, self.submit_job, self).show()
+
+    def pack_items(self, paths=None):
+        """Pack paths (by default the active panel's selection) into a new archive."""
+        from archive_pack import PackJob, PACK_FORMATS, ZIP, format_for
+        if paths is None:
+            tree = self.active_tree
+            if self.in_archive(tree):
+                QMessageBox.information(self, "Архив", "Архив открыт только для чтения.")
+                return
+            model = tree.model()
+            paths = [model.filePath(i) for i in self.panel_view(tree).selectionModel().selectedRows(0)]
+        if not paths:
+            QMessageBox.information(self, "Создать архив", "Выделите файлы или папки.")
+            return
+        first = paths[0].rstrip("/\\")
+        name = os.path.basename(first if len(paths) == 1 else os.path.dirname(first)) or "archive"
+        filters = [title for _, title in PACK_FORMATS]
+        default = os.path.join(self.other_panel_root(first), name + ".zip")
+        target, chosen = QFileDialog.getSaveFileName(self, "Создать архив", default, ";;".join(filters))
+        if not target:
+            return
+        fmt = format_for(target)
+        if fmt is None:
+            fmt = PACK_FORMATS[filters.index(chosen)][0] if chosen in filters else ZIP
+            target += "." + fmt
+        self.submit_job(PackJob(paths, target, fmt))
 
     def rename_item(self, path):
         base = os.path.dirname(path)
@@ -323,23 +931,38 @@ class FileManager(QMainWindow):
         except Exception as e:
             QMessageBox.critical(self, "Ошибка", str(e))
 
+    @property
+    def size_cache(self):
+        if self._size_cache is None:
+            self._size_cache = DirSizeCache()
+        return self._size_cache
+
+    @property
+    def frecency(self):
+        if self._frecency is None:
+            self._frecency = FrecencyIndex()
+        return self._frecency
+
+    def open_jump(self):
+        from jump_dialog import JumpDialog
+        dialog = JumpDialog(self.frecency, self)
+        dialog.jump.connect(self.reveal_path)
+        dialog.show()
+
+    def closeEvent(self, event):
+        if self._frecency is not None:
+            self._frecency.save()
+        super().closeEvent(event)
+
     def show_properties(self, path):
         try:
-            is_dir = os.path.isdir(path)
-            size = 0
-            if is_dir:
-                for root, dirs, files in os.walk(path):
-                    for f in files:
-                        try:
-                            fp = os.path.join(root, f)
-                            size += os.path.getsize(fp)
-                        except Exception:
-                            pass
-            else:
-                size = os.path.getsize(path)
+            if os.path.isdir(path):
+                PropertiesDialog(path, self.size_cache, self).show()
+                return
+            size = os.path.getsize(path)
             created = time.ctime(os.path.getctime(path))
             modified = time.ctime(os.path.getmtime(path))
-            info = f"Путь: {path}\nТип: {'Папка' if is_dir else 'Файл'}\nРазмер: {human_size(size)}\nСоздан: {created}\nИзменён: {modified}"
+            info = f"Путь: {path}\nТип: Файл\nРазмер: {human_size(size)}\nСоздан: {created}\nИзменён: {modified}"
             QMessageBox.information(self, "Свойства", info)
         except Exception as e:
             QMessageBox.critical(self, "Ошибка", str(e))
@@ -347,46 +970,125 @@ class FileManager(QMainWindow):
     # -----------------------
     # Selection / preview / status
     # -----------------------
+    def on_current_changed(self, index, tree):
+        # a mouse press makes the item current; the same click then emits clicked() on release
+        self._pressed_current = QPersistentModelIndex(index) if QApplication.mouseButtons() != Qt.NoButton else None
+        self.show_item(index, tree)
+
     def on_item_clicked(self, index, tree):
-        model = tree.model()
-        path = model.filePath(index)
+        pressed, self._pressed_current = self._pressed_current, None
+        if pressed is not None and pressed == index:
+            return  # already shown by currentChanged for this click
+        self.show_item(index, tree)
+
+    def show_item(self, index, tree):
+        self.active_tree = tree
+        path = tree.model().filePath(index)
+        self.preview_path = path
+        self.status.showMessage(path)
+        self.stop_follow()
+        self.table_preview.clear()
+        self.preview_stack.setCurrentWidget(self.preview_area)
+        if self.follow_cb.isChecked() and is_log(path) and self.start_follow(path):
+            return
+        if is_table(path) and os.path.isfile(path) and self.table_preview.open(path):
+            self.preview_stack.setCurrentWidget(self.table_preview)
+            return
+        cached = self.preview_cache.peek_path(path)
+        if cached is not None:
+            self.show_preview(cached)
+        self.preview_loader.request(path)
+
+    def on_preview_loaded(self, generation, result):
+        if (generation != self.preview_loader.generation or self.follower is not None
+                or self.preview_stack.currentWidget() is self.table_preview):
+            return  # the user has already moved on
+        self.show_preview(result)
+
+    # -----------------------
+    # Follow mode (tail -f) for logs
+    # -----------------------
+    def start_follow(self, path):
+        """Show the end of a log and keep appending what gets written; False if it cannot be opened."""
+        if not os.path.isfile(path):
+            return False
         try:
-            if os.path.exists(path):
-                size = os.path.getsize(path) if os.path.isfile(path) else 0
-                mtime = datetime.fromtimestamp(os.path.getmtime(path)).strftime("%Y-%m-%d %H:%M:%S")
-                self.status.showMessage(f"{path}    Size: {human_size(size)}    Modified: {mtime}")
-            else:
-                self.status.showMessage(path)
-        except Exception:
-            self.status.showMessage(path)
-        if os.path.isfile(path):
-            try:
-                ext = os.path.splitext(path)[1].lower()
-                if ext in ['.txt', '.py', '.md', '.json', '.log', '.csv', '.ini']:
-                    with open(path, "r", encoding="utf-8", errors="replace") as f:
-                        data = f.read(10000)
-                    self.preview_area.setPlainText(data)
-                else:
-                    self.preview_area.setPlainText(f"Preview not available for {ext} files.")
-            except Exception:
-                self.preview_area.setPlainText("Невозможно показать превью.")
+            self.follower = LogFollower(path)
+        except OSError:
+            return False
+        self.preview_area.clear()
+        self.preview_area.setMaximumBlockCount(SCROLLBACK_LINES)
+        self.status.showMessage(f"Слежение: {path}")
+        self.poll_follow()
+        self.follow_timer.start()
+        return True
+
+    def stop_follow(self):
+        if self.follower is None:
+            return
+        self.follow_timer.stop()
+        self.follower.close()
+        self.follower = None
+        self.preview_area.setMaximumBlockCount(0)
+
+    def poll_follow(self):
+        try:
+            text, event = self.follower.poll()
+        except OSError as e:
+            self.status.showMessage(f"Слежение остановлено: {e}")
+            self.stop_follow()
+            return
+        bar = self.preview_area.verticalScrollBar()
+        at_bottom = bar.value() >= bar.maximum() - 1
+        if event is not None:
+            self.preview_area.appendPlainText("--- файл усечён ---" if event == "truncated"
+                                              else "--- файл заменён (ротация) ---")
+        if text:
+            self.preview_area.appendPlainText(text[:-1])
+        if at_bottom and (text or event):
+            bar.setValue(bar.maximum())
+
+    def toggle_follow(self, state):
+        path = self.preview_path
+        if not path or not is_log(path):
+            return
+        self.stop_follow()
+        if not state or not self.start_follow(path):
+            self.preview_loader.request(path)
+
+    def show_preview(self, result):
+        path = result["key"][0]
+        st = result["stat"]
+        if st is not None:
+            size = st.st_size if result["kind"] != "dir" else 0
+            mtime = datetime.fromtimestamp(st.st_mtime).strftime("%Y-%m-%d %H:%M:%S")
+            self.status.showMessage(f"{path}    Size: {human_size(size)}    Modified: {mtime}")
+        kind = result["kind"]
+        if kind in ("text", "hex"):
+            self.preview_area.setPlainText(result["text"])
+        elif kind == "error":
+            self.preview_area.setPlainText("Невозможно показать превью.")
         else:
             self.preview_area.setPlainText("")
 
     # -----------------------
-    # Filter (placeholder)
+    # Filter
     # -----------------------
     def apply_filter(self):
+        self.filter_timer.stop()
         txt = self.filter_input.text().strip()
-        if txt and not txt.startswith('.'):
-            txt = '.' + txt
-        self.filter_ext = txt.lower()
-        QMessageBox.information(self, "Фильтр", f"Фильтр по расширению: {self.filter_ext or 'нет'}.\n(Для реальной фильтрации замените модель на QSortFilterProxyModel.)")
+        try:
+            for proxy in (self.proxy_left, self.proxy_right):
+                proxy.set_filter_text(txt)
+        except re.error as e:
+            self.status.showMessage(f"Ошибка в регулярном выражении: {e}")
+            return
+        self.filter_pattern = txt
+        self.status.showMessage(f"Фильтр: {txt}" if txt else "Фильтр очищен")
 
     def clear_filter(self):
         self.filter_input.clear()
-        self.filter_ext = ""
-        QMessageBox.information(self, "Фильтр", "Фильтр очищен.")
+        self.apply_filter()
 
     # -----------------------
     # Terminal handling
@@ -399,25 +1101,33 @@ class FileManager(QMainWindow):
         try:
             self.proc.start(shell)
         except Exception as e:
-            self.terminal.append(f"Failed to start shell: {e}")
+            self.terminal.write_line(f"Failed to start shell: {e}")
 
     def on_proc_stdout(self):
-        data = bytes(self.proc.readAllStandardOutput()).decode('utf-8', errors='replace')
-        self.terminal.moveCursor(self.terminal.textCursor().End)
-        self.terminal.insertPlainText(data)
+        self.terminal.feed(bytes(self.proc.readAllStandardOutput()))
 
     def on_proc_stderr(self):
-        data = bytes(self.proc.readAllStandardError()).decode('utf-8', errors='replace')
-        self.terminal.moveCursor(self.terminal.textCursor().End)
-        self.terminal.insertPlainText(data)
+        self.terminal.feed(bytes(self.proc.readAllStandardError()))
+
+    def toggle_terminal_spill(self, state):
+        path = self.terminal.set_spill(bool(state))
+        if path:
+            self.status.showMessage(f"Вывод терминала пишется в {path}")
 
 # ---------------------------
 # Splash and run
 # ---------------------------
 def main():
+    profile = "--profile-startup" in sys.argv
+    if profile:
+        sys.argv.remove("--profile-startup")
+    profiler = StartupProfiler(profile)
+    profiler.mark("imports")
+
     app = QApplication(sys.argv)
+    profiler.mark("QApplication")
 
-    # Splash (if splash.png exists)
+    # Splash (if splash.png exists) - shown only while the window is being built
     splash_path = resource_path("splash.png")
     splash = None
     if os.path.exists(splash_path):
@@ -425,10 +1135,18 @@ def main():
         splash = QSplashScreen(pix)
         splash.show()
         app.processEvents()
-        time.sleep(0.8)  # short pause to show splash
+        profiler.mark("splash")
+
+    window = FileManager(profiler)
+
+    def after_first_frame():
+        profiler.mark("first frame")
+        window.deferred_init()
+        profiler.report()
 
-    window = FileManager()
+    AfterFirstPaint(window, after_first_frame)
     window.show()
+    profiler.mark("window shown")
 
     if splash:
         splash.finish(window)
@@ -436,4 +1154,5 @@ def main():
     sys.exit(app.exec_())
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # process pools in a PyInstaller build
     main()
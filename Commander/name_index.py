@@ -0,0 +1,235 @@
+import os
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from appdata import data_path
+
+INDEX_FILE = "name_index.sqlite"
+SCAN_WORKERS = min(32, (os.cpu_count() or 2) * 4)  # scandir is I/O bound
+COMMIT_EVERY = 20000
+
+# pseudo filesystems that only add noise (and sometimes hang) on Linux
+SKIP_DIRS = {"/proc", "/sys", "/dev", "/run", "/snap"} if sys.platform.startswith("linux") else set()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS dirs (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    dir_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    is_dir INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_dir ON entries(dir_id);
+CREATE INDEX IF NOT EXISTS entries_name ON entries(name COLLATE NOCASE);
+"""
+
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS names USING fts5(
+    name, content='entries', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS entries_ai AFTER INSERT ON entries BEGIN
+    INSERT INTO names(rowid, name) VALUES (new.id, new.name);
+END;
+CREATE TRIGGER IF NOT EXISTS entries_ad AFTER DELETE ON entries BEGIN
+    INSERT INTO names(names, rowid, name) VALUES ('delete', old.id, old.name);
+END;
+"""
+
+
+def _connect(filename):
+    conn = sqlite3.connect(filename, timeout=30, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def _list_dir(path):
+    """Worker side of the scan: one os.scandir pass, stat taken from the DirEntry."""
+    entries = []
+    try:
+        # mtime taken before listing, so a change during the listing is caught next time
+        mtime = os.stat(path, follow_symlinks=False).st_mtime_ns
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                    st = entry.stat(follow_symlinks=False)
+                    entries.append((entry.name, is_dir, 0 if is_dir else st.st_size, st.st_mtime_ns))
+                except OSError:
+                    pass
+    except OSError:
+        return path, None, None
+    return path, mtime, entries
+
+
+class NameIndex:
+    """
+    On-disk index of file names for instant "name contains" search.
+
+    Entries live in SQLite; an FTS5 trigram table over the names answers
+    substring queries without scanning (falls back to LIKE on SQLite
+    builds without the trigram tokenizer). Every directory keeps its
+    mtime, so refresh() only re-lists directories that changed.
+    """
+
+    def __init__(self, filename=None):
+        self.filename = filename or data_path(INDEX_FILE)
+        self.write_lock = threading.Lock()
+        conn = _connect(self.filename)
+        conn.executescript(SCHEMA)
+        try:
+            conn.executescript(FTS_SCHEMA)
+            self.has_fts = True
+        except sqlite3.OperationalError:
+            self.has_fts = False
+        conn.commit()
+        conn.close()
+        self._readers = threading.local()
+
+    def _reader(self):
+        conn = getattr(self._readers, "conn", None)
+        if conn is None:
+            conn = _connect(self.filename)
+            self._readers.conn = conn
+        return conn
+
+    def count(self):
+        return self._reader().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    # ---------------- search ----------------
+    def search(self, query: str, limit: int = 500):
+        """Return [(full_path, is_dir, size, mtime_ns)] whose names contain every word of query."""
+        words = [w for w in query.split() if w]
+        if not words:
+            return []
+        conn = self._reader()
+        long_words = [w for w in words if len(w) >= 3]
+        short_words = [w for w in words if len(w) < 3]
+        if self.has_fts and long_words:
+            match = " AND ".join('"' + w.replace('"', '""') + '"' for w in long_words)
+            sql = ("SELECT d.path, e.name, e.is_dir, e.size, e.mtime FROM names "
+                   "JOIN entries e ON e.id = names.rowid JOIN dirs d ON d.id = e.dir_id "
+                   "WHERE names MATCH ?")
+            params = [match]
+        else:
+            short_words = words
+            sql = ("SELECT d.path, e.name, e.is_dir, e.size, e.mtime FROM entries e "
+                   "JOIN dirs d ON d.id = e.dir_id WHERE 1")
+            params = []
+        for w in short_words:
+            sql += r" AND e.name LIKE ? ESCAPE '\'"
+            params.append("%" + w.replace("\\", "\\\\").replace("%", r"\%").replace("_", r"\_") + "%")
+        sql += " LIMIT ?"
+        params.append(limit)
+        rows = conn.execute(sql, params).fetchall()
+        return [(os.path.join(d, n), bool(is_dir), size, mtime) for d, n, is_dir, size, mtime in rows]
+
+    # ---------------- indexing ----------------
+    def refresh(self, roots, cancel=None, progress=None):
+        """
+        Scan (or rescan) roots. Directories are listed in parallel by a
+        thread pool; only this thread writes to the database.
+        progress(dirs_seen, dirs_listed, current_path) is called periodically.
+        """
+        with self.write_lock:
+            conn = _connect(self.filename)
+            try:
+                self._refresh(conn, roots, cancel, progress)
+            finally:
+                conn.commit()
+                conn.close()
+
+    def _refresh(self, conn, roots, cancel, progress):
+        known = {path: (dir_id, mtime) for dir_id, path, mtime in conn.execute("SELECT id, path, mtime_ns FROM dirs")}
+        seen = set()
+        listed = 0
+        pending_writes = 0
+        last_report = 0.0
+
+        def children_from_db(dir_id, parent):
+            return [os.path.join(parent, name) for (name,) in
+                    conn.execute("SELECT name FROM entries WHERE dir_id=? AND is_dir=1", (dir_id,))]
+
+        with ThreadPoolExecutor(max_workers=SCAN_WORKERS) as pool:
+            running = set()
+            stack = [os.path.abspath(r) for r in roots]
+            while stack or running:
+                if cancel is not None and cancel.is_set():
+                    for f in running:
+                        f.cancel()
+                    break
+                # unchanged directories are resolved here; changed ones go to the pool
+                while stack and len(running) < SCAN_WORKERS * 2:
+                    path = stack.pop()
+                    if path in seen or path in SKIP_DIRS:
+                        continue
+                    seen.add(path)
+                    try:
+                        mtime = os.stat(path, follow_symlinks=False).st_mtime_ns
+                    except OSError:
+                        continue
+                    old = known.get(path)
+                    if old is not None and old[1] == mtime:
+                        stack.extend(children_from_db(old[0], path))
+                    else:
+                        running.add(pool.submit(_list_dir, path))
+                if not running:
+                    continue
+                done, running = wait(running, timeout=0.2, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    path, mtime, entries = fut.result()
+                    listed += 1
+                    if entries is None:
+                        continue
+                    self._store_dir(conn, known, path, mtime, entries)
+                    pending_writes += len(entries) + 1
+                    stack.extend(os.path.join(path, name) for name, is_dir, _, _ in entries if is_dir)
+                if pending_writes >= COMMIT_EVERY:
+                    conn.commit()
+                    pending_writes = 0
+                now = time.monotonic()
+                if progress is not None and now - last_report > 0.2:
+                    last_report = now
+                    progress(len(seen), listed, stack[-1] if stack else "")
+
+        if cancel is None or not cancel.is_set():
+            self._drop_vanished(conn, roots, seen, known)
+        if progress is not None:
+            progress(len(seen), listed, "")
+
+    def _store_dir(self, conn, known, path, mtime, entries):
+        old = known.get(path)
+        if old is None:
+            dir_id = conn.execute("INSERT INTO dirs(path, mtime_ns) VALUES (?, ?)", (path, mtime)).lastrowid
+        else:
+            dir_id = old[0]
+            conn.execute("UPDATE dirs SET mtime_ns=? WHERE id=?", (mtime, dir_id))
+            conn.execute("DELETE FROM entries WHERE dir_id=?", (dir_id,))
+        known[path] = (dir_id, mtime)
+        conn.executemany(
+            "INSERT INTO entries(dir_id, name, is_dir, size, mtime) VALUES (?, ?, ?, ?, ?)",
+            [(dir_id, name, int(is_dir), size, m) for name, is_dir, size, m in entries])
+
+    def _drop_vanished(self, conn, roots, seen, known):
+        """Forget directories under roots that were not reached by this scan."""
+        prefixes = [os.path.abspath(r) for r in roots]
+        gone = []
+        for path, (dir_id, _) in known.items():
+            if path in seen:
+                continue
+            if any(path == p or path.startswith(p.rstrip(os.sep) + os.sep) for p in prefixes):
+                gone.append(dir_id)
+        for i in range(0, len(gone), 500):
+            chunk = gone[i:i + 500]
+            marks = ",".join("?" * len(chunk))
+            conn.execute(f"DELETE FROM entries WHERE dir_id IN ({marks})", chunk)
+            conn.execute(f"DELETE FROM dirs WHERE id IN ({marks})", chunk)
@@ -0,0 +1,187 @@
+import codecs
+import os
+import threading
+from collections import OrderedDict
+
+from archive_fs import get_index, split_archive_path
+
+MAX_TEXT_CHARS = 10000
+READ_BYTES = 64 * 1024       # enough for MAX_TEXT_CHARS even in 4-byte UTF-8 or UTF-16
+HEX_BYTES = 4096
+SNIFF_BYTES = 8192
+
+_BOMS = [
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+# bytes that never appear in text files (everything below 0x20 except \t \n \f \r and ESC)
+_CONTROL = bytes(b for b in range(32) if b not in (9, 10, 12, 13, 27))
+
+
+def detect_encoding(chunk: bytes):
+    """Guess the encoding of a file from its first bytes; None means "binary"."""
+    for bom, name in _BOMS:
+        if chunk.startswith(bom):
+            return name
+    head = chunk[:SNIFF_BYTES]
+    if b"\x00" in head:
+        return None
+    if head and len(head.translate(None, _CONTROL)) < len(head) * 0.9:
+        return None
+    try:
+        head.decode("utf-8")
+        return "utf-8"
+    except UnicodeDecodeError as e:
+        # a multi-byte character cut by the end of the chunk is still UTF-8
+        if e.start >= len(head) - 3 and e.reason == "unexpected end of data":
+            return "utf-8"
+    # most non-UTF-8 text we see is Windows Cyrillic
+    return "cp1251"
+
+
+def hex_dump(data: bytes, offset: int = 0) -> str:
+    lines = []
+    for i in range(0, len(data), 16):
+        row = data[i:i + 16]
+        hexes = " ".join(f"{b:02x}" for b in row)
+        text = "".join(chr(b) if 32 <= b < 127 else "." for b in row)
+        lines.append(f"{offset + i:08x}  {hexes[:23]:<23}  {hexes[24:]:<23}  |{text}|")
+    return "\n".join(lines)
+
+
+def load_preview(path: str):
+    """
+    Read the start of a file (or of an archive member) for the preview pane.
+
+    Returns a dict with keys: key (path, mtime_ns, size), kind ("text",
+    "hex", "dir" or "error"), text, encoding.
+    """
+    try:
+        st = os.stat(path)
+    except OSError as e:
+        archive, rel = split_archive_path(path)
+        if archive is None:
+            return {"key": (path, 0, 0), "kind": "error", "text": str(e), "encoding": None, "stat": None}
+        return _load_member(path, archive, rel)
+    key = (path, st.st_mtime_ns, st.st_size)
+    if os.path.isdir(path):
+        return {"key": key, "kind": "dir", "text": "", "encoding": None, "stat": st}
+    try:
+        with open(path, "rb") as f:
+            chunk = f.read(READ_BYTES)
+    except OSError as e:
+        return {"key": key, "kind": "error", "text": str(e), "encoding": None, "stat": st}
+    return _from_chunk(key, chunk, st)
+
+
+def _load_member(path, archive, rel):
+    """Preview of a file inside an archive; only the first READ_BYTES are decompressed."""
+    try:
+        index = get_index(archive)
+        st = index.stat(rel)
+        key = (path, st.st_mtime_ns, st.st_size)
+        if index.is_dir(rel):
+            return {"key": key, "kind": "dir", "text": "", "encoding": None, "stat": st}
+        chunk = index.read_head(rel, READ_BYTES)
+    except Exception as e:
+        return {"key": (path, 0, 0), "kind": "error", "text": str(e), "encoding": None, "stat": None}
+    return _from_chunk(key, chunk, st)
+
+
+def _from_chunk(key, chunk, st):
+    encoding = detect_encoding(chunk)
+    if encoding is None:
+        text = hex_dump(chunk[:HEX_BYTES])
+        if st.st_size > HEX_BYTES:
+            text += f"\n... ({st.st_size} байт, показаны первые {HEX_BYTES})"
+        return {"key": key, "kind": "hex", "text": text, "encoding": None, "stat": st}
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    text = decoder.decode(chunk, final=len(chunk) < READ_BYTES)[:MAX_TEXT_CHARS]
+    return {"key": key, "kind": "text", "text": text, "encoding": encoding, "stat": st}
+
+
+class PreviewCache:
+    """Small LRU of preview results keyed by (path, mtime_ns, size)."""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.items = OrderedDict()   # key -> result
+        self.by_path = {}            # path -> key, for the optimistic lookup
+
+    def get(self, key):
+        with self.lock:
+            result = self.items.get(key)
+            if result is not None:
+                self.items.move_to_end(key)
+            return result
+
+    def peek_path(self, path):
+        """Last result for path regardless of mtime - shown while the worker revalidates."""
+        with self.lock:
+            key = self.by_path.get(path)
+            return self.items.get(key) if key else None
+
+    def put(self, result):
+        key = result["key"]
+        with self.lock:
+            old = self.by_path.get(key[0])
+            if old is not None and old != key:
+                self.items.pop(old, None)
+            self.items[key] = result
+            self.items.move_to_end(key)
+            self.by_path[key[0]] = key
+            while len(self.items) > self.max_entries:
+                evicted, _ = self.items.popitem(last=False)
+                if self.by_path.get(evicted[0]) == evicted:
+                    del self.by_path[evicted[0]]
+
+
+class PreviewLoader:
+    """
+    Background preview reader that only cares about the newest request.
+
+    request() replaces any pending request; results of requests that were
+    superseded while being read are dropped instead of reported, so
+    arrowing through a folder never queues up work. Two threads are used so
+    one read stuck on a slow mount does not block the next file.
+    """
+
+    def __init__(self, cache: PreviewCache, on_result, threads: int = 2):
+        self.cache = cache
+        self.on_result = on_result
+        self.generation = 0
+        self._pending = None
+        self._cond = threading.Condition()
+        for i in range(threads):
+            threading.Thread(target=self._loop, name=f"preview-{i}", daemon=True).start()
+
+    def request(self, path: str) -> int:
+        with self._cond:
+            self.generation += 1
+            self._pending = (self.generation, path)
+            self._cond.notify()
+            return self.generation
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while self._pending is None:
+                    self._cond.wait()
+                generation, path = self._pending
+                self._pending = None
+            result = None
+            try:
+                st = os.stat(path)
+                result = self.cache.get((path, st.st_mtime_ns, st.st_size))
+            except OSError:
+                pass
+            if result is None:
+                result = load_preview(path)
+                if result["kind"] in ("text", "hex"):
+                    self.cache.put(result)
+            if generation == self.generation:
+                self.on_result(generation, result)
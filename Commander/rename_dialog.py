@@ -0,0 +1,175 @@
+import os
+import re
+
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QGridLayout, QLineEdit, QPushButton, QLabel, QCheckBox,
+    QComboBox, QSpinBox, QTableView, QHeaderView, QMessageBox
+)
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QTimer
+from PyQt5.QtGui import QColor
+
+from batch_rename import (
+    RenameRule, BatchRenameJob, RenameUndoJob, CASE_MODES, STATUS_NAMES, OK, UNCHANGED,
+    list_names, plan_renames, prepare_items, load_journal
+)
+
+PREVIEW_DELAY_MS = 150
+PROBLEM_COLOR = QColor("#f44336")
+
+
+class RenamePreviewModel(QAbstractTableModel):
+    """Old name / new name / status for every item; the view only asks for visible rows."""
+
+    HEADERS = ["Старое имя", "Новое имя", "Состояние"]
+
+    def __init__(self, items, parent=None):
+        super().__init__(parent)
+        self.items = items
+        self.plan = [(os.path.basename(p), UNCHANGED) for p, _ in items]
+
+    def set_plan(self, plan):
+        self.plan = plan
+        if self.items:
+            self.dataChanged.emit(self.index(0, 1), self.index(len(self.items) - 1, 2))
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.items)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 3
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        new, status = self.plan[index.row()]
+        if role == Qt.DisplayRole:
+            column = index.column()
+            if column == 0:
+                return os.path.basename(self.items[index.row()][0])
+            return new if column == 1 else STATUS_NAMES[status]
+        if role == Qt.ForegroundRole and status not in (OK, UNCHANGED):
+            return PROBLEM_COLOR
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+
+class BatchRenameDialog(QDialog):
+    """
+    Rename many files at once with a live preview.
+
+    The preview is recomputed PREVIEW_DELAY_MS after the last edit; the
+    renames themselves run as a BatchRenameJob (all or nothing).
+    """
+
+    def __init__(self, items, submit_job, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(f"Групповое переименование — {len(items)} объектов")
+        self.setAttribute(Qt.WA_DeleteOnClose)
+        self.resize(900, 620)
+        self.items = items
+        self.prepared = prepare_items(items)
+        self.submit_job = submit_job
+        self.existing = list_names({os.path.dirname(p) for p, _ in items})
+        self.plan = []
+
+        layout = QVBoxLayout()
+        self.setLayout(layout)
+        grid = QGridLayout()
+        self.pattern = QLineEdit("[N].[E]")
+        self.pattern.setToolTip("[N] имя, [E] расширение, [P] папка, [C] счётчик, [C:3] счётчик из 3 цифр")
+        self.find = QLineEdit()
+        self.replace = QLineEdit()
+        self.regex_cb = QCheckBox("Регулярное выражение")
+        self.case_combo = QComboBox()
+        for mode, title in CASE_MODES:
+            self.case_combo.addItem(title, mode)
+        self.start_spin = QSpinBox()
+        self.start_spin.setRange(0, 10**6)
+        self.start_spin.setValue(1)
+        self.step_spin = QSpinBox()
+        self.step_spin.setRange(1, 1000)
+        grid.addWidget(QLabel("Шаблон имени:"), 0, 0)
+        grid.addWidget(self.pattern, 0, 1, 1, 3)
+        grid.addWidget(QLabel("Найти:"), 1, 0)
+        grid.addWidget(self.find, 1, 1)
+        grid.addWidget(QLabel("Заменить на:"), 1, 2)
+        grid.addWidget(self.replace, 1, 3)
+        grid.addWidget(self.regex_cb, 2, 1)
+        grid.addWidget(self.case_combo, 2, 3)
+        grid.addWidget(QLabel("Счётчик с:"), 3, 0)
+        grid.addWidget(self.start_spin, 3, 1)
+        grid.addWidget(QLabel("шаг:"), 3, 2)
+        grid.addWidget(self.step_spin, 3, 3)
+        layout.addLayout(grid)
+
+        self.model = RenamePreviewModel(items, self)
+        self.view = QTableView()
+        self.view.setModel(self.model)
+        self.view.verticalHeader().hide()
+        self.view.setWordWrap(False)
+        self.view.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
+        self.view.horizontalHeader().setStretchLastSection(True)
+        self.view.setColumnWidth(0, 340)
+        self.view.setColumnWidth(1, 340)
+        layout.addWidget(self.view)
+
+        row = QHBoxLayout()
+        self.info = QLabel("")
+        self.undo_btn = QPushButton("Отменить прошлое переименование")
+        self.undo_btn.clicked.connect(self.undo_last)
+        self.undo_btn.setEnabled(load_journal()[0] in ("done", "running"))
+        self.apply_btn = QPushButton("Переименовать")
+        self.apply_btn.clicked.connect(self.apply)
+        row.addWidget(self.info, 1)
+        row.addWidget(self.undo_btn)
+        row.addWidget(self.apply_btn)
+        layout.addLayout(row)
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(PREVIEW_DELAY_MS)
+        self.timer.timeout.connect(self.update_preview)
+        for edit in (self.pattern, self.find, self.replace):
+            edit.textChanged.connect(self.timer.start)
+        self.regex_cb.stateChanged.connect(self.timer.start)
+        self.case_combo.currentIndexChanged.connect(self.timer.start)
+        self.start_spin.valueChanged.connect(self.timer.start)
+        self.step_spin.valueChanged.connect(self.timer.start)
+        self.update_preview()
+
+    def update_preview(self):
+        try:
+            rule = RenameRule(self.pattern.text(), self.find.text(), self.replace.text(),
+                              self.regex_cb.isChecked(), True, self.case_combo.currentData(),
+                              self.start_spin.value(), self.step_spin.value())
+            self.plan = plan_renames(self.prepared, rule, self.existing)
+        except re.error as e:
+            self.info.setText(f"Ошибка в выражении: {e}")
+            self.apply_btn.setEnabled(False)
+            return
+        self.model.set_plan(self.plan)
+        changed = sum(1 for _, status in self.plan if status == OK)
+        problems = sum(1 for _, status in self.plan if status not in (OK, UNCHANGED))
+        self.info.setText(f"Будет переименовано: {changed}" + (f", конфликтов: {problems}" if problems else ""))
+        self.apply_btn.setEnabled(changed > 0 and not problems)
+
+    def apply(self):
+        self.timer.stop()
+        self.update_preview()
+        if not self.apply_btn.isEnabled():
+            return
+        pairs = [(path, os.path.join(os.path.dirname(path), new))
+                 for (path, _), (new, status) in zip(self.items, self.plan) if status == OK]
+        self.submit_job(BatchRenameJob(pairs))
+        self.accept()
+
+    def undo_last(self):
+        if QMessageBox.question(self, "Переименование", "Вернуть прежние имена после прошлого переименования?",
+                                QMessageBox.Yes | QMessageBox.No) != QMessageBox.Yes:
+            return
+        self.submit_job(RenameUndoJob())
+        self.accept()
@@ -0,0 +1,198 @@
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from PyQt5.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLineEdit, QPushButton, QLabel,
+    QTreeWidget, QTreeWidgetItem, QHeaderView
+)
+from PyQt5.QtCore import Qt, QObject, QTimer, pyqtSignal
+
+from name_index import NameIndex
+from utils import human_size
+
+
+class IndexSignals(QObject):
+    progress = pyqtSignal(int, int, str)  # dirs seen, dirs listed, current
+    done = pyqtSignal(float)              # seconds
+
+
+class QuerySignals(QObject):
+    results = pyqtSignal(int, object, float)  # generation, rows, milliseconds
+
+
+class QueryWorker:
+    """
+    Runs index searches in a background thread and only cares about the
+    newest query: request() replaces any pending one, and results of
+    queries superseded meanwhile are dropped. A query of short words is a
+    LIKE scan over the whole index, too slow for the GUI thread.
+    on_result(generation, rows, ms) is called from the worker thread.
+    """
+
+    def __init__(self, index: NameIndex, on_result):
+        self.index = index
+        self.on_result = on_result
+        self.generation = 0
+        self._pending = None
+        self._cond = threading.Condition()
+        threading.Thread(target=self._loop, name="name-search", daemon=True).start()
+
+    def request(self, text: str) -> int:
+        with self._cond:
+            self.generation += 1
+            self._pending = (self.generation, text)
+            self._cond.notify()
+            return self.generation
+
+    def cancel(self):
+        """Forget the pending query and drop the result of a running one."""
+        with self._cond:
+            self.generation += 1
+            self._pending = None
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while self._pending is None:
+                    self._cond.wait()
+                generation, text = self._pending
+                self._pending = None
+            start = time.perf_counter()
+            try:
+                rows = self.index.search(text)
+            except sqlite3.Error:
+                rows = []
+            if generation == self.generation:
+                self.on_result(generation, rows, (time.perf_counter() - start) * 1000)
+
+
+class IndexThread(threading.Thread):
+    def __init__(self, index: NameIndex, roots, signals: IndexSignals):
+        super().__init__(daemon=True)
+        self.index = index
+        self.roots = roots
+        self.signals = signals
+        self._cancel = threading.Event()
+
+    def stop(self):
+        self._cancel.set()
+
+    def run(self):
+        start = time.monotonic()
+        try:
+            self.index.refresh(self.roots, cancel=self._cancel, progress=self.signals.progress.emit)
+        finally:
+            self.signals.done.emit(time.monotonic() - start)
+
+
+class SearchPanel(QWidget):
+    """Search-as-you-type over the persistent file-name index."""
+
+    open_path = pyqtSignal(str)  # double-clicked result
+
+    def __init__(self, roots_provider, parent=None):
+        super().__init__(parent)
+        self.roots_provider = roots_provider
+        self._index = None
+        self._queries = None
+        self.worker = None
+
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.setLayout(layout)
+
+        row = QHBoxLayout()
+        self.query = QLineEdit()
+        self.query.setPlaceholderText("Имя файла (несколько слов — все должны встретиться)")
+        self.query.textChanged.connect(lambda _: self.query_timer.start())
+        self.query.returnPressed.connect(self.run_query)
+        self.reindex_btn = QPushButton("Обновить индекс")
+        self.reindex_btn.clicked.connect(self.toggle_indexing)
+        row.addWidget(self.query)
+        row.addWidget(self.reindex_btn)
+        layout.addLayout(row)
+
+        self.results = QTreeWidget()
+        self.results.setRootIsDecorated(False)
+        self.results.setHeaderLabels(["Имя", "Папка", "Размер", "Изменён"])
+        self.results.header().setSectionResizeMode(1, QHeaderView.Stretch)
+        self.results.itemDoubleClicked.connect(lambda item, _col: self.open_path.emit(item.data(0, Qt.UserRole)))
+        layout.addWidget(self.results)
+
+        self.info = QLabel("")
+        layout.addWidget(self.info)
+
+        # short debounce: queries run in QueryWorker, only the newest result is shown
+        self.query_timer = QTimer(self)
+        self.query_timer.setSingleShot(True)
+        self.query_timer.setInterval(120)
+        self.query_timer.timeout.connect(self.run_query)
+
+        self.signals = IndexSignals()
+        self.signals.progress.connect(self.on_index_progress)
+        self.signals.done.connect(self.on_index_done)
+        self.query_signals = QuerySignals()
+        self.query_signals.results.connect(self.on_results)
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = NameIndex()
+        return self._index
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.query.setFocus()
+        if self.worker is None and self.index.count() == 0:
+            self.toggle_indexing()
+
+    def toggle_indexing(self):
+        if self.worker is not None:
+            self.worker.stop()
+            return
+        self.worker = IndexThread(self.index, self.roots_provider(), self.signals)
+        self.worker.start()
+        self.reindex_btn.setText("Остановить")
+
+    def on_index_progress(self, seen, listed, current):
+        self.info.setText(f"Индексация: папок {seen}, прочитано заново {listed}   {current}")
+
+    def on_index_done(self, seconds):
+        self.worker = None
+        self.reindex_btn.setText("Обновить индекс")
+        self.info.setText(f"Индекс: {self.index.count()} записей (обновлён за {seconds:.1f} с)")
+        if self.query.text().strip():
+            self.run_query()
+
+    def run_query(self):
+        self.query_timer.stop()
+        text = self.query.text().strip()
+        if self._queries is None:
+            self._queries = QueryWorker(self.index, self.query_signals.results.emit)
+        if not text:
+            self._queries.cancel()
+            self.results.clear()
+            return
+        self._queries.request(text)
+
+    def on_results(self, generation, rows, elapsed):
+        if generation != self._queries.generation:
+            return  # the query text changed meanwhile
+        self.results.clear()
+        items = []
+        for path, is_dir, size, mtime_ns in rows:
+            item = QTreeWidgetItem([
+                os.path.basename(path),
+                os.path.dirname(path),
+                "" if is_dir else human_size(size),
+                datetime.fromtimestamp(mtime_ns / 1e9).strftime("%Y-%m-%d %H:%M"),
+            ])
+            item.setData(0, Qt.UserRole, path)
+            items.append(item)
+        self.results.addTopLevelItems(items)
+        more = "+" if len(rows) >= 500 else ""
+        if self.worker is None:
+            self.info.setText(f"Найдено: {len(rows)}{more} за {elapsed:.1f} мс")
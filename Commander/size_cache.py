@@ -0,0 +1,150 @@
+import json
+import os
+import threading
+import time
+
+from appdata import data_path, atomic_write, norm_key
+
+CACHE_FILE = "dir_sizes.json"
+
+
+class SizeCancelled(Exception):
+    pass
+
+
+class DirSizeCache:
+    """
+    Persistent directory-size index.
+
+    Each directory is stored separately as
+        path -> [mtime_ns, own_bytes, own_files, [subdir names], total_bytes, total_files]
+    so a rescan only lists directories whose mtime changed; unchanged
+    subtrees are answered from their records.
+    """
+
+    def __init__(self, filename=None):
+        self.filename = filename or data_path(CACHE_FILE)
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.dirty = False
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.filename, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                self.entries = data
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def save(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            payload = json.dumps(self.entries, ensure_ascii=False, separators=(",", ":"))
+            self.dirty = False
+        try:
+            atomic_write(self.filename, payload.encode("utf-8"))
+        except OSError:
+            pass
+
+    def get(self, path):
+        with self.lock:
+            return self.entries.get(norm_key(path))
+
+    def put(self, path, record):
+        with self.lock:
+            self.entries[norm_key(path)] = record
+            self.dirty = True
+
+    def cached_total(self, path):
+        """Return (bytes, files) if the record for path still matches its mtime, else None."""
+        rec = self.get(path)
+        if not rec:
+            return None
+        try:
+            if os.stat(path).st_mtime_ns != rec[0]:
+                return None
+        except OSError:
+            return None
+        return rec[4], rec[5]
+
+
+def compute_dir_size(path, cache, cancel=None, progress=None, interval=0.1):
+    """
+    Return (total_bytes, total_files) for path.
+
+    Walks with os.scandir, reusing the DirEntry stat; directories whose
+    mtime matches the cache are not listed again. `cancel` is a
+    threading.Event, `progress(bytes, files, current_dir)` is called at most
+    every `interval` seconds.
+    """
+    state = {"bytes": 0, "files": 0, "last": 0.0}
+
+    def report(current):
+        if progress is None:
+            return
+        now = time.monotonic()
+        if now - state["last"] >= interval:
+            state["last"] = now
+            progress(state["bytes"], state["files"], current)
+
+    def walk(dir_path, mtime_ns):
+        if cancel is not None and cancel.is_set():
+            raise SizeCancelled()
+        rec = cache.get(dir_path)
+        if rec and rec[0] == mtime_ns:
+            own_bytes, own_files, subdirs = rec[1], rec[2], rec[3]
+            state["bytes"] += own_bytes
+            state["files"] += own_files
+            total_bytes, total_files = own_bytes, own_files
+            for name in subdirs:
+                sub = os.path.join(dir_path, name)
+                try:
+                    st = os.stat(sub, follow_symlinks=False)
+                except OSError:
+                    continue
+                b, n = walk(sub, st.st_mtime_ns)
+                total_bytes += b
+                total_files += n
+        else:
+            own_bytes = own_files = 0
+            children = []
+            try:
+                with os.scandir(dir_path) as it:
+                    for entry in it:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                children.append((entry.name, entry.stat(follow_symlinks=False).st_mtime_ns))
+                            else:
+                                own_bytes += entry.stat(follow_symlinks=False).st_size
+                                own_files += 1
+                        except OSError:
+                            pass
+            except OSError:
+                return 0, 0
+            state["bytes"] += own_bytes
+            state["files"] += own_files
+            total_bytes, total_files = own_bytes, own_files
+            for name, child_mtime in children:
+                b, n = walk(os.path.join(dir_path, name), child_mtime)
+                total_bytes += b
+                total_files += n
+            subdirs = [name for name, _ in children]
+            cache.put(dir_path, [mtime_ns, own_bytes, own_files, subdirs, total_bytes, total_files])
+            report(dir_path)
+            return total_bytes, total_files
+        if rec[4] != total_bytes or rec[5] != total_files:
+            cache.put(dir_path, [mtime_ns, own_bytes, own_files, subdirs, total_bytes, total_files])
+        report(dir_path)
+        return total_bytes, total_files
+
+    try:
+        root_mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return 0, 0
+    result = walk(path, root_mtime)
+    if progress is not None:
+        progress(state["bytes"], state["files"], path)
+    return result
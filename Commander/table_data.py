@@ -0,0 +1,420 @@
+import csv
+import io
+import json
+import os
+import re
+import threading
+from array import array
+from collections import OrderedDict
+
+from preview import detect_encoding
+
+TABLE_SUFFIXES = (".csv", ".tsv", ".json", ".jsonl", ".ndjson")
+SAMPLE_BYTES = 64 * 1024
+DIALECT_BYTES = 8 * 1024     # csv.Sniffer is slow on large samples and runs on the GUI thread
+ROWS_PER_BLOCK = 64          # the index keeps one offset per this many records
+CACHED_BLOCKS = 256
+PUBLISH_EVERY = 16384        # records between progress updates while indexing
+JSON_MAX_BYTES = 64 * 1024 * 1024   # a .json file is parsed in memory as a whole
+SORT_LIMIT = 5_000_000       # rows; sorting and filtering keep one key per row in memory
+
+_JSON_SPACE = re.compile(r"[ \t\n\r]*")
+
+
+def is_table(path: str) -> bool:
+    return path.lower().endswith(TABLE_SUFFIXES)
+
+
+def flatten(obj, prefix="", out=None):
+    """{"a": {"b": 1}, "c": [1, 2]} -> {"a.b": 1, "c": "[1, 2]"}."""
+    if out is None:
+        out = {}
+    for key, value in obj.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flatten(value, name + ".", out)
+        elif isinstance(value, list):
+            out[name] = json.dumps(value, ensure_ascii=False)
+        else:
+            out[name] = value
+    return out
+
+
+def _cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def _sort_key(value: str):
+    """Numbers sort by value and before text; text case-insensitively."""
+    try:
+        return 0, float(value), ""
+    except ValueError:
+        return 1, 0.0, value.casefold()
+
+
+def _looks_like_header(rows):
+    """
+    csv.Sniffer.has_header()'s vote over rows that are already parsed (it
+    would sniff the sample a second time): a column votes for a header when
+    its first cell differs in type or length from the consistent cells below.
+    """
+    header, body = rows[0], rows[1:21]
+    votes = 0
+    for col, title in enumerate(header):
+        kinds = set()
+        for row in body:
+            if len(row) != len(header):
+                continue
+            try:
+                float(row[col])
+                kinds.add("number")
+            except ValueError:
+                kinds.add(len(row[col]))
+        if len(kinds) != 1:
+            continue
+        kind = kinds.pop()
+        if kind == "number":
+            try:
+                float(title)
+                votes -= 1
+            except ValueError:
+                votes += 1
+        else:
+            votes += 1 if len(title) != kind else -1
+    return votes > 0
+
+
+def open_table(path: str):
+    """The TableSource for a file, chosen by extension. Raises ValueError/OSError if it cannot be shown."""
+    lower = path.lower()
+    if lower.endswith((".jsonl", ".ndjson")):
+        return JsonLinesSource(path)
+    if lower.endswith(".json"):
+        return JsonSource(path)
+    return CsvSource(path)
+
+
+class TableSource:
+    """
+    Rows of a table file. build() runs in a worker and makes rows
+    available progressively; row_count() is what can be read so far and
+    row(i) returns a list of cell strings. columns may grow while a
+    JSON file is being read.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.columns = []
+        self.done = False
+        self.error = ""  # set when build() fails
+        self.size = os.path.getsize(path)
+        self.progress = 0.0
+
+    def build(self, cancel=None):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def row_count(self) -> int:
+        raise NotImplementedError
+
+    def row(self, i):
+        raise NotImplementedError
+
+    def iter_rows(self, cancel=None):
+        for i in range(self.row_count()):
+            if cancel is not None and i % 4096 == 0 and cancel.is_set():
+                return
+            yield self.row(i)
+
+    def query(self, needle="", column=-1, descending=False, cancel=None):
+        """
+        Row numbers matching needle (in any cell, case-insensitively),
+        sorted by column; None when neither filter nor sort is asked for.
+        One full pass over the rows - call it after build() has finished.
+        """
+        if not needle and column < 0:
+            return None
+        if self.row_count() > SORT_LIMIT:
+            raise ValueError(f"больше {SORT_LIMIT} строк: сортировка и фильтр недоступны")
+        needle = needle.casefold()
+        rows, keys = array("l"), []
+        for i, row in enumerate(self.iter_rows(cancel)):
+            if needle and needle not in "\x1f".join(row).casefold():
+                continue
+            rows.append(i)
+            if column >= 0:
+                keys.append(_sort_key(row[column] if column < len(row) else ""))
+        if cancel is not None and cancel.is_set():
+            return None
+        if column >= 0:
+            order = sorted(range(len(rows)), key=keys.__getitem__, reverse=descending)
+            rows = array("l", (rows[i] for i in order))
+        return rows
+
+
+class _IndexedSource(TableSource):
+    """
+    Line-oriented formats read in place: the background pass records the
+    byte offset of every ROWS_PER_BLOCK-th record, and rows are parsed a
+    block at a time on demand (with a small LRU of parsed blocks).
+    """
+
+    quote = None  # records may span lines inside this quote character
+
+    def __init__(self, path):
+        super().__init__(path)
+        with open(path, "rb") as f:
+            sample = f.read(SAMPLE_BYTES)
+        encoding = detect_encoding(sample)
+        if encoding is None:
+            raise ValueError("двоичный файл")
+        if encoding.startswith(("utf-16", "utf-32")):
+            raise ValueError("UTF-16/32 не поддерживается")
+        self.encoding = "utf-8" if encoding == "utf-8-sig" else encoding
+        self.data_start = 3 if sample.startswith(b"\xef\xbb\xbf") else 0
+        self.checkpoints = array("q", [self.data_start])
+        self._state = (0, self.data_start)  # records indexed, offset after the last of them
+        self._blocks = OrderedDict()
+        self._lock = threading.Lock()
+        self._file = open(path, "rb")
+
+    def close(self):
+        self._file.close()
+
+    def _records(self, f):
+        """Yield the end offset of each record from f's position (quote-aware)."""
+        quote = self.quote
+        offset = f.tell()
+        in_quote = False
+        for line in f:
+            offset += len(line)
+            if quote is not None and line.count(quote) % 2:
+                in_quote = not in_quote
+            if not in_quote:
+                yield offset
+
+    def build(self, cancel=None):
+        with open(self.path, "rb") as f:
+            f.seek(self.checkpoints[0])
+            count = 0
+            for offset in self._records(f):
+                count += 1
+                if count % ROWS_PER_BLOCK == 0:
+                    self.checkpoints.append(offset)
+                if count % PUBLISH_EVERY == 0:
+                    self._state = (count, offset)
+                    self.progress = offset / self.size
+                    if cancel is not None and cancel.is_set():
+                        return
+            self._state = (count, self.size)
+        self.progress = 1.0
+        self.done = True
+
+    def row_count(self):
+        return self._state[0]
+
+    def _parse(self, text):
+        raise NotImplementedError
+
+    def _block(self, block):
+        rows = self._blocks.get(block)
+        if rows is not None:
+            self._blocks.move_to_end(block)
+            return rows
+        count, indexed = self._state
+        start = self.checkpoints[block]
+        end = self.checkpoints[block + 1] if block + 1 < len(self.checkpoints) else indexed
+        with self._lock:
+            self._file.seek(start)
+            data = self._file.read(end - start)
+        rows = self._parse(data.decode(self.encoding, errors="replace"))
+        if end != indexed or self.done:  # a block still being indexed is not cached
+            self._blocks[block] = rows
+            if len(self._blocks) > CACHED_BLOCKS:
+                self._blocks.popitem(last=False)
+        return rows
+
+    def row(self, i):
+        rows = self._block(i // ROWS_PER_BLOCK)
+        i %= ROWS_PER_BLOCK
+        return rows[i] if i < len(rows) else []
+
+    def iter_rows(self, cancel=None):
+        # whole blocks without going through the cache
+        count = self.row_count()
+        for block in range((count + ROWS_PER_BLOCK - 1) // ROWS_PER_BLOCK):
+            if cancel is not None and cancel.is_set():
+                return
+            start = self.checkpoints[block]
+            end = self.checkpoints[block + 1] if block + 1 < len(self.checkpoints) else self.size
+            with self._lock:
+                self._file.seek(start)
+                data = self._file.read(end - start)
+            yield from self._parse(data.decode(self.encoding, errors="replace"))
+
+
+class CsvSource(_IndexedSource):
+    """CSV/TSV: the dialect is sniffed from the first DIALECT_BYTES, the header decided from its rows."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        with open(path, "rb") as f:
+            f.seek(self.data_start)
+            sample = f.read(SAMPLE_BYTES).decode(self.encoding, errors="replace")
+        sample = sample[:sample.rfind("\n") + 1] or sample
+        head = sample[:DIALECT_BYTES]
+        head = head[:head.rfind("\n") + 1] or head
+        try:
+            self.dialect = csv.Sniffer().sniff(head, delimiters=",;\t|")
+            if not self.dialect.escapechar:
+                self.dialect.doublequote = True  # the sniffer often misses "" escapes
+        except csv.Error:
+            self.dialect = csv.excel_tab if path.lower().endswith(".tsv") else csv.excel
+        self.quote = (self.dialect.quotechar or '"').encode(self.encoding)
+        rows = list(csv.reader(io.StringIO(sample), self.dialect))
+        width = max((len(r) for r in rows), default=0)
+        if rows and (len(rows) < 2 or _looks_like_header(rows)):
+            self.columns = rows[0] + [str(n + 1) for n in range(len(rows[0]), width)]
+            with open(path, "rb") as f:
+                f.seek(self.data_start)
+                self.checkpoints[0] = next(self._records(f), self.size)
+            self._state = (0, self.checkpoints[0])
+        else:
+            self.columns = [str(n + 1) for n in range(width)]
+
+    def _parse(self, text):
+        return list(csv.reader(io.StringIO(text), self.dialect))
+
+
+class JsonLinesSource(_IndexedSource):
+    """
+    One JSON object per line. Columns are the flattened keys found in the
+    first SAMPLE_BYTES, so they are known before indexing; keys that only
+    appear later are not shown.
+    """
+
+    def __init__(self, path):
+        super().__init__(path)
+        with open(path, "rb") as f:
+            f.seek(self.data_start)
+            sample = f.read(SAMPLE_BYTES).decode(self.encoding, errors="replace")
+        lines = self._lines(sample)
+        if len(sample) == SAMPLE_BYTES:
+            lines = lines[:-1]  # probably cut in the middle
+        self.columns = list(dict.fromkeys(key for line in lines for key in self._flat(line)))
+        if not self.columns:
+            self.columns = ["value"]
+
+    @staticmethod
+    def _lines(text):
+        """Split on "\n" only, like the record index; str.splitlines() would also break at
+        \x1c, \x85 or U+2028 inside a JSON string and shift every following row."""
+        lines = text.split("\n")
+        if lines[-1] == "":
+            lines.pop()
+        return [line[:-1] if line.endswith("\r") else line for line in lines]
+
+    @staticmethod
+    def _flat(line):
+        line = line.strip()
+        if not line:
+            return {}
+        try:
+            obj = json.loads(line)
+        except ValueError:
+            return {"value": line}
+        return flatten(obj) if isinstance(obj, dict) else {"value": obj}
+
+    def _parse(self, text):
+        columns = self.columns
+        rows = []
+        for line in self._lines(text):
+            flat = self._flat(line)
+            rows.append([_cell(flat.get(c)) for c in columns])
+        return rows
+
+
+class JsonSource(TableSource):
+    """
+    A JSON array of objects (or an object holding one), flattened to
+    columns. The document is held in memory, so it is limited to
+    JSON_MAX_BYTES; a top-level array is decoded element by element so
+    build() can be cancelled. Large data is better kept as JSON Lines,
+    which is read in place.
+    """
+
+    def __init__(self, path):
+        super().__init__(path)
+        if self.size > JSON_MAX_BYTES:
+            raise ValueError("файл JSON слишком большой для таблицы")
+        self._rows = []
+        self._count = 0
+
+    def _elements(self, text, cancel):
+        """Items of the array starting at text[0] ("["), or None if cancelled."""
+        decode = json.JSONDecoder().raw_decode
+        space = _JSON_SPACE.match
+        items = []
+        pos = space(text, 1).end()
+        if text.startswith("]", pos):
+            return items
+        while True:
+            if len(items) % 4096 == 0:
+                if cancel is not None and cancel.is_set():
+                    return None
+                self.progress = pos / len(text)
+            item, pos = decode(text, pos)
+            items.append(item)
+            pos = space(text, pos).end()
+            if text.startswith(",", pos):
+                pos = space(text, pos + 1).end()
+            elif pos + 1 == len(text) and text.endswith("]"):
+                return items
+            else:
+                raise ValueError(f"ошибка JSON в позиции {pos}")
+
+    def build(self, cancel=None):
+        with open(self.path, "rb") as f:
+            data = f.read()
+        text = data.decode(json.detect_encoding(data)).strip()
+        del data
+        if text.startswith("["):
+            data = self._elements(text, cancel)
+            if data is None:
+                return
+        else:
+            data = json.loads(text)
+        del text
+        records = data
+        if isinstance(data, dict):
+            records = next((v for v in data.values() if isinstance(v, list)), [data])
+        if not isinstance(records, list):
+            records = [records]
+        column_ids = {}
+        flat_rows = []
+        for n, obj in enumerate(records):
+            if cancel is not None and n % 4096 == 0 and cancel.is_set():
+                return
+            flat = flatten(obj) if isinstance(obj, dict) else {"value": obj}
+            for key in flat:
+                if key not in column_ids:
+                    column_ids[key] = len(column_ids)
+            flat_rows.append(flat)
+        columns = list(column_ids)
+        self._rows = [[_cell(flat.get(c)) for c in columns] for flat in flat_rows]
+        self.columns = columns
+        self._count = len(self._rows)
+        self.progress = 1.0
+        self.done = True
+
+    def row_count(self):
+        return self._count
+
+    def row(self, i):
+        return self._rows[i]
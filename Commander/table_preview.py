@@ -0,0 +1,239 @@
+import threading
+
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLineEdit, QLabel, QTableView
+from PyQt5.QtCore import Qt, QObject, QTimer, QAbstractTableModel, QModelIndex, pyqtSignal
+
+from table_data import open_table
+from utils import human_size
+
+POLL_MS = 200        # how often indexing progress is picked up
+FETCH_ROWS = 1000    # rows exposed to the view per fetchMore()
+MAX_CELL_CHARS = 500
+
+
+class TableSignals(QObject):
+    queried = pyqtSignal(int, object, str)  # query generation, row numbers or None, error text
+
+
+class TableModel(QAbstractTableModel):
+    """
+    Lazy model over a TableSource: rows are exposed through
+    canFetchMore/fetchMore as the view scrolls and read from the file only
+    when painted. view_rows, once a sort or filter has run, maps view rows
+    to file rows.
+    """
+
+    def __init__(self, source, parent=None):
+        super().__init__(parent)
+        self.source = source
+        self.exposed = 0
+        self.columns = list(source.columns)
+        self.view_rows = None
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.view_rows) if self.view_rows is not None else self.exposed
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self.view_rows is None and self.exposed < self.source.row_count()
+
+    def fetchMore(self, parent=QModelIndex()):
+        available = self.source.row_count()
+        count = min(FETCH_ROWS, available - self.exposed)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self.exposed, self.exposed + count - 1)
+        self.exposed += count
+        self.endInsertRows()
+
+    def file_row(self, row):
+        return self.view_rows[row] if self.view_rows is not None else row
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role not in (Qt.DisplayRole, Qt.ToolTipRole):
+            return None
+        cells = self.source.row(self.file_row(index.row()))
+        column = index.column()
+        text = cells[column] if column < len(cells) else ""
+        if role == Qt.DisplayRole:
+            text = text.replace("\n", " ")
+        return text[:MAX_CELL_CHARS]
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.columns[section] if section < len(self.columns) else None
+        return str(self.file_row(section) + 1)
+
+    def sync_columns(self):
+        """A JSON source knows its columns only after parsing."""
+        if self.source.columns != self.columns:
+            self.beginResetModel()
+            self.columns = list(self.source.columns)
+            self.endResetModel()
+
+    def set_view_rows(self, rows):
+        self.beginResetModel()
+        self.view_rows = rows
+        if rows is None:
+            self.exposed = min(self.exposed, self.source.row_count())
+        self.endResetModel()
+
+
+class TablePreview(QWidget):
+    """
+    Table preview for CSV/TSV and JSON (Lines) files. The first rows are
+    shown while the row index is still being built in the background;
+    sorting (header click) and the filter work once indexing is done.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.source = None
+        self.model = None
+        self.indexer = None
+        self._cancel = threading.Event()
+        self._query_cancel = threading.Event()
+        self._query_generation = 0
+        self._sort = (-1, Qt.AscendingOrder)
+        self.signals = TableSignals()
+        self.signals.queried.connect(self.on_queried)
+
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.setLayout(layout)
+        row = QHBoxLayout()
+        self.filter_edit = QLineEdit()
+        self.filter_edit.setPlaceholderText("Фильтр строк (после индексации)")
+        self.filter_edit.returnPressed.connect(self.run_query)
+        self.info = QLabel("")
+        row.addWidget(self.filter_edit, 1)
+        row.addWidget(self.info)
+        layout.addLayout(row)
+        self.view = QTableView()
+        self.view.setWordWrap(False)
+        self.view.verticalHeader().setDefaultSectionSize(self.view.fontMetrics().height() + 4)
+        self.view.horizontalHeader().setSectionsClickable(True)
+        self.view.horizontalHeader().sectionClicked.connect(self.on_header_clicked)
+        layout.addWidget(self.view, 1)
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(POLL_MS)
+        self.timer.timeout.connect(self.poll_index)
+
+    def open(self, path):
+        """Start showing a table file; False (and nothing changed) if it cannot be shown as a table."""
+        try:
+            source = open_table(path)
+        except (OSError, ValueError, UnicodeError):
+            return False
+        self.clear()
+        self.source = source
+        self.model = TableModel(source, self)
+        self.view.setModel(self.model)
+        self._cancel = threading.Event()
+        self.indexer = threading.Thread(target=self._build, args=(source, self._cancel), daemon=True)
+        self.indexer.start()
+        self.timer.start()
+        self.poll_index()
+        return True
+
+    def _build(self, source, cancel):
+        try:
+            source.build(cancel)
+        except (OSError, ValueError) as e:
+            source.error = str(e)
+
+    def clear(self):
+        self.timer.stop()
+        self._cancel.set()
+        self._query_cancel.set()
+        self._query_generation += 1
+        self._sort = (-1, Qt.AscendingOrder)
+        self.view.horizontalHeader().setSortIndicatorShown(False)
+        self.filter_edit.clear()
+        self.filter_edit.setEnabled(False)
+        self.view.setModel(None)
+        if self.model is not None:
+            self.model.deleteLater()
+        if self.source is not None:
+            if self.indexer is not None:
+                self.indexer.join(timeout=1)
+            self.source.close()
+        self.source = self.model = self.indexer = None
+        self.info.setText("")
+
+    def poll_index(self):
+        source = self.source
+        if source.error:
+            self.timer.stop()
+            self.info.setText(f"Ошибка: {source.error}")
+            return
+        if source.done:
+            self.model.sync_columns()
+        # keep the first screen filled while indexing; further rows come from scrolling
+        while self.model.exposed < FETCH_ROWS and self.model.canFetchMore():
+            self.model.fetchMore()
+        rows = source.row_count()
+        if source.done:
+            self.timer.stop()
+            self.filter_edit.setEnabled(True)
+            self.info.setText(f"{human_size(source.size)}, строк: {rows}")
+        else:
+            self.info.setText(f"{human_size(source.size)}, индексация {source.progress:.0%}: строк пока {rows}")
+
+    def on_header_clicked(self, column):
+        if self.source is None:
+            return
+        header = self.view.horizontalHeader()
+        if not self.source.done:
+            header.setSortIndicatorShown(False)
+            self.info.setText("Сортировка будет доступна после индексации")
+            return
+        current, order = self._sort
+        if column == current:
+            order = Qt.DescendingOrder if order == Qt.AscendingOrder else Qt.AscendingOrder
+        else:
+            order = Qt.AscendingOrder
+        self._sort = (column, order)
+        header.setSortIndicatorShown(True)
+        header.setSortIndicator(column, order)
+        self.run_query()
+
+    def run_query(self):
+        """Filter and sort in a worker: both need a pass over every row."""
+        source = self.source
+        if source is None or not source.done:
+            return
+        self._query_cancel.set()
+        self._query_cancel = cancel = threading.Event()
+        self._query_generation += 1
+        generation = self._query_generation
+        needle = self.filter_edit.text().strip()
+        column, order = self._sort
+        self.info.setText("Сортировка/фильтр...")
+
+        def run():
+            try:
+                rows, error = source.query(needle, column, order == Qt.DescendingOrder, cancel), ""
+            except (OSError, ValueError) as e:
+                rows, error = None, str(e)
+            if not cancel.is_set():
+                self.signals.queried.emit(generation, rows, error)
+        threading.Thread(target=run, daemon=True).start()
+
+    def on_queried(self, generation, rows, error):
+        if generation != self._query_generation or self.model is None:
+            return
+        if error:
+            self.info.setText(error)
+            return
+        self.model.set_view_rows(rows)
+        total = self.source.row_count()
+        shown = total if rows is None else len(rows)
+        self.info.setText(f"{human_size(self.source.size)}, строк: {shown} из {total}")
@@ -0,0 +1,206 @@
+import codecs
+import re
+import tempfile
+
+from PyQt5.QtWidgets import QPlainTextEdit
+from PyQt5.QtCore import QTimer
+from PyQt5.QtGui import QColor, QFont, QTextCharFormat, QTextCursor
+
+FRAME_MS = 33                # flush at most ~30 times per second
+DEFAULT_SCROLLBACK = 5000    # lines
+MAX_PENDING = 4 * 1024 * 1024
+
+# CSI (ESC [ ... final byte) and OSC (ESC ] ... BEL / ESC \) sequences
+_ESCAPE_RE = re.compile(r"\x1b\[([0-9;?]*)([@-~])|\x1b\][^\x07\x1b]*(?:\x07|\x1b\\)|\x1b[@-Z\\-_]")
+
+ANSI_COLORS = [
+    "#000000", "#cd3131", "#0dbc79", "#e5e510", "#2472c8", "#bc3fbc", "#11a8cd", "#e5e5e5",
+    "#666666", "#f14c4c", "#23d18b", "#f5f543", "#3b8eea", "#d670d6", "#29b8db", "#ffffff",
+]
+_CUBE_LEVELS = (0, 95, 135, 175, 215, 255)
+
+
+def xterm_color(n: int):
+    """Colour for a 256-colour palette index: base colours, 6x6x6 cube, then 24 greys."""
+    if n < 16:
+        return ANSI_COLORS[n]
+    if n < 232:
+        n -= 16
+        r, g, b = (_CUBE_LEVELS[n // 36], _CUBE_LEVELS[n // 6 % 6], _CUBE_LEVELS[n % 6])
+        return f"#{r:02x}{g:02x}{b:02x}"
+    if n < 256:
+        grey = 8 + 10 * (n - 232)
+        return f"#{grey:02x}{grey:02x}{grey:02x}"
+    return None
+
+
+def apply_sgr(params: str, state: dict):
+    """Update state {fg, bg, bold} from an SGR parameter string like '1;31'."""
+    codes = [int(p) if p.isdigit() else 0 for p in params.split(";")] if params else [0]
+    i = 0
+    while i < len(codes):
+        c = codes[i]
+        if c == 0:
+            state.update(fg=None, bg=None, bold=False)
+        elif c == 1:
+            state["bold"] = True
+        elif c == 22:
+            state["bold"] = False
+        elif 30 <= c <= 37:
+            state["fg"] = ANSI_COLORS[c - 30]
+        elif 90 <= c <= 97:
+            state["fg"] = ANSI_COLORS[c - 90 + 8]
+        elif c == 39:
+            state["fg"] = None
+        elif 40 <= c <= 47:
+            state["bg"] = ANSI_COLORS[c - 40]
+        elif 100 <= c <= 107:
+            state["bg"] = ANSI_COLORS[c - 100 + 8]
+        elif c == 49:
+            state["bg"] = None
+        elif c in (38, 48) and i + 2 < len(codes) and codes[i + 1] == 5:
+            state["fg" if c == 38 else "bg"] = xterm_color(codes[i + 2])
+            i += 2
+        elif c in (38, 48) and i + 4 < len(codes) and codes[i + 1] == 2:
+            r, g, b = codes[i + 2:i + 5]
+            state["fg" if c == 38 else "bg"] = f"#{r:02x}{g:02x}{b:02x}"
+            i += 4
+        i += 1
+
+
+def split_ansi(text: str, state: dict):
+    """Yield (plain_text, fg, bg, bold) runs; non-colour escape sequences are dropped."""
+    pos = 0
+    for m in _ESCAPE_RE.finditer(text):
+        if m.start() > pos:
+            yield text[pos:m.start()], state["fg"], state["bg"], state["bold"]
+        if m.group(2) == "m":
+            apply_sgr(m.group(1), state)
+        pos = m.end()
+    if pos < len(text):
+        yield text[pos:], state["fg"], state["bg"], state["bold"]
+
+
+def collapse_carriage_returns(text: str) -> str:
+    """'50%\\r100%\\n' -> '100%\\n': keep only what a terminal would leave on each line."""
+    text = text.replace("\r\n", "\n")
+    if "\r" not in text:
+        return text
+    return "\n".join(line.rsplit("\r", 1)[-1] for line in text.split("\n"))
+
+
+class TerminalView(QPlainTextEdit):
+    """
+    Read-only terminal output with bounded scrollback.
+
+    feed() only appends bytes to a buffer; a frame timer renders the buffer
+    in one edit block. When output arrives faster than it can be shown,
+    only the last `scrollback` lines of the backlog are rendered, since
+    the rest would be dropped by maximumBlockCount anyway.
+    """
+
+    def __init__(self, parent=None, scrollback=DEFAULT_SCROLLBACK):
+        super().__init__(parent)
+        self.setReadOnly(True)
+        self.setUndoRedoEnabled(False)
+        self.setMaximumBlockCount(scrollback)
+        font = QFont("Consolas", 9)
+        font.setStyleHint(QFont.TypeWriter)
+        self.setFont(font)
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._pending = []
+        self._pending_len = 0
+        self._skipped = 0
+        self._ansi = {"fg": None, "bg": None, "bold": False}
+        self._formats = {}
+        self.spill_file = None
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(FRAME_MS)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.flush)
+
+    # ---- input ----
+    def feed(self, data: bytes):
+        if self.spill_file is not None:
+            self.spill_file.write(data)
+        text = self._decoder.decode(data)
+        if not text:
+            return
+        self._pending.append(text)
+        self._pending_len += len(text)
+        if self._pending_len > MAX_PENDING:
+            self._trim_pending()
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def write_line(self, text: str):
+        self.feed((text + "\n").encode("utf-8"))
+
+    def _trim_pending(self):
+        text = "".join(self._pending)
+        keep = text[-MAX_PENDING // 2:]
+        self._skipped += text.count("\n", 0, len(text) - len(keep))
+        self._pending = [keep]
+        self._pending_len = len(keep)
+
+    # ---- rendering ----
+    def flush(self):
+        if not self._pending:
+            return
+        text = "".join(self._pending)
+        self._pending = []
+        self._pending_len = 0
+        # an escape sequence cut in half by the read waits for the next frame
+        esc = text.rfind("\x1b")
+        if esc >= 0 and len(text) - esc < 32 and not _ESCAPE_RE.match(text, esc):
+            self._pending = [text[esc:]]
+            self._pending_len = len(text) - esc
+            text = text[:esc]
+        text = collapse_carriage_returns(text)
+        limit = self.maximumBlockCount()
+        if limit > 0 and text.count("\n") > limit:
+            cut = len(text)
+            for _ in range(limit):
+                cut = text.rfind("\n", 0, cut)
+            self._skipped += text.count("\n", 0, cut + 1)
+            text = text[cut + 1:]
+
+        bar = self.verticalScrollBar()
+        at_bottom = bar.value() >= bar.maximum() - 2
+        cursor = QTextCursor(self.document())
+        cursor.movePosition(QTextCursor.End)
+        cursor.beginEditBlock()
+        if self._skipped:
+            cursor.insertText(f"... пропущено строк: {self._skipped} ...\n", self._format(None, None, True))
+            self._skipped = 0
+        for chunk, fg, bg, bold in split_ansi(text, self._ansi):
+            cursor.insertText(chunk, self._format(fg, bg, bold))
+        cursor.endEditBlock()
+        if at_bottom:
+            bar.setValue(bar.maximum())
+
+    def _format(self, fg, bg, bold):
+        key = (fg, bg, bold)
+        fmt = self._formats.get(key)
+        if fmt is None:
+            fmt = QTextCharFormat()
+            if fg:
+                fmt.setForeground(QColor(fg))
+            if bg:
+                fmt.setBackground(QColor(bg))
+            if bold:
+                fmt.setFontWeight(QFont.Bold)
+            self._formats[key] = fmt
+        return fmt
+
+    # ---- optional full log ----
+    def set_spill(self, enabled: bool):
+        """Write the complete raw output to a temp file; returns its path (or None when disabled)."""
+        if enabled and self.spill_file is None:
+            self.spill_file = tempfile.NamedTemporaryFile(prefix="pycommander-terminal-", suffix=".log", delete=False)
+            return self.spill_file.name
+        if not enabled and self.spill_file is not None:
+            self.spill_file.close()
+            self.spill_file = None
+        return None
@@ -0,0 +1,305 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from PyQt5.QtWidgets import QListView, QStyledItemDelegate
+from PyQt5.QtCore import Qt, QObject, QSize, QBuffer, QByteArray, QIODevice, QTimer, pyqtSignal
+from PyQt5.QtGui import QIcon, QImage, QImageReader, QPixmap
+
+from appdata import data_path, norm_key
+
+THUMB_SIZE = 128
+DISK_BUDGET = 256 * 1024 * 1024  # bytes of cached thumbnails before LRU eviction
+MEMORY_ICONS = 3000              # decoded icons kept for repainting
+THUMB_WORKERS = max(2, min(6, (os.cpu_count() or 2) - 1))
+REQUEST_DELAY_MS = 30            # collect one frame of paint requests before queueing them
+
+IMAGE_EXTS = {"." + bytes(f).decode("ascii").lower() for f in QImageReader.supportedImageFormats()}
+
+
+def is_image(path: str) -> bool:
+    return os.path.splitext(path)[1].lower() in IMAGE_EXTS
+
+
+class ThumbnailDiskCache:
+    """
+    Encoded thumbnails under the app data folder, one file per
+    (path, mtime_ns, size). A hit touches the file's mtime, so eviction
+    by oldest mtime is least-recently-used.
+    """
+
+    def __init__(self, budget=DISK_BUDGET):
+        self.folder = data_path("thumbs")
+        os.makedirs(self.folder, exist_ok=True)
+        self.budget = budget
+        self._total = None  # bytes on disk, counted on the first put
+        self._lock = threading.Lock()
+
+    def _file(self, path, st):
+        digest = hashlib.sha1(f"{norm_key(path)}|{st.st_mtime_ns}|{st.st_size}".encode("utf-8")).hexdigest()
+        return os.path.join(self.folder, digest[:2], digest[2:] + ".thumb")
+
+    def get(self, path, st):
+        name = self._file(path, st)
+        try:
+            with open(name, "rb") as f:
+                data = f.read()
+            os.utime(name)
+        except OSError:
+            return None
+        return data
+
+    def put(self, path, st, data: bytes):
+        name = self._file(path, st)
+        try:
+            os.makedirs(os.path.dirname(name), exist_ok=True)
+            with open(name, "wb") as f:
+                f.write(data)
+        except OSError:
+            return
+        with self._lock:
+            if self._total is None:
+                self._total = sum(size for _, size, _ in self._scan())
+            else:
+                self._total += len(data)
+            if self._total > self.budget:
+                self._evict()
+
+    def _scan(self):
+        out = []
+        with os.scandir(self.folder) as subs:
+            for sub in subs:
+                if not sub.is_dir():
+                    continue
+                with os.scandir(sub.path) as it:
+                    for entry in it:
+                        try:
+                            st = entry.stat()
+                        except OSError:
+                            continue
+                        out.append((st.st_mtime_ns, st.st_size, entry.path))
+        return out
+
+    def _evict(self):
+        """Drop least recently used thumbnails down to 80% of the budget."""
+        files = sorted(self._scan())
+        total = sum(size for _, size, _ in files)
+        for _mtime, size, name in files:
+            if total <= self.budget * 0.8:
+                break
+            try:
+                os.remove(name)
+                total -= size
+            except OSError:
+                pass
+        self._total = total
+
+
+def make_thumbnail(path: str, size: int = THUMB_SIZE):
+    """Decode and downscale an image; JPEG is decoded at reduced size directly. Returns QImage or None."""
+    reader = QImageReader(path)
+    reader.setAutoTransform(True)
+    full = reader.size()
+    if full.isValid() and (full.width() > size or full.height() > size):
+        reader.setScaledSize(full.scaled(size, size, Qt.KeepAspectRatio))
+    image = reader.read()
+    if image.isNull():
+        return None
+    if image.width() > size or image.height() > size:
+        image = image.scaled(size, size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+    return image
+
+
+def _encode(image: QImage) -> bytes:
+    data = QByteArray()
+    buf = QBuffer(data)
+    buf.open(QIODevice.WriteOnly)
+    image.save(buf, "PNG" if image.hasAlphaChannel() else "JPG", 85)
+    return bytes(data)
+
+
+class ThumbnailLoader:
+    """
+    Thumbnail workers fed with the items currently on screen.
+
+    request() takes (path, stamp) pairs and replaces the pending list, so
+    items scrolled out of view are never decoded. stamp is the (size,
+    mtime_ns) of an icon already shown, or None: a file whose stamp still
+    matches is only stat'ed, not decoded again. on_ready(path, stamp,
+    QImage or None) is called from the worker thread with the current
+    stamp (None if the file is gone).
+    """
+
+    def __init__(self, cache: ThumbnailDiskCache, on_ready, workers=THUMB_WORKERS):
+        self.cache = cache
+        self.on_ready = on_ready
+        self._pending = OrderedDict()
+        self._running = set()
+        self._cv = threading.Condition()
+        for i in range(workers):
+            threading.Thread(target=self._loop, name=f"thumbs-{i}", daemon=True).start()
+
+    def request(self, items):
+        with self._cv:
+            self._pending = OrderedDict((p, stamp) for p, stamp in items if p not in self._running)
+            self._cv.notify_all()
+
+    def _loop(self):
+        while True:
+            with self._cv:
+                while not self._pending:
+                    self._cv.wait()
+                path, known = self._pending.popitem(last=False)
+                self._running.add(path)
+            stamp = image = None
+            try:
+                st = os.stat(path)
+                stamp = (st.st_size, st.st_mtime_ns)
+                if stamp != known:
+                    image = self._load(path, st)
+            except Exception:
+                pass
+            with self._cv:
+                self._running.discard(path)
+            self.on_ready(path, stamp, image)
+
+    def _load(self, path, st):
+        data = self.cache.get(path, st)
+        if data is not None:
+            image = QImage()
+            if image.loadFromData(data):
+                return image
+        image = make_thumbnail(path)
+        if image is not None:
+            self.cache.put(path, st, _encode(image))
+        return image
+
+
+class ThumbnailService(QObject):
+    """
+    Shared by the panels' grid views: icon LRU in memory, disk cache and the
+    worker pool. Painting never touches the disk: a cached icon is shown
+    as is and, once per folder visit or model change notice, checked for
+    staleness by the workers.
+    """
+
+    ready = pyqtSignal(str, object, object)  # path, (size, mtime_ns) or None, QImage or None (from the workers)
+    updated = pyqtSignal()           # new icons available, views should repaint
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.icons = OrderedDict()   # path -> ((size, mtime_ns), QIcon)
+        self.failed = set()
+        self._checked = set()        # paths whose icon was found current since the last revalidate()
+        self._wanted = OrderedDict()
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(REQUEST_DELAY_MS)
+        self._timer.timeout.connect(self._flush_wanted)
+        self.ready.connect(self._on_ready)
+        self.loader = ThumbnailLoader(ThumbnailDiskCache(), self.ready.emit)
+
+    def icon(self, path):
+        """Cached icon for path, or None after queueing it for the next batch."""
+        cached = self.icons.get(path)
+        if cached is not None:
+            self.icons.move_to_end(path)
+            if path not in self._checked:
+                self._want(path, cached[0])
+            return cached[1]
+        if path not in self.failed:
+            self._want(path, None)
+        return None
+
+    def _want(self, path, stamp):
+        self._wanted[path] = stamp
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def _flush_wanted(self):
+        items = list(self._wanted.items())
+        self._wanted.clear()
+        self.loader.request(items)
+
+    def revalidate(self, path=None):
+        """Check shown icons against their files again and retry failed ones (all, or just path)."""
+        if path is None:
+            self._checked.clear()
+            self.failed.clear()
+        else:
+            self._checked.discard(path)
+            self.failed.discard(path)
+
+    def _on_ready(self, path, stamp, image):
+        if stamp is None:
+            return
+        if image is None:
+            cached = self.icons.get(path)
+            if cached is not None and cached[0] == stamp:
+                self._checked.add(path)
+            else:
+                self.failed.add(path)
+            return
+        self.icons[path] = (stamp, QIcon(QPixmap.fromImage(image)))
+        self.icons.move_to_end(path)
+        self._checked.add(path)
+        while len(self.icons) > MEMORY_ICONS:
+            self._checked.discard(self.icons.popitem(last=False)[0])
+        self.updated.emit()
+
+
+class ThumbnailDelegate(QStyledItemDelegate):
+    """Swaps the file-type icon for a thumbnail; painting is what drives loading."""
+
+    def __init__(self, service: ThumbnailService, parent=None):
+        super().__init__(parent)
+        self.service = service
+
+    def initStyleOption(self, option, index):
+        super().initStyleOption(option, index)
+        path = index.model().filePath(index)
+        if is_image(path):
+            icon = self.service.icon(path)
+            if icon is not None:
+                option.icon = icon
+
+
+class ThumbnailView(QListView):
+    """Icon grid over a panel's proxy model; only painted items get thumbnails."""
+
+    def __init__(self, service: ThumbnailService, parent=None):
+        super().__init__(parent)
+        self.setViewMode(QListView.IconMode)
+        self.setResizeMode(QListView.Adjust)
+        self.setMovement(QListView.Static)
+        self.setUniformItemSizes(True)
+        self.setLayoutMode(QListView.Batched)
+        self.setBatchSize(500)
+        self.setWordWrap(True)
+        self.setIconSize(QSize(THUMB_SIZE, THUMB_SIZE))
+        self.setGridSize(QSize(THUMB_SIZE + 24, THUMB_SIZE + 40))
+        self.setSelectionMode(QListView.ExtendedSelection)
+        self.service = service
+        self.setItemDelegate(ThumbnailDelegate(service, self))
+        # repaint at most once per event loop pass however many thumbnails arrive
+        self._repaint = QTimer(self)
+        self._repaint.setSingleShot(True)
+        self._repaint.setInterval(REQUEST_DELAY_MS)
+        self._repaint.timeout.connect(self.viewport().update)
+        service.updated.connect(self._schedule_repaint)
+
+    def setRootIndex(self, index):
+        self.service.revalidate()
+        super().setRootIndex(index)
+
+    def dataChanged(self, top_left, bottom_right, roles=()):
+        # QFileSystemModel reports files changed on disk this way
+        model = self.model()
+        for row in range(top_left.row(), bottom_right.row() + 1):
+            self.service.revalidate(model.filePath(top_left.sibling(row, 0)))
+        super().dataChanged(top_left, bottom_right, roles)
+
+    def _schedule_repaint(self):
+        if self.isVisible() and not self._repaint.isActive():
+            self._repaint.start()
@@ -0,0 +1,46 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+WALK_WORKERS = min(32, (os.cpu_count() or 2) * 4)  # scandir is I/O bound
+
+
+def list_dir(path):
+    """One os.scandir pass -> (path, [(name, is_dir, size, mtime_ns)]) or (path, None) on error."""
+    entries = []
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                    st = entry.stat(follow_symlinks=False)
+                    entries.append((entry.name, is_dir, 0 if is_dir else st.st_size, st.st_mtime_ns))
+                except OSError:
+                    pass
+    except OSError:
+        return path, None
+    return path, entries
+
+
+def parallel_walk(root, cancel=None, workers=WALK_WORKERS, skip=None):
+    """
+    Walk root listing directories on a thread pool; yields (dir_path, entries)
+    in completion order. skip(dir_path) -> True prunes a subtree.
+    """
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        running = {pool.submit(list_dir, root)}
+        while running:
+            if cancel is not None and cancel.is_set():
+                for f in running:
+                    f.cancel()
+                return
+            done, running = wait(running, timeout=0.2, return_when=FIRST_COMPLETED)
+            for fut in done:
+                path, entries = fut.result()
+                if entries is None:
+                    continue
+                for name, is_dir, _, _ in entries:
+                    if is_dir:
+                        sub = os.path.join(path, name)
+                        if skip is None or not skip(sub):
+                            running.add(pool.submit(list_dir, sub))
+                yield path, entries
@@ -0,0 +1,64 @@
+from functools import lru_cache
+
+try:
+    from pygments.lexers import get_lexer_by_name
+    from pygments.token import Comment, Keyword, Name, Number, Operator, String
+    from pygments.util import ClassNotFound
+except ImportError:
+    get_lexer_by_name = None
+
+CACHED_LINES = 65536     # tokenized (language, line) pairs kept
+
+# coarse categories the highlighter has formats for, most specific first
+if get_lexer_by_name is not None:
+    _CATEGORIES = (
+        (Comment, "comment"),
+        (String, "string"),
+        (Number, "number"),
+        (Keyword, "keyword"),
+        (Name.Builtin, "builtin"),
+        (Name.Function, "definition"),
+        (Name.Class, "definition"),
+        (Name.Decorator, "builtin"),
+        (Operator, "operator"),
+    )
+
+
+@lru_cache(maxsize=None)
+def lexer_for(language: str):
+    """Pygments lexer for a fence info string such as "python", or None if unknown."""
+    if get_lexer_by_name is None or not language:
+        return None
+    try:
+        return get_lexer_by_name(language.lower(), stripnl=False, ensurenl=False)
+    except ClassNotFound:
+        return None
+
+
+@lru_cache(maxsize=4096)
+def _category(token_type):
+    for parent, name in _CATEGORIES:
+        if token_type in parent:
+            return name
+    return None
+
+
+@lru_cache(maxsize=CACHED_LINES)
+def code_tokens(language: str, line: str):
+    """
+    ((start, length, category), ...) for one line of fenced code.
+
+    Each line is lexed on its own, so constructs spanning lines (block
+    comments, triple-quoted strings) are only approximated; in exchange the
+    result depends on nothing but (language, line) and is cached, so
+    re-highlighting a block of unchanged code costs dictionary lookups.
+    """
+    lexer = lexer_for(language)
+    if lexer is None:
+        return ()
+    out = []
+    for start, token_type, value in lexer.get_tokens_unprocessed(line):
+        category = _category(token_type)
+        if category is not None and value.strip():
+            out.append((start, len(value), category))
+    return tuple(out)
@@ -1,20 +1,33 @@
 import sys
 import os
+import multiprocessing
 import shutil
 import psutil
 import time
+import threading
 from datetime import datetime
 
 from PyQt5.QtWidgets import (
-    QApplication, QMainWindow, QTextEdit, QSplitter,
-    QAction, QFileDialog, QMessageBox, QToolBar, QLabel,
+    QApplication, QMainWindow, QPlainTextEdit, QSplitter,
+    QAction, QFileDialog, QMessageBox,
     QVBoxLayout, QWidget, QStatusBar, QLineEdit, QPushButton,
-    QHBoxLayout, QSizePolicy, QComboBox, QFileSystemModel, QTreeView
+    QHBoxLayout, QComboBox, QFileSystemModel, QTreeView
 )
-from PyQt5.QtCore import Qt, QTimer
-from PyQt5.QtGui import QIcon, QPixmap, QFont
+from PyQt5.QtCore import Qt, QTimer, QObject, pyqtSignal
+from PyQt5.QtGui import QIcon, QPixmap, QFont, QKeySequence
 from PyQt5.QtWidgets import QSplashScreen
-import markdown
+
+from md_highlight import MarkdownHighlighter
+from md_preview import MarkdownPreview
+from site_build import build_site
+
+RENDER_DELAY_MS = 150  # preview is re-rendered this long after the last keystroke
+
+
+class BuildSignals(QObject):
+    progress = pyqtSignal(int, int)    # pages rendered, pages to render
+    finished = pyqtSignal(object)      # BuildResult
+    failed = pyqtSignal(str)           # the build could not run at all
 
 
 def resource_path(relative_path: str) -> str:
@@ -53,101 +66,78 @@ def human_size(num):
     return f"{num:.1f} PB"
 
 
-class FileManager(QMainWindow):
+class EditorWindow(QMainWindow):
     def __init__(self):
         super().__init__()
-        self.setWindowTitle("PyCommander")
         self.setGeometry(80, 80, 1300, 800)
         self.dark_mode = True
         self.filter_ext = ""  # e.g. ".txt" or "" for no filter
-
-        # Terminal command history
-        self.cmd_history = []
-        self.cmd_history_index = -1
+        self.current_path = None
 
         self.init_ui()
         self.apply_theme()
+        self.update_title()
 
     def init_ui(self):
         # Status bar
         self.status = QStatusBar()
         self.setStatusBar(self.status)
 
-        # Top-level splitter for panels and right-side tools
+        # File menu
+        file_menu = self.menuBar().addMenu("Файл")
+        for title, shortcut, slot in (
+            ("Новый", QKeySequence.New, self.new_file),
+            ("Открыть...", QKeySequence.Open, self.open_file),
+            ("Сохранить", QKeySequence.Save, self.save_file),
+            ("Сохранить как...", QKeySequence.SaveAs, self.save_file_as),
+        ):
+            action = QAction(title, self)
+            action.setShortcut(shortcut)
+            action.triggered.connect(slot)
+            file_menu.addAction(action)
+
+        # Static site: convert a folder of notes to HTML
+        site_menu = self.menuBar().addMenu("Сайт")
+        build_action = QAction("Собрать сайт из папки...", self)
+        build_action.setShortcut("Ctrl+B")
+        build_action.triggered.connect(lambda: self.build_site_from_folder(force=False))
+        rebuild_action = QAction("Пересобрать сайт полностью...", self)
+        rebuild_action.triggered.connect(lambda: self.build_site_from_folder(force=True))
+        site_menu.addAction(build_action)
+        site_menu.addAction(rebuild_action)
+        self.build_thread = None
+        self.build_cancel = threading.Event()
+        self.build_signals = BuildSignals()
+        self.build_signals.progress.connect(self.on_build_progress)
+        self.build_signals.finished.connect(self.on_build_finished)
+        self.build_signals.failed.connect(self.on_build_failed)
+
+        # Top-level splitter: files | editor | preview
         main_splitter = QSplitter(Qt.Horizontal)
 
-        # Left and right panel widgets
-        left_widget = self.create_panel(side='left')
-        right_widget = self.create_panel(side='right')
-
-        # Right side: preview + terminal
-        right_side = QWidget()
-        right_side_layout = QVBoxLayout()
-        right_side.setLayout(right_side_layout)
-
-        # Preview panel
-        preview_label = QLabel("Preview")
-        pfont = preview_label.font()
-        pfont.setBold(True)
-        preview_label.setFont(pfont)
-        self.preview_area = QTextEdit()
-        self.preview_area.setReadOnly(True)
-        self.preview_area.setFixedHeight(240)
-
-        # Terminal panel (simple)
-        term_label = QLabel("Terminal")
-        tfont = term_label.font()
-        tfont.setBold(True)
-        term_label.setFont(tfont)
-        self.terminal = QTextEdit()
-        self.terminal.setReadOnly(True)
-        self.terminal.setStyleSheet("background-color: black; color: lightgreen;")
-        self.terminal.setSizePolicy(QSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding))
-
-        # Command input under terminal
-        self.command_input = QLineEdit()
-        self.command_input.setPlaceholderText("Введите команду и нажмите Enter")
-        self.command_input.returnPressed.connect(self.execute_command)
-        self.command_input.installEventFilter(self)  # for history navigation
-
-        # Optional clear terminal button
-        clear_term_btn = QPushButton("Clear")
-        clear_term_btn.clicked.connect(self.terminal.clear)
-
-        cmd_bar = QWidget()
-        cmd_layout = QHBoxLayout()
-        cmd_layout.setContentsMargins(0, 0, 0, 0)
-        cmd_bar.setLayout(cmd_layout)
-        cmd_layout.addWidget(self.command_input)
-        cmd_layout.addWidget(clear_term_btn)
-
-        # QProcess (if available)
-        self.proc = None
-        try:
-            from PyQt5.QtCore import QProcess
-            self.proc = QProcess(self)
-            self.proc.readyReadStandardOutput.connect(self.on_proc_stdout)
-            self.proc.readyReadStandardError.connect(self.on_proc_stderr)
-            self.proc.finished.connect(self.on_proc_finished)
-        except Exception:
-            self.proc = None
+        left_widget = self.create_panel()
 
-        # Start shell if QProcess is available
-        if self.proc:
-            self.start_shell()
+        # Editor
+        self.editor = QPlainTextEdit()
+        self.editor.setFont(QFont("Consolas" if os.name == 'nt' else "Monospace", 11))
+        self.editor.setLineWrapMode(QPlainTextEdit.WidgetWidth)
+        self.editor.textChanged.connect(self.schedule_render)
+        self.editor.document().modificationChanged.connect(self.update_title)
+        self.highlighter = MarkdownHighlighter(self.editor.document())
 
-        right_side_layout.addWidget(preview_label)
-        right_side_layout.addWidget(self.preview_area)
-        right_side_layout.addWidget(term_label)
-        right_side_layout.addWidget(self.terminal)
-        right_side_layout.addWidget(cmd_bar)
+        # Live preview: rendered off the GUI thread after a short pause in typing
+        self.preview = MarkdownPreview()
+        self.render_timer = QTimer(self)
+        self.render_timer.setSingleShot(True)
+        self.render_timer.setInterval(RENDER_DELAY_MS)
+        self.render_timer.timeout.connect(self.render_preview)
 
         main_splitter.addWidget(left_widget)
-        main_splitter.addWidget(right_widget)
-        main_splitter.addWidget(right_side)
-        main_splitter.setStretchFactor(0, 3)
+        main_splitter.addWidget(self.editor)
+        main_splitter.addWidget(self.preview)
+        main_splitter.setStretchFactor(0, 1)
         main_splitter.setStretchFactor(1, 3)
-        main_splitter.setStretchFactor(2, 2)
+        main_splitter.setStretchFactor(2, 3)
 
         # Bottom toolbar: filter and theme toggle
         bottom_bar = QWidget()
@@ -187,8 +177,8 @@ class FileManager(QMainWindow):
         if os.path.exists(ico_path):
             self.setWindowIcon(QIcon(ico_path))
 
-    def create_panel(self, side='left'):
-        """Create panel widget with combo (disks) + tree view."""
+    def create_panel(self):
+        """Create panel widget with combo (disks) + tree view; double-click opens a file."""
         panel_widget = QWidget()
         layout = QVBoxLayout()
         panel_widget.setLayout(layout)
@@ -205,28 +195,20 @@ class FileManager(QMainWindow):
         tree.setAnimated(False)
         tree.setIndentation(20)
         tree.setSortingEnabled(True)
+        for column in (1, 2, 3):
+            tree.hideColumn(column)
         tree.setContextMenuPolicy(Qt.CustomContextMenu)
         tree.customContextMenuRequested.connect(lambda pos, t=tree: self.show_menu(pos, t))
         tree.clicked.connect(lambda idx, t=tree: self.on_item_clicked(idx, t))
-        # Enable drag/drop
-        tree.setDragEnabled(True)
-        tree.setAcceptDrops(True)
-        tree.setDropIndicatorShown(True)
-        tree.setDefaultDropAction(Qt.CopyAction)
+        tree.doubleClicked.connect(lambda idx, t=tree: self.on_item_activated(idx, t))
 
         # set initial root
         initial = combo.currentText()
         tree.setRootIndex(model.index(initial))
 
-        # wiring based on side
-        if side == 'left':
-            self.combo_left = combo
-            self.model_left = model
-            self.tree_left = tree
-        else:
-            self.combo_right = combo
-            self.model_right = model
-            self.tree_right = tree
+        self.combo = combo
+        self.model = model
+        self.tree = tree
 
         combo.currentTextChanged.connect(lambda path, m=model, t=tree: t.setRootIndex(m.index(path)))
 
@@ -243,7 +225,7 @@ class FileManager(QMainWindow):
                 QComboBox { background-color: #3c3c3c; color: white; }
                 QPushButton { background-color: #4CAF50; color: white; padding: 6px; border-radius: 4px; }
                 QLineEdit { background-color: #1e1e1e; color: white; }
-                QTextEdit { background-color: #121212; color: #dcdcdc; }
+                QPlainTextEdit, QTextEdit { background-color: #121212; color: #dcdcdc; }
                 QLabel { color: white; }
             """)
         else:
@@ -386,19 +368,11 @@ class FileManager(QMainWindow):
                 self.status.showMessage(path)
         except Exception:
             self.status.showMessage(path)
-        if os.path.isfile(path):
-            try:
-                ext = os.path.splitext(path)[1].lower()
-                if ext in ['.txt', '.py', '.md', '.json', '.log', '.csv', '.ini']:
-                    with open(path, "r", encoding="utf-8", errors="replace") as f:
-                        data = f.read(10000)
-                    self.preview_area.setPlainText(data)
-                else:
-                    self.preview_area.setPlainText(f"Preview not available for {ext} files.")
-            except Exception:
-                self.preview_area.setPlainText("Невозможно показать превью.")
-        else:
-            self.preview_area.setPlainText("")
+
+    def on_item_activated(self, index, tree):
+        path = tree.model().filePath(index)
+        if os.path.isfile(path) and self.maybe_save():
+            self.load_file(path)
 
     def apply_filter(self):
         txt = self.filter_input.text().strip()
@@ -412,145 +386,132 @@ class FileManager(QMainWindow):
         self.filter_ext = ""
         QMessageBox.information(self, "Фильтр", "Фильтр очищен.")
 
-    def start_shell(self):
-        try:
-            from PyQt5.QtCore import QProcess
-            self.proc = QProcess(self)
-            # объединяем stderr в stdout — удобнее читать
-            self.proc.setProcessChannelMode(QProcess.MergedChannels)
-            self.proc.readyReadStandardOutput.connect(self.on_proc_stdout)
-            self.proc.finished.connect(self.on_proc_finished)
-
-            if os.name == 'nt':
-                # Запуск cmd.exe в интерактивном режиме
-                self.proc.start("cmd.exe")
-            else:
-                self.proc.start("/bin/bash")
-
-            # подождать, чтобы убедиться, что процесс действительно стартовал
-            started = self.proc.waitForStarted(3000)
-            if not started:
-                self.terminal.append("Не удалось запустить shell (waitForStarted timed out).")
-                self.proc = None
-        except Exception as e:
-            self.terminal.append(f"Failed to start shell: {e}")
-            self.proc = None
-
-    def execute_command(self):
-        cmd = self.command_input.text().strip()
-        if not cmd:
-            return
-        if not self.proc or self.proc.state() != self.proc.Running:
-            self.terminal.append("Процесс терминала не запущен.")
+    # -----------------------
+    # Editor: files and live preview
+    # -----------------------
+    def update_title(self, *args):
+        name = os.path.basename(self.current_path) if self.current_path else "Без имени"
+        modified = "*" if self.editor.document().isModified() else ""
+        self.setWindowTitle(f"{modified}{name} — Mdredactor")
+
+    def schedule_render(self):
+        self.render_timer.start()  # restarts while typing
+
+    def render_preview(self):
+        self.preview.render_text(self.editor.toPlainText())
+
+    def maybe_save(self):
+        """Ask about unsaved changes; False if the user cancelled."""
+        if not self.editor.document().isModified():
+            return True
+        reply = QMessageBox.question(self, "Несохранённые изменения", "Сохранить изменения?",
+                                     QMessageBox.Save | QMessageBox.Discard | QMessageBox.Cancel)
+        if reply == QMessageBox.Save:
+            return self.save_file()
+        return reply == QMessageBox.Discard
+
+    def new_file(self):
+        if not self.maybe_save():
             return
+        self.current_path = None
+        self.editor.setPlainText("")
+        self.editor.document().setModified(False)
+        self.update_title()
 
-        # Сохраняем историю
-        self.cmd_history.append(cmd)
-        self.cmd_history_index = len(self.cmd_history)
-
-        # Показываем команду в терминале
-        self.terminal.append(f"> {cmd}")
+    def open_file(self):
+        if not self.maybe_save():
+            return
+        path, _ = QFileDialog.getOpenFileName(self, "Открыть", os.path.dirname(self.current_path or ""),
+                                              "Markdown (*.md *.markdown);;Все файлы (*)")
+        if path:
+            self.load_file(path)
 
-        # Формируем корректный перевод строки для платформы
-        nl = "\r\n" if os.name == 'nt' else "\n"
+    def load_file(self, path):
         try:
-            written = self.proc.write((cmd + nl).encode("utf-8"))
-            # дождаться записи данных в процесс (не блокировать надолго)
-            self.proc.waitForBytesWritten(1000)
-            if written == -1:
-                self.terminal.append("Не удалось записать команду в процесс.")
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                text = f.read()
         except Exception as e:
-            self.terminal.append(f"Failed to write to process: {e}")
-
-        self.command_input.clear()
-
-    def eventFilter(self, obj, event):
-        """Handle up/down arrow navigation for command history in command_input."""
-        from PyQt5.QtCore import QEvent
-        if obj is self.command_input and event.type() == QEvent.KeyPress:
-            key = event.key()
-            if key == Qt.Key_Up:
-                if self.cmd_history:
-                    self.cmd_history_index = max(0, self.cmd_history_index - 1)
-                    self.command_input.setText(self.cmd_history[self.cmd_history_index])
-                    return True
-            elif key == Qt.Key_Down:
-                if self.cmd_history:
-                    self.cmd_history_index = min(len(self.cmd_history) - 1, self.cmd_history_index + 1)
-                    if self.cmd_history_index >= len(self.cmd_history):
-                        self.command_input.clear()
-                    else:
-                        self.command_input.setText(self.cmd_history[self.cmd_history_index])
-                    return True
-        return super().eventFilter(obj, event)
-
-    def on_proc_stdout(self):
-        if not self.proc:
+            QMessageBox.critical(self, "Ошибка", str(e))
             return
+        self.current_path = path
+        self.editor.setPlainText(text)
+        self.editor.document().setModified(False)
+        self.update_title()
+        self.render_timer.stop()
+        self.render_preview()
+
+    def save_file(self):
+        if not self.current_path:
+            return self.save_file_as()
         try:
-            while self.proc.bytesAvailable():
-                data = bytes(self.proc.readAllStandardOutput()).decode('utf-8', errors='replace')
-                # добавляем без лишних переносов
-                self.terminal.moveCursor(self.terminal.textCursor().End)
-                self.terminal.insertPlainText(data)
+            with open(self.current_path, "w", encoding="utf-8") as f:
+                f.write(self.editor.toPlainText())
         except Exception as e:
-            self.terminal.append(f"[read error] {e}")
-
-    def on_proc_stderr(self):
-        if not self.proc:
-            return
-        data = bytes(self.proc.readAllStandardError()).decode('utf-8', errors='replace')
-        # For stderr we prefix to make it noticeable
-        self.terminal.moveCursor(self.terminal.textCursor().End)
-        self.terminal.insertPlainText(data)
-
-    def on_proc_finished(self):
-        self.terminal.append("\n[Shell process finished]\n")
-        self.proc = None
+            QMessageBox.critical(self, "Ошибка", str(e))
+            return False
+        self.editor.document().setModified(False)
+        self.status.showMessage(f"Сохранено: {self.current_path}")
+        return True
+
+    def save_file_as(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Сохранить как", self.current_path or "untitled.md",
+                                              "Markdown (*.md *.markdown);;Все файлы (*)")
+        if not path:
+            return False
+        self.current_path = path
+        self.update_title()
+        return self.save_file()
 
     # -----------------------
-    # Remaining helper methods (preview, file ops, etc.)
+    # Static site build
     # -----------------------
-    def on_item_clicked(self, index, tree):
-        model = tree.model()
-        path = model.filePath(index)
-        try:
-            if os.path.exists(path):
-                size = os.path.getsize(path) if os.path.isfile(path) else 0
-                mtime = datetime.fromtimestamp(os.path.getmtime(path)).strftime("%Y-%m-%d %H:%M:%S")
-                self.status.showMessage(f"{path}    Size: {human_size(size)}    Modified: {mtime}")
-            else:
-                self.status.showMessage(path)
-        except Exception:
-            self.status.showMessage(path)
-        if os.path.isfile(path):
+    def build_site_from_folder(self, force=False):
+        if self.build_thread is not None and self.build_thread.is_alive():
+            self.status.showMessage("Сборка сайта уже идёт")
+            return
+        start = os.path.dirname(self.current_path) if self.current_path else ""
+        source = QFileDialog.getExistingDirectory(self, "Папка с заметками", start)
+        if not source:
+            return
+        output = QFileDialog.getExistingDirectory(self, "Папка для HTML (внутри исходной пропускается при сборке)",
+                                                  os.path.join(source, "_site"))
+        if not output:
+            return
+        self.build_cancel = cancel = threading.Event()
+        signals = self.build_signals
+
+        def run():
             try:
-                ext = os.path.splitext(path)[1].lower()
-                if ext in ['.txt', '.py', '.md', '.json', '.log', '.csv', '.ini']:
-                    with open(path, "r", encoding="utf-8", errors="replace") as f:
-                        data = f.read(10000)
-                    self.preview_area.setPlainText(data)
-                else:
-                    self.preview_area.setPlainText(f"Preview not available for {ext} files.")
-            except Exception:
-                self.preview_area.setPlainText("Невозможно показать превью.")
+                result = build_site(source, output, force=force, cancel=cancel,
+                                    progress=signals.progress.emit)
+            except OSError as e:
+                signals.failed.emit(str(e))
+                return
+            signals.finished.emit(result)
+        self.status.showMessage(f"Сборка сайта: {source} → {output}")
+        self.build_thread = threading.Thread(target=run, daemon=True)
+        self.build_thread.start()
+
+    def on_build_progress(self, done, total):
+        self.status.showMessage(f"Сборка сайта: {done} из {total}")
+
+    def on_build_finished(self, result):
+        self.status.showMessage(f"Сайт: {result.summary()}")
+        if result.errors:
+            details = "\n".join(f"{rel}: {error}" for rel, error in result.errors[:20])
+            QMessageBox.warning(self, "Сборка сайта", f"{result.summary()}\n\n{details}")
+
+    def on_build_failed(self, message):
+        self.status.showMessage("Сборка сайта не удалась")
+        QMessageBox.critical(self, "Сборка сайта", f"Не удалось собрать сайт:\n{message}")
+
+    def closeEvent(self, event):
+        if self.maybe_save():
+            self.build_cancel.set()
+            event.accept()
         else:
-            self.preview_area.setPlainText("")
-
-    def apply_filter(self):
-        txt = self.filter_input.text().strip()
-        if txt and not txt.startswith('.'):
-            txt = '.' + txt
-        self.filter_ext = txt.lower()
-        QMessageBox.information(self, "Фильтр", f"Фильтр по расширению: {self.filter_ext or 'нет'}.\n(В этом примере фильтр применяется при поиске или можно доработать через QSortFilterProxyModel.)")
-
-    def clear_filter(self):
-        self.filter_input.clear()
-        self.filter_ext = ""
-        QMessageBox.information(self, "Фильтр", "Фильтр очищен.")
+            event.ignore()
 
-    # Note: create_folder, copy_item, delete_item, rename_item, show_properties,
-    # human_size and get_disks are defined above and used here.
 
 def main():
     app = QApplication(sys.argv)
@@ -565,7 +526,7 @@ def main():
         app.processEvents()
         time.sleep(0.8)  # short pause to show splash
 
-    window = FileManager()
+    window = EditorWindow()
     window.show()
 
     if splash:
@@ -575,4 +536,5 @@ def main():
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # process pools in a PyInstaller build
     main()
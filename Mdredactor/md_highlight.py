@@ -0,0 +1,239 @@
+import re
+import time
+from collections import deque
+
+from PyQt5.QtCore import QTimer
+from PyQt5.QtGui import QSyntaxHighlighter, QTextCharFormat, QColor, QFont
+
+from code_tokens import code_tokens, lexer_for
+from md_render import fence_closes
+
+SYNC_BUDGET = 0.008      # seconds of code tokenizing per event-loop turn; the rest is deferred
+
+# block state bits (QSyntaxHighlighter keeps one int per block and re-highlights
+# the following block only when it changes)
+IN_FENCE = 1 << 0
+BOLD = 1 << 1
+ITALIC = 1 << 2
+IN_LIST = 1 << 3
+TILDE = 1 << 4
+FENCE_LEN_SHIFT = 5      # 4 bits, fence length capped at 15
+LANG_SHIFT = 9           # language id (0 = none) in the remaining bits
+
+_FENCE_OPEN = re.compile(r"^ {0,3}(`{3,}|~{3,})[ \t]*([\w+#.-]*)")
+_HEADING = re.compile(r"^ {0,3}#{1,6}(?:[ \t]|$)")
+_RULE = re.compile(r"^ {0,3}([-*_])(?:[ \t]*\1){2,}[ \t]*$")
+_QUOTE = re.compile(r"^ {0,3}>")
+_LIST_MARKER = re.compile(r"^[ \t]*(?:[*+-]|\d+[.)])(?:[ \t]+\[[ xX]\])?(?=[ \t]|$)")
+_INLINE = re.compile(r"(`+)|(\*\*|__)|(\*|_)|(!?\[[^\]\n]*\]\([^)\n]*\))")
+
+TOKEN_COLORS = {
+    "comment": "#6a9955",
+    "string": "#ce9178",
+    "number": "#b5cea8",
+    "keyword": "#569cd6",
+    "builtin": "#4ec9b0",
+    "definition": "#dcdcaa",
+    "operator": "#c586c0",
+}
+
+
+def _fmt(color=None, bold=False, italic=False, underline=False, background=None):
+    fmt = QTextCharFormat()
+    if color:
+        fmt.setForeground(QColor(color))
+    if background:
+        fmt.setBackground(QColor(background))
+    if bold:
+        fmt.setFontWeight(QFont.Bold)
+    if italic:
+        fmt.setFontItalic(True)
+    if underline:
+        fmt.setFontUnderline(True)
+    return fmt
+
+
+class MarkdownHighlighter(QSyntaxHighlighter):
+    """
+    Line-by-line Markdown highlighting with the context carried in block
+    states: an open code fence (with its language), emphasis still open at
+    the end of a line, and list continuation. Qt only calls highlightBlock()
+    for edited lines and keeps going while the resulting state differs, so
+    typing costs a line or a paragraph, not the document.
+
+    Code in a fence of a known language is coloured through code_tokens(),
+    which caches per line. Uncached lines are tokenized within SYNC_BUDGET
+    per event-loop turn; beyond that they are shown plain and re-highlighted
+    from a zero-interval timer, so opening a file full of code stays responsive.
+    """
+
+    def __init__(self, document):
+        super().__init__(document)
+        self.formats = {
+            "heading": _fmt("#4fc1ff", bold=True),
+            "quote": _fmt("#8a8a8a", italic=True),
+            "marker": _fmt("#d7ba7d", bold=True),
+            "rule": _fmt("#808080"),
+            "fence": _fmt("#808080", background="#2a2a2a"),
+            "code": _fmt("#d19a66"),
+            "link": _fmt("#3794ff", underline=True),
+            "bold": _fmt(bold=True),
+            "italic": _fmt(italic=True),
+            "bold_italic": _fmt(bold=True, italic=True),
+        }
+        self.token_formats = {name: _fmt(color) for name, color in TOKEN_COLORS.items()}
+        self._languages = [""]
+        self._language_ids = {"": 0}
+        self._spent = 0.0
+        self._pending = deque()
+        self._reset_timer = QTimer(self)
+        self._reset_timer.setSingleShot(True)
+        self._reset_timer.setInterval(0)
+        self._reset_timer.timeout.connect(self._reset_budget)
+        self._pending_timer = QTimer(self)
+        self._pending_timer.setSingleShot(True)
+        self._pending_timer.setInterval(0)
+        self._pending_timer.timeout.connect(self._highlight_pending)
+
+    # ---- state helpers ----
+    def _language_id(self, language):
+        language = language.lower() if lexer_for(language) is not None else ""
+        lang_id = self._language_ids.get(language)
+        if lang_id is None:
+            lang_id = self._language_ids[language] = len(self._languages)
+            self._languages.append(language)
+        return lang_id
+
+    def _reset_budget(self):
+        self._spent = 0.0
+
+    def highlightBlock(self, text):
+        previous = self.previousBlockState()
+        if previous < 0:
+            previous = 0
+        if previous & IN_FENCE:
+            self.setCurrentBlockState(self._fence_line(text, previous))
+        else:
+            self.setCurrentBlockState(self._text_line(text, previous))
+
+    # ---- fenced code ----
+    def _fence_line(self, text, state):
+        fence = ("~" if state & TILDE else "`") * ((state >> FENCE_LEN_SHIFT) & 0xF)
+        if fence_closes(text, fence):
+            self.setFormat(0, len(text), self.formats["fence"])
+            return 0
+        self.setFormat(0, len(text), self.formats["code"])
+        language = self._languages[state >> LANG_SHIFT]
+        if language and text.strip():
+            if self._spent < SYNC_BUDGET:
+                started = time.perf_counter()
+                tokens = code_tokens(language, text)
+                self._spent += time.perf_counter() - started
+                if not self._reset_timer.isActive():
+                    self._reset_timer.start()
+                for start, length, category in tokens:
+                    self.setFormat(start, length, self.token_formats[category])
+            else:
+                self._pending.append(self.currentBlock())
+                self._pending_timer.start()
+        return state
+
+    def _highlight_pending(self):
+        self._spent = 0.0
+        while self._pending and self._spent < SYNC_BUDGET:
+            block = self._pending.popleft()
+            if block.isValid():
+                self.rehighlightBlock(block)
+        if self._pending:
+            self._pending_timer.start()
+
+    # ---- Markdown text ----
+    def _text_line(self, text, state):
+        if not text.strip():
+            return state & IN_LIST  # a blank line ends open emphasis, not a list
+        m = _FENCE_OPEN.match(text)
+        if m is not None:
+            self.setFormat(0, len(text), self.formats["fence"])
+            fence = m.group(1)
+            return (IN_FENCE | (TILDE if fence[0] == "~" else 0)
+                    | (min(len(fence), 15) << FENCE_LEN_SHIFT)
+                    | (self._language_id(m.group(2)) << LANG_SHIFT))
+        if _HEADING.match(text):
+            self.setFormat(0, len(text), self.formats["heading"])
+            return 0
+        if _RULE.match(text):
+            self.setFormat(0, len(text), self.formats["rule"])
+            return 0
+        pos = 0
+        in_list = bool(state & IN_LIST) and text[0] in " \t"
+        if _QUOTE.match(text):
+            self.setFormat(0, len(text), self.formats["quote"])
+        m = _LIST_MARKER.match(text)
+        if m is not None:
+            self.setFormat(0, m.end(), self.formats["marker"])
+            pos = m.end()
+            in_list = True
+        return self._inline(text, pos, state & (BOLD | ITALIC)) | (IN_LIST if in_list else 0)
+
+    def _inline(self, text, pos, open_flags):
+        """Code spans, links and emphasis from pos on; returns the emphasis still open at the end."""
+        bold_start = 0 if open_flags & BOLD else -1
+        italic_start = 0 if open_flags & ITALIC else -1
+        ranges = []  # (start, end, BOLD | ITALIC)
+        length = len(text)
+        while True:
+            m = _INLINE.search(text, pos)
+            if m is None:
+                break
+            start, end = m.span()
+            pos = end
+            if m.group(1):
+                close = text.find(m.group(1), end)
+                if close >= 0:
+                    self.setFormat(start, close + len(m.group(1)) - start, self.formats["code"])
+                    pos = close + len(m.group(1))
+                continue
+            if m.group(4):
+                self.setFormat(start, end - start, self.formats["link"])
+                continue
+            delim = m.group(2) or m.group(3)
+            before = text[start - 1] if start else " "
+            after = text[end] if end < length else " "
+            kind = BOLD if m.group(2) else ITALIC
+            current = bold_start if kind == BOLD else italic_start
+            if current >= 0 and not before.isspace() and not (delim[0] == "_" and after.isalnum()):
+                ranges.append((current, end, kind))
+                current = -1
+            elif current < 0 and not after.isspace() and not (delim[0] == "_" and before.isalnum()):
+                current = start
+            if kind == BOLD:
+                bold_start = current
+            else:
+                italic_start = current
+        flags = 0
+        if bold_start >= 0:
+            ranges.append((bold_start, length, BOLD))
+            flags |= BOLD
+        if italic_start >= 0:
+            ranges.append((italic_start, length, ITALIC))
+            flags |= ITALIC
+        if ranges:
+            self._apply_emphasis(ranges)
+        return flags
+
+    def _apply_emphasis(self, ranges):
+        """Sweep the ranges so overlapping bold and italic parts get the combined format."""
+        ranges.sort()
+        if all(a[1] <= b[0] for a, b in zip(ranges, ranges[1:])):
+            for start, end, kind in ranges:  # the usual case: nothing nested
+                self.setFormat(start, end - start, self.formats["bold" if kind == BOLD else "italic"])
+            return
+        points = sorted({p for start, end, _kind in ranges for p in (start, end)})
+        for start, end in zip(points, points[1:]):
+            active = 0
+            for r_start, r_end, kind in ranges:
+                if r_start <= start and end <= r_end:
+                    active |= kind
+            if active:
+                name = {BOLD: "bold", ITALIC: "italic"}.get(active, "bold_italic")
+                self.setFormat(start, end - start, self.formats[name])
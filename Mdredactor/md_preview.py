@@ -0,0 +1,114 @@
+from PyQt5.QtWidgets import QTextBrowser
+from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtGui import QTextCursor, QTextFrameFormat
+
+from md_render import RenderWorker
+
+PREVIEW_CSS = """
+pre { background-color: rgba(127, 127, 127, 40); }
+code { font-family: monospace; }
+table { border-collapse: collapse; }
+th, td { border: 1px solid gray; padding: 2px 6px; }
+"""
+
+
+class RenderSignals(QObject):
+    rendered = pyqtSignal(int, object, object)  # generation, blocks, htmls
+
+
+class MarkdownPreview(QTextBrowser):
+    """
+    HTML preview laid out as one QTextFrame per top-level Markdown block.
+    An update compares the new HTML with the shown one: the common prefix
+    and suffix of frames stay as they are, changed frames in between get
+    new HTML and only the surplus frames are inserted or removed. Typing,
+    splitting a paragraph or deleting one block therefore lays out a few
+    frames instead of the whole document, and the scroll position stays put.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setOpenExternalLinks(True)
+        self.document().setUndoRedoEnabled(False)
+        self.document().setDefaultStyleSheet(PREVIEW_CSS)
+        self.htmls = []
+        self.frames = []
+        self._frame_format = QTextFrameFormat()
+        self._frame_format.setMargin(0)
+        self._frame_format.setPadding(0)
+        self._frame_format.setBorder(0)
+        self.signals = RenderSignals()
+        self.signals.rendered.connect(self.on_rendered)
+        self.worker = RenderWorker(self.signals.rendered.emit)
+
+    def render_text(self, text):
+        """Queue text for rendering in the background; the preview updates when it is done."""
+        self.worker.request(text)
+
+    def on_rendered(self, generation, blocks, htmls):
+        if generation != self.worker.generation:
+            return  # already superseded by newer text
+        self.show_blocks(blocks, htmls)
+
+    def show_blocks(self, blocks, htmls):
+        # htmls, not blocks, are compared: a changed reference definition
+        # alters the HTML of blocks whose text stayed the same
+        old = self.htmls
+        if not self.frames or not htmls:
+            self._rebuild(htmls)
+            return
+        shortest = min(len(old), len(htmls))
+        prefix = 0
+        while prefix < shortest and old[prefix] == htmls[prefix]:
+            prefix += 1
+        suffix = 0
+        while suffix < shortest - prefix and old[-1 - suffix] == htmls[-1 - suffix]:
+            suffix += 1
+        old_end, new_end = len(old) - suffix, len(htmls) - suffix
+        if prefix == old_end and prefix == new_end:
+            return
+        bar = self.verticalScrollBar()
+        scroll = bar.value()
+        cursor = QTextCursor(self.document())
+        cursor.beginEditBlock()
+        replaced = min(old_end, new_end) - prefix
+        for i in range(prefix, prefix + replaced):
+            frame = self.frames[i]
+            cursor.setPosition(frame.firstPosition())
+            cursor.setPosition(frame.lastPosition(), QTextCursor.KeepAnchor)
+            cursor.insertHtml(htmls[i])
+        middle = prefix + replaced
+        if old_end > new_end:
+            # a run of whole frames, boundary characters included, is removed at once
+            cursor.setPosition(self.frames[middle].firstPosition() - 1)
+            cursor.setPosition(self.frames[old_end - 1].lastPosition() + 1, QTextCursor.KeepAnchor)
+            cursor.removeSelectedText()
+            del self.frames[middle:old_end]
+        elif new_end > old_end:
+            for at in range(middle, new_end):
+                if at < len(self.frames):  # in front of the first frame of the suffix
+                    cursor.setPosition(self.frames[at].firstPosition() - 1)
+                else:
+                    cursor.setPosition(self.document().rootFrame().lastPosition())
+                self.frames.insert(at, cursor.insertFrame(self._frame_format))
+                cursor.insertHtml(htmls[at])
+        cursor.endEditBlock()
+        self.htmls = htmls
+        bar.setValue(scroll)
+
+    def _rebuild(self, htmls):
+        bar = self.verticalScrollBar()
+        scroll = bar.value()
+        doc = self.document()
+        doc.clear()
+        root = doc.rootFrame()
+        cursor = QTextCursor(doc)
+        cursor.beginEditBlock()
+        self.frames = []
+        for html in htmls:
+            cursor.setPosition(root.lastPosition())
+            self.frames.append(cursor.insertFrame(self._frame_format))
+            cursor.insertHtml(html)
+        cursor.endEditBlock()
+        self.htmls = htmls
+        bar.setValue(scroll)
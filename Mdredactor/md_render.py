@@ -0,0 +1,135 @@
+import re
+import threading
+from collections import OrderedDict
+
+import markdown
+
+MD_EXTENSIONS = ["fenced_code", "tables", "sane_lists"]
+CACHE_BLOCKS = 20000     # rendered blocks kept
+
+_FENCE = re.compile(r"^ {0,3}(`{3,}|~{3,})")
+_LIST_ITEM = re.compile(r"^ {0,3}(?:[*+-]|\d+[.)])[ \t]")
+_BLANK_RUN = re.compile(r"(\n(?:[ \t]*\n)+)")
+_REF_DEF = re.compile(r"^ {0,3}\[[^\]]+\]:[ \t]*\S")
+
+
+def fence_closes(line, fence):
+    m = _FENCE.match(line)
+    return (m is not None and m.group(1)[0] == fence[0] and len(m.group(1)) >= len(fence)
+            and not line[m.end():].strip())
+
+
+def _fence_after(chunk, fence):
+    """Open fence (or None) at the end of chunk, given the one open at its start."""
+    for line in chunk.split("\n"):
+        if fence is not None:
+            if fence_closes(line, fence):
+                fence = None
+        else:
+            m = _FENCE.match(line)
+            if m is not None:
+                fence = m.group(1)
+    return fence
+
+
+def split_blocks(text):
+    """
+    Split a document into top-level blocks that render independently:
+    runs of lines separated by blank lines, except that fenced code is
+    never split and indented lines or further items after a blank line
+    stay with the list or block above them. The blank-line split is one
+    regex pass; only chunks containing a fence are looked at line by line.
+    """
+    blocks = []
+    fence = None
+    in_list = False
+    parts = _BLANK_RUN.split(text)
+    for i in range(0, len(parts), 2):
+        chunk = parts[i]
+        if not chunk.strip():
+            continue
+        if blocks and (fence is not None or chunk[0] in " \t" or (in_list and _LIST_ITEM.match(chunk))):
+            blocks[-1] += parts[i - 1] + chunk  # keep the exact blank lines (they matter in code)
+        else:
+            blocks.append(chunk)
+            in_list = _LIST_ITEM.match(chunk) is not None
+        if fence is not None or "```" in chunk or "~~~" in chunk:
+            fence = _fence_after(chunk, fence)
+    return blocks
+
+
+def reference_definitions(blocks):
+    """Link reference definitions ([id]: url) are document-wide; blocks using [..] get them appended."""
+    return "\n".join(line for block in blocks if "]:" in block and not _FENCE.match(block)
+                     for line in block.split("\n") if _REF_DEF.match(line))
+
+
+class BlockRenderer:
+    """
+    Markdown to HTML one top-level block at a time, with rendered blocks
+    kept in an LRU keyed by their text (the dict hashes it), so an edit
+    only converts the blocks that actually changed. Not thread-safe: the
+    markdown.Markdown instance is reused.
+    """
+
+    def __init__(self, cache_blocks=CACHE_BLOCKS):
+        self._md = markdown.Markdown(extensions=MD_EXTENSIONS)
+        self._cache = OrderedDict()
+        self._cache_blocks = cache_blocks
+        self.rendered = 0  # blocks converted by the last render()
+
+    def render_block(self, block, refs=""):
+        key = (block, refs if refs and "[" in block else "")
+        html = self._cache.get(key)
+        if html is not None:
+            self._cache.move_to_end(key)
+            return html
+        self._md.reset()
+        html = self._md.convert(block + "\n\n" + key[1] if key[1] else block)
+        self._cache[key] = html
+        if len(self._cache) > self._cache_blocks:
+            self._cache.popitem(last=False)
+        self.rendered += 1
+        return html
+
+    def render(self, text):
+        """(blocks, htmls) for a whole document."""
+        self.rendered = 0
+        blocks = split_blocks(text)
+        refs = reference_definitions(blocks)
+        return blocks, [self.render_block(block, refs) for block in blocks]
+
+
+class RenderWorker:
+    """
+    Renders in a background thread and only cares about the newest text:
+    request() replaces any pending request, and results of requests that
+    were superseded meanwhile are dropped. on_result(generation, blocks,
+    htmls) is called from the worker thread.
+    """
+
+    def __init__(self, on_result):
+        self.on_result = on_result
+        self.generation = 0
+        self._pending = None
+        self._cond = threading.Condition()
+        self._renderer = BlockRenderer()
+        threading.Thread(target=self._loop, name="md-render", daemon=True).start()
+
+    def request(self, text):
+        with self._cond:
+            self.generation += 1
+            self._pending = (self.generation, text)
+            self._cond.notify()
+            return self.generation
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while self._pending is None:
+                    self._cond.wait()
+                generation, text = self._pending
+                self._pending = None
+            blocks, htmls = self._renderer.render(text)
+            if generation == self.generation:
+                self.on_result(generation, blocks, htmls)
@@ -0,0 +1,368 @@
+import argparse
+import hashlib
+import html
+import itertools
+import json
+import multiprocessing
+import os
+import posixpath
+import re
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import markdown
+from markdown.extensions import Extension
+from markdown.treeprocessors import Treeprocessor
+
+from md_render import MD_EXTENSIONS
+
+MANIFEST_NAME = ".mdsite-manifest.json"
+MANIFEST_VERSION = 1
+MD_SUFFIXES = (".md", ".markdown")
+PAGES_PER_TASK = 16      # pages per round trip to the pool
+IN_PROCESS_MAX = 8       # smaller rebuilds are not worth starting the pool for
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+body {{ max-width: 50em; margin: 2em auto; padding: 0 1em; font-family: sans-serif; line-height: 1.5; }}
+pre {{ background: #f4f4f4; padding: .5em; overflow-x: auto; }}
+table {{ border-collapse: collapse; }}
+th, td {{ border: 1px solid #ccc; padding: .2em .6em; }}
+a.broken {{ color: #c00; text-decoration: line-through; }}
+</style>
+</head>
+<body>
+{body}
+</body>
+</html>
+"""
+
+# the manifest is only valid for output made with the same settings
+CONFIG_KEY = hashlib.blake2b(repr((MANIFEST_VERSION, MD_EXTENSIONS, PAGE_TEMPLATE)).encode(),
+                             digest_size=8).hexdigest()
+
+_TITLE = re.compile(r"^ {0,3}#[ \t]+(.+?)[ \t#]*$", re.M)
+_LINK = re.compile(r"\]\(\s*<?([^)\s>]+)|^ {0,3}\[[^\]]+\]:[ \t]*<?(\S+?)>?[ \t]*$", re.M)
+
+
+def page_title(text, rel):
+    m = _TITLE.search(text)
+    return m.group(1) if m else posixpath.splitext(posixpath.basename(rel))[0]
+
+
+def link_target(href, rel):
+    """Source-relative page an href in page rel points to, or None if it is not a local page link."""
+    path = href.split("#", 1)[0]
+    if not path.lower().endswith(MD_SUFFIXES) or ":" in path or path.startswith("/"):
+        return None
+    return posixpath.normpath(posixpath.join(posixpath.dirname(rel), path))
+
+
+def page_links(text, rel):
+    """Pages a source links to (inline and reference links; code is not excluded, which only over-approximates)."""
+    targets = set()
+    for m in _LINK.finditer(text):
+        target = link_target(m.group(1) or m.group(2), rel)
+        if target is not None:
+            targets.add(target)
+    return sorted(targets)
+
+
+def html_name(rel):
+    return posixpath.splitext(rel)[0] + ".html"
+
+
+# ---- rendering (runs in pool workers) ----
+_titles = {}
+_converter = None
+
+
+def _init_worker(titles):
+    global _titles
+    _titles = titles
+
+
+class _LinkRewriter(Treeprocessor):
+    """page.md links -> page.html, with the target's title as tooltip and class="broken" if it does not exist."""
+
+    rel = ""  # the page being converted
+
+    def run(self, root):
+        for a in root.iter("a"):
+            href = a.get("href", "")
+            target = link_target(href, self.rel)
+            if target is None:
+                continue
+            path, sep, fragment = href.partition("#")
+            a.set("href", posixpath.splitext(path)[0] + ".html" + sep + fragment)
+            title = _titles.get(target)
+            if title is None:
+                a.set("class", "broken")
+            elif not a.get("title"):
+                a.set("title", title)
+
+
+class _LinkExtension(Extension):
+    def extendMarkdown(self, md):
+        md.link_rewriter = _LinkRewriter(md)
+        md.treeprocessors.register(md.link_rewriter, "mdsite_links", 0)
+
+
+def _convert(text, rel):
+    """Markdown to HTML with one converter per process, reset between pages."""
+    global _converter
+    if _converter is None:
+        _converter = markdown.Markdown(extensions=MD_EXTENSIONS + [_LinkExtension()])
+    _converter.reset()
+    _converter.link_rewriter.rel = rel
+    return _converter.convert(text)
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _render_page(src_root, out_root, rel):
+    with open(os.path.join(src_root, rel), "r", encoding="utf-8", errors="replace") as f:
+        text = f.read()
+    body = _convert(text, rel)
+    title = _titles.get(rel) or page_title(text, rel)
+    _write_atomic(os.path.join(out_root, html_name(rel)),
+                  PAGE_TEMPLATE.format(title=html.escape(title), body=body))
+
+
+def _render_batch(src_root, out_root, rels):
+    out = []
+    for rel in rels:
+        try:
+            _render_page(src_root, out_root, rel)
+            out.append((rel, None))
+        except (OSError, ValueError) as e:
+            out.append((rel, str(e)))
+    return out
+
+
+def _render_all(src_root, out_root, rels, titles, cancel=None, workers=None):
+    """Yield (rel, error) per page; bounded batches in flight like hashing.hash_files()."""
+    if len(rels) <= IN_PROCESS_MAX:
+        _init_worker(titles)
+        for rel in rels:
+            if cancel is not None and cancel.is_set():
+                return
+            yield from _render_batch(src_root, out_root, [rel])
+        return
+    workers = workers or os.cpu_count() or 2
+    it = iter(rels)
+    # spawn, not fork: the editor starts builds from a worker thread
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_init_worker, initargs=(titles,)) as pool:
+        running = set()
+        exhausted = False
+        while running or not exhausted:
+            if cancel is not None and cancel.is_set():
+                pool.shutdown(wait=True, cancel_futures=True)
+                return
+            while not exhausted and len(running) < workers * 2:
+                batch = list(itertools.islice(it, PAGES_PER_TASK))
+                if not batch:
+                    exhausted = True
+                    break
+                running.add(pool.submit(_render_batch, src_root, out_root, batch))
+            if not running:
+                break
+            done, running = wait(running, timeout=0.2, return_when=FIRST_COMPLETED)
+            for fut in done:
+                yield from fut.result()
+
+
+# ---- build ----
+def scan_sources(src_root, out_root):
+    """({rel: (size, mtime_ns)} of pages, same for other files); hidden entries and out_root are skipped."""
+    pages, assets = {}, {}
+    skip = os.path.normcase(os.path.abspath(out_root))
+    stack = [("", src_root)]
+    while stack:
+        rel_dir, path = stack.pop()
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    if entry.name.startswith("."):
+                        continue
+                    rel = posixpath.join(rel_dir, entry.name) if rel_dir else entry.name
+                    try:
+                        if entry.is_dir():
+                            if os.path.normcase(os.path.abspath(entry.path)) != skip:
+                                stack.append((rel, entry.path))
+                            continue
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    target = pages if entry.name.lower().endswith(MD_SUFFIXES) else assets
+                    target[rel] = (st.st_size, st.st_mtime_ns)
+        except OSError:
+            continue
+    return pages, assets
+
+
+def load_manifest(out_root):
+    try:
+        with open(os.path.join(out_root, MANIFEST_NAME), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {"pages": {}, "assets": {}}
+    if manifest.get("config") != CONFIG_KEY:
+        return {"pages": {}, "assets": {}}
+    return manifest
+
+
+def save_manifest(out_root, manifest):
+    manifest["config"] = CONFIG_KEY
+    _write_atomic(os.path.join(out_root, MANIFEST_NAME), json.dumps(manifest, ensure_ascii=False))
+
+
+class BuildResult:
+    def __init__(self):
+        self.built = []
+        self.unchanged = 0
+        self.removed = 0
+        self.copied = 0
+        self.errors = []      # [(rel, message)]
+        self.cancelled = False
+        self.seconds = 0.0
+
+    def summary(self):
+        text = (f"собрано: {len(self.built)}, без изменений: {self.unchanged}, удалено: {self.removed}, "
+                f"файлов скопировано: {self.copied}, ошибок: {len(self.errors)}, {self.seconds:.2f} с")
+        return ("прервано; " + text) if self.cancelled else text
+
+
+def build_site(src_root, out_root, force=False, workers=None, cancel=None, progress=None):
+    """
+    Convert every Markdown file under src_root to out_root/<same path>.html.
+
+    A manifest in out_root remembers each page's stat, content hash, title
+    and the pages it links to. A page is rebuilt when its content changed
+    or its output is missing, and so is every page linking to a page that
+    was added, removed or retitled (links show the target's title and
+    broken links are marked). Unchanged stat means unchanged content, so a
+    no-op build reads no sources. Other files are copied when their stat
+    differs. progress(done, total) is called while pages are rendered.
+    """
+    started = time.perf_counter()
+    src_root = os.path.abspath(src_root)
+    out_root = os.path.abspath(out_root)
+    result = BuildResult()
+    pages, assets = scan_sources(src_root, out_root)
+    manifest = {"pages": {}, "assets": {}} if force else load_manifest(out_root)
+    old_pages = manifest["pages"]
+    new_pages = {}
+    changed = set()
+    for rel, (size, mtime_ns) in pages.items():
+        entry = old_pages.get(rel)
+        if entry is not None and entry["size"] == size and entry["mtime_ns"] == mtime_ns:
+            new_pages[rel] = entry
+            continue
+        try:
+            with open(os.path.join(src_root, rel), "rb") as f:
+                data = f.read()
+        except OSError as e:
+            result.errors.append((rel, str(e)))
+            continue
+        digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+        if entry is not None and entry["hash"] == digest:
+            new_pages[rel] = dict(entry, size=size, mtime_ns=mtime_ns)  # touched, not changed
+            continue
+        text = data.decode("utf-8", errors="replace")
+        new_pages[rel] = {"size": size, "mtime_ns": mtime_ns, "hash": digest,
+                          "title": page_title(text, rel), "links": page_links(text, rel)}
+        changed.add(rel)
+
+    # pages whose existence or title changed affect every page linking to them
+    removed = set(old_pages) - set(new_pages)
+    affected = set(removed) | {rel for rel in changed
+                               if rel not in old_pages or old_pages[rel]["title"] != new_pages[rel]["title"]}
+    rebuild = set(changed)
+    if affected:
+        rebuild.update(rel for rel, entry in new_pages.items() if not affected.isdisjoint(entry["links"]))
+    rebuild.update(rel for rel in new_pages
+                   if rel not in rebuild and not os.path.exists(os.path.join(out_root, html_name(rel))))
+
+    for rel in removed:
+        try:
+            os.remove(os.path.join(out_root, html_name(rel)))
+            result.removed += 1
+        except OSError:
+            pass
+
+    titles = {rel: entry["title"] for rel, entry in new_pages.items()}
+    todo = sorted(rebuild)
+    result.unchanged = len(new_pages) - len(todo)
+    failed = set()
+    for done, (rel, error) in enumerate(_render_all(src_root, out_root, todo, titles, cancel, workers), 1):
+        if error is None:
+            result.built.append(rel)
+        else:
+            result.errors.append((rel, error))
+            failed.add(rel)
+        if progress is not None:
+            progress(done, len(todo))
+    if cancel is not None and cancel.is_set():
+        result.cancelled = True
+        failed.update(set(todo) - set(result.built))
+    for rel in failed:
+        new_pages.pop(rel, None)  # not in the manifest, so the next build retries it
+
+    old_assets = manifest["assets"]
+    new_assets = {}
+    for rel, stat in assets.items():
+        if cancel is not None and cancel.is_set():
+            result.cancelled = True
+            break
+        dest = os.path.join(out_root, rel)
+        if old_assets.get(rel) != list(stat) or not os.path.exists(dest):
+            try:
+                os.makedirs(os.path.dirname(dest), exist_ok=True)
+                shutil.copy2(os.path.join(src_root, rel), dest)
+                result.copied += 1
+            except OSError as e:
+                result.errors.append((rel, str(e)))
+                continue
+        new_assets[rel] = list(stat)
+    for rel in set(old_assets) - set(assets):
+        try:
+            os.remove(os.path.join(out_root, rel))
+        except OSError:
+            pass
+
+    save_manifest(out_root, {"pages": new_pages, "assets": new_assets})
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Собрать HTML-сайт из папки Markdown-заметок.")
+    parser.add_argument("source", help="папка с .md файлами")
+    parser.add_argument("output", nargs="?", help="папка для HTML (по умолчанию <source>/_site)")
+    parser.add_argument("-f", "--force", action="store_true", help="пересобрать всё, игнорируя манифест")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="число процессов")
+    args = parser.parse_args(argv)
+    output = args.output or os.path.join(args.source, "_site")
+    result = build_site(args.source, output, force=args.force, workers=args.jobs)
+    for rel, error in result.errors:
+        print(f"{rel}: {error}", file=sys.stderr)
+    print(result.summary())
+    return 1 if result.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())